@@ -32,6 +32,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/dev/ref/settings/
 """
 import pathlib
+import tempfile
 
 import environ
 
@@ -320,10 +321,34 @@ MODEL_PATH = pathlib.Path(BASE_PATH, "model")
 # HTTP configuration
 HTTP_SEC_HOST = "https://www.sec.gov"
 HTTP_SEC_INDEX_PATH = "/Archives/edgar/daily-index/"
+HTTP_SEC_FULL_INDEX_PATH = "/Archives/edgar/full-index/"
+HTTP_SEC_FULL_INDEX_MIN_YEAR = 1993
 HTTP_SEC_FILING_PATH = "/Archives/"
 HTTP_SEC_LOCAL_PATH = pathlib.Path(DATA_PATH, "sec-http")
 HTTP_FAIL_SLEEP = [15, 30, 60, 300]
 HTTP_SLEEP_DEFAULT = 0.0
+# SEC fair access policy asks for a User-Agent declaring the organization and a contact email
+HTTP_USER_AGENT = env('HTTP_USER_AGENT', default="OpenEDGAR admin@example.com")
+HTTP_CONNECT_TIMEOUT = float(env('HTTP_CONNECT_TIMEOUT', default=10))
+HTTP_READ_TIMEOUT = float(env('HTTP_READ_TIMEOUT', default=60))
+# Keep-alive connections per host in each worker process's EDGAR session
+HTTP_POOL_SIZE = int(env('HTTP_POOL_SIZE', default=10))
+# Requests in flight per worker for bulk asynchronous downloads
+HTTP_ASYNC_CONCURRENCY = int(env('HTTP_ASYNC_CONCURRENCY', default=16))
+
+# Conditional-GET cache of EDGAR listings and index validators; listings for quarters that closed more than
+# HTTP_CACHE_IMMUTABLE_DAYS ago are never requested again
+HTTP_CACHE_PATH = env('HTTP_CACHE_PATH', default=str(pathlib.Path(DATA_PATH, "http-cache")))
+HTTP_CACHE_IMMUTABLE_DAYS = int(env('HTTP_CACHE_IMMUTABLE_DAYS', default=7))
+
+# Fleet-wide sec.gov rate limit, shared through Redis when a URL is set and through a lock file otherwise;
+# SEC allows at most 10 requests per second, so leave some headroom for clock and network jitter
+HTTP_RATE_LIMIT = float(env('HTTP_RATE_LIMIT', default=9.0))
+HTTP_RATE_LIMIT_BURST = int(env('HTTP_RATE_LIMIT_BURST', default=1))
+HTTP_RATE_LIMIT_REDIS_URL = env('HTTP_RATE_LIMIT_REDIS_URL', default=env('REDIS_URL', default=''))
+HTTP_RATE_LIMIT_KEY = env('HTTP_RATE_LIMIT_KEY', default='openedgar:http-rate-limit')
+HTTP_RATE_LIMIT_LOCK_PATH = env('HTTP_RATE_LIMIT_LOCK_PATH',
+                                default=str(pathlib.Path(tempfile.gettempdir(), "openedgar-http-rate-limit")))
 
 # S3 bucket configuration
 S3_ACCESS_KEY = env('S3_ACCESS_KEY', default="")
@@ -337,3 +362,25 @@ S3_COMPRESSION_LEVEL = int(env('S3_COMPRESSION_LEVEL', default=6))
 TIKA_HOST = "localhost"
 TIKA_PORT = 9998
 TIKA_ENDPOINT = "http://{0}:{1}/tika".format(TIKA_HOST, TIKA_PORT)
+TIKA_MAX_WORKERS = int(env('TIKA_MAX_WORKERS', default=4))
+TIKA_TIMEOUT = float(env('TIKA_TIMEOUT', default=300))
+
+# Tika servers to balance extraction across, e.g., http://localhost:9998,http://localhost:9999
+TIKA_ENDPOINTS = env.list('TIKA_ENDPOINTS', default=["http://{0}:{1}".format(TIKA_HOST, TIKA_PORT)])
+TIKA_CONNECT_TIMEOUT = float(env('TIKA_CONNECT_TIMEOUT', default=5))
+# Keep-alive connections held per Tika endpoint in each worker process
+TIKA_POOL_SIZE = int(env('TIKA_POOL_SIZE', default=TIKA_MAX_WORKERS))
+TIKA_HEALTH_INTERVAL = float(env('TIKA_HEALTH_INTERVAL', default=30))
+# Consecutive failures before an endpoint is taken out of rotation, and seconds before it is retried
+TIKA_FAILURE_THRESHOLD = int(env('TIKA_FAILURE_THRESHOLD', default=3))
+TIKA_RECOVERY_TIMEOUT = float(env('TIKA_RECOVERY_TIMEOUT', default=60))
+
+# Uuencoded documents larger than this are decoded to temporary files rather than memory
+MAX_IN_MEMORY_DOCUMENT_BYTES = int(env('MAX_IN_MEMORY_DOCUMENT_BYTES', default=64 * 1024 * 1024))
+
+# Optional secondary digest stored alongside SHA-1 for dedupe lookups and sharding: xxh64 (requires xxhash), blake2b,
+# or empty to disable; note that blake2b is slower than hardware-accelerated SHA-1
+SECONDARY_DIGEST = env('SECONDARY_DIGEST', default='')
+
+# Extracted text cache size, in characters per worker process
+TEXT_CACHE_SIZE = int(env('TEXT_CACHE_SIZE', default=64 * 1024 * 1024))
@@ -0,0 +1,438 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Synthetic EDGAR corpus generator for offline parser tests and benchmarks.
+
+Usage:
+    python -m openedgar.benchmarks.corpus OUTPUT_PATH [--filing-count N] [--seed N] [--max-size BYTES]
+"""
+
+# Libraries
+import argparse
+import binascii
+import collections
+import datetime
+import gzip
+import hashlib
+import os
+import random
+from typing import BinaryIO, Iterable, List
+
+# Packages
+import numpy
+
+# Generated filing and document metadata, with the SHA-1 the parser should report for each document
+GeneratedDocument = collections.namedtuple("GeneratedDocument", ["type", "sequence", "file_name", "content_type",
+                                                                 "sha1"])
+GeneratedFiling = collections.namedtuple("GeneratedFiling", ["accession_number", "form_type", "cik", "company_name",
+                                                             "date_filed", "file_name", "size", "documents"])
+
+# Text content
+WORDS = ["the", "company", "shares", "common", "stock", "fiscal", "year", "quarter", "net", "income", "revenue",
+         "operating", "expenses", "agreement", "board", "directors", "pursuant", "section", "exchange", "act",
+         "securities", "report", "financial", "statements", "period", "ended", "december", "million", "per",
+         "share", "risk", "factors", "management", "discussion", "analysis", "results", "operations", "cash"]
+LATIN_WORDS = ["société", "générale", "café", "zürich", "§", "©", "straße", "niño"]
+FORM_TYPES = ["10-K", "10-Q", "8-K", "4", "SC 13G/A", "S-1/A", "DEF 14A", "424B2"]
+TEXT_BLOCK_SIZE = 64 * 1024
+
+# uuencoding; full lines encode 45 bytes
+UUENCODE_LINE_SIZE = 45
+
+
+def get_paragraph(rng: random.Random, word_count: int, latin: bool = False):
+    """
+    Get a paragraph of filing-like words.
+    :param rng: random generator
+    :param word_count: number of words
+    :param latin: whether to include ISO 8859-1 characters
+    :return: str
+    """
+    words = [rng.choice(LATIN_WORDS if latin and rng.random() < 0.05 else WORDS) for _ in range(word_count)]
+    return " ".join(words).capitalize() + "."
+
+
+def get_text_block(rng: random.Random, size: int, html: bool = False, latin: bool = False):
+    """
+    Get a block of plain text or HTML paragraphs of about the given size.
+    :param rng: random generator
+    :param size: approximate size in characters
+    :param html: whether to wrap paragraphs and tables in HTML tags
+    :param latin: whether to include ISO 8859-1 characters
+    :return: str
+    """
+    paragraphs = []
+    length = 0
+    while length < size:
+        if html and rng.random() < 0.1:
+            paragraph = "<TABLE>\n" + "".join("<TR><TD>{0}</TD><TD ALIGN=\"right\">{1:,}</TD></TR>\n"
+                                              .format(rng.choice(WORDS), rng.randint(0, 10 ** 7))
+                                              for _ in range(rng.randint(2, 10))) + "</TABLE>"
+        elif html:
+            paragraph = "<P>{0}</P>".format(get_paragraph(rng, rng.randint(20, 120), latin))
+        else:
+            paragraph = get_paragraph(rng, rng.randint(20, 120), latin)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs) + "\n"
+
+
+def get_header(header_type: str, accession_number: str, form_type: str, cik: int, company_name: str,
+               date_filed: datetime.date, document_count: int):
+    """
+    Get an SEC-HEADER or IMS-HEADER block with its opening document tags.
+    :param header_type: SEC or IMS
+    :param accession_number: accession number
+    :param form_type: form type
+    :param cik: CIK
+    :param company_name: company name
+    :param date_filed: date filed
+    :param document_count: number of documents
+    :return: str
+    """
+    date_value = date_filed.strftime("%Y%m%d")
+    lines = []
+    if header_type == "IMS":
+        lines += ["-----BEGIN PRIVACY-ENHANCED MESSAGE-----",
+                  "Proc-Type: 2001,MIC-CLEAR",
+                  "Originator-Name: webmaster@www.sec.gov",
+                  "Originator-Key-Asymmetric:",
+                  " MFgwCgYEVQgBAQICAf8DSgAwRwJAW2sNKK9AVtBzYZmr6aGjlWyK3XmZv3dTINen",
+                  "MIC-Info: RSA-MD5,RSA,",
+                  " AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA",
+                  "",
+                  "<IMS-DOCUMENT>{0}.txt : {1}".format(accession_number, date_value),
+                  "<IMS-HEADER>{0}.hdr.sgml : {1}".format(accession_number, date_value)]
+        sic = "4911"
+    else:
+        lines += ["<SEC-DOCUMENT>{0}.txt : {1}".format(accession_number, date_value),
+                  "<SEC-HEADER>{0}.hdr.sgml : {1}".format(accession_number, date_value),
+                  "<ACCEPTANCE-DATETIME>{0}160000".format(date_value)]
+        sic = "SERVICES-PREPACKAGED SOFTWARE [7372]"
+
+    lines += ["ACCESSION NUMBER:\t\t{0}".format(accession_number),
+              "CONFORMED SUBMISSION TYPE:\t{0}".format(form_type),
+              "PUBLIC DOCUMENT COUNT:\t\t{0}".format(document_count),
+              "CONFORMED PERIOD OF REPORT:\t{0}".format(date_value),
+              "FILED AS OF DATE:\t\t{0}".format(date_value),
+              "",
+              "FILER:",
+              "",
+              "\tCOMPANY DATA:\t",
+              "\t\tCOMPANY CONFORMED NAME:\t\t\t{0}".format(company_name),
+              "\t\tCENTRAL INDEX KEY:\t\t\t{0:010d}".format(cik),
+              "\t\tSTANDARD INDUSTRIAL CLASSIFICATION:\t{0}".format(sic),
+              "\t\tIRS NUMBER:\t\t\t\t{0:09d}".format(cik * 7 % 10 ** 9),
+              "\t\tSTATE OF INCORPORATION:\t\t\tDE",
+              "\t\tFISCAL YEAR END:\t\t\t1231",
+              "",
+              "\tFILING VALUES:",
+              "\t\tFORM TYPE:\t\t{0}".format(form_type),
+              "\t\tSEC ACT:\t\t1934 Act",
+              "\t\tSEC FILE NUMBER:\t001-{0:05d}".format(cik % 10 ** 5),
+              "",
+              "\tBUSINESS ADDRESS:\t",
+              "\t\tSTREET 1:\t\t1 MAIN STREET",
+              "\t\tCITY:\t\t\tNEW YORK",
+              "\t\tSTATE:\t\t\tNY",
+              "\t\tZIP:\t\t\t10001",
+              "",
+              "\tMAIL ADDRESS:\t",
+              "\t\tSTREET 1:\t\tPO BOX 1",
+              "\t\tCITY:\t\t\tNEWARK",
+              "\t\tSTATE:\t\t\tNJ",
+              "\t\tZIP:\t\t\t07101",
+              "</{0}-HEADER>".format(header_type)]
+    return "\n".join(lines) + "\n"
+
+
+def write_text_document(out_file: BinaryIO, rng: random.Random, doc_type: str, sequence: int, file_name: str,
+                        size: int, html: bool, encoding: str):
+    """
+    Write a plain text or HTML <DOCUMENT>, repeating a generated block of text to reach large sizes.
+    :param out_file: binary file to write to
+    :param rng: random generator
+    :param doc_type: document type
+    :param sequence: document sequence
+    :param file_name: document file name, or None for old filings without <FILENAME> tags
+    :param size: approximate content size in bytes
+    :param html: whether to generate HTML
+    :param encoding: text encoding, e.g., utf-8 or iso-8859-1
+    :return: (bytes written, GeneratedDocument) tuple
+    """
+    latin = encoding == "iso-8859-1"
+    metadata = "<DOCUMENT>\n<TYPE>{0}\n<SEQUENCE>{1}\n".format(doc_type, sequence)
+    if file_name is not None:
+        metadata += "<FILENAME>{0}\n".format(file_name)
+    metadata += "<DESCRIPTION>{0}\n<TEXT>".format(doc_type)
+
+    block = get_text_block(rng, min(size, TEXT_BLOCK_SIZE), html, latin).encode(encoding)
+    if html:
+        prefix, suffix = b"\n<HTML>\n<BODY>\n", b"</BODY>\n</HTML>\n"
+    else:
+        prefix, suffix = b"\n", b""
+
+    sha1 = hashlib.sha1()
+    written = out_file.write(metadata.encode(encoding))
+    for chunk in [prefix] + [block] * max(1, size // len(block)) + [suffix]:
+        sha1.update(chunk)
+        written += out_file.write(chunk)
+    written += out_file.write(b"</TEXT>\n</DOCUMENT>\n")
+
+    content_type = "text/html" if html else "text/plain"
+    return written, GeneratedDocument(doc_type, str(sequence), file_name, content_type, sha1.hexdigest())
+
+
+def write_uuencoded_document(out_file: BinaryIO, seed: int, doc_type: str, sequence: int, file_name: str, size: int):
+    """
+    Write a uuencoded binary <DOCUMENT>, e.g., a PDF or ZIP exhibit, with random content.
+    :param out_file: binary file to write to
+    :param seed: seed for the random content
+    :param doc_type: document type
+    :param sequence: document sequence
+    :param file_name: document file name ending in .pdf or .zip
+    :param size: decoded content size in bytes
+    :return: (bytes written, GeneratedDocument) tuple
+    """
+    is_pdf = file_name.lower().endswith(".pdf")
+    data = numpy.random.RandomState(seed).bytes(size)
+    if is_pdf:
+        data = b"%PDF-1.4\n" + data[len(b"%PDF-1.4\n"):]
+
+    encoded_lines = [binascii.b2a_uu(data[i:i + UUENCODE_LINE_SIZE]) for i in range(0, len(data), UUENCODE_LINE_SIZE)]
+    content = b"begin 644 " + file_name.encode("utf-8") + b"\n" + b"".join(encoded_lines) + b"`\nend\n"
+    if is_pdf:
+        content = b"\n<PDF>\n" + content + b"</PDF>\n"
+    else:
+        content = b"\n" + content
+
+    written = out_file.write("<DOCUMENT>\n<TYPE>{0}\n<SEQUENCE>{1}\n<FILENAME>{2}\n<DESCRIPTION>{0}\n<TEXT>"
+                             .format(doc_type, sequence, file_name).encode("utf-8"))
+    written += out_file.write(content)
+    written += out_file.write(b"</TEXT>\n</DOCUMENT>\n")
+
+    content_type = "application/pdf" if is_pdf else "application/zip"
+    return written, GeneratedDocument(doc_type, str(sequence), file_name, content_type, hashlib.sha1(data).hexdigest())
+
+
+def write_filing(out_file: BinaryIO, seed: int = 0, header_type: str = "SEC", form_type: str = "10-K",
+                 cik: int = 1234, company_name: str = None, date_filed: datetime.date = datetime.date(2018, 1, 2),
+                 main_size: int = 8 * 1024, exhibit_count: int = 2, exhibit_size: int = 4 * 1024, pdf_count: int = 0,
+                 zip_count: int = 0, binary_size: int = 64 * 1024, encoding: str = "utf-8"):
+    """
+    Write a synthetic SGML submission.  Large filings are written in blocks, so sizes up to and beyond
+    1 GB can be generated without holding the filing in memory.
+    :param out_file: binary file to write to
+    :param seed: seed for all generated content
+    :param header_type: SEC for modern SEC-HEADER filings, or IMS for old IMS-HEADER filings
+    :param form_type: form type
+    :param cik: CIK
+    :param company_name: company name; generated from the CIK if not set
+    :param date_filed: date filed
+    :param main_size: approximate size of the main document in bytes
+    :param exhibit_count: number of plain text and HTML exhibits
+    :param exhibit_size: approximate size of each exhibit in bytes
+    :param pdf_count: number of uuencoded PDF exhibits
+    :param zip_count: number of uuencoded ZIP exhibits
+    :param binary_size: decoded size of each PDF and ZIP exhibit in bytes
+    :param encoding: text encoding; iso-8859-1 includes non-ASCII bytes in names and text
+    :return: GeneratedFiling
+    """
+    rng = random.Random(seed)
+    if company_name is None:
+        company_name = "EXAMPLE {0} CO".format(cik) if encoding != "iso-8859-1" else "SOCIÉTÉ {0} S.A.".format(cik)
+    accession_number = "{0:010d}-{1:02d}-{2:06d}".format(cik, date_filed.year % 100, seed % 10 ** 6)
+    is_old = header_type == "IMS"
+    html = not is_old
+    document_count = 1 + exhibit_count + pdf_count + zip_count
+
+    size = out_file.write(get_header(header_type, accession_number, form_type, cik, company_name, date_filed,
+                                     document_count).encode(encoding))
+    documents = []
+
+    # Main document and text exhibits
+    file_name = None if is_old else "d{0}{1}.htm".format(seed, form_type.lower().replace(" ", "").replace("/", ""))
+    written, document = write_text_document(out_file, rng, form_type, 1, file_name, main_size, html, encoding)
+    size += written
+    documents.append(document)
+
+    for i in range(exhibit_count):
+        sequence = len(documents) + 1
+        exhibit_html = html and i % 2 == 0
+        file_name = None if is_old else "d{0}dex{1}.{2}".format(seed, sequence, "htm" if exhibit_html else "txt")
+        written, document = write_text_document(out_file, rng, "EX-99.{0}".format(i + 1), sequence, file_name,
+                                                exhibit_size, exhibit_html, encoding)
+        size += written
+        documents.append(document)
+
+    # Binary exhibits
+    for i in range(pdf_count + zip_count):
+        sequence = len(documents) + 1
+        extension = "pdf" if i < pdf_count else "zip"
+        written, document = write_uuencoded_document(out_file, seed * 1000 + sequence, extension.upper(), sequence,
+                                                     "d{0}dex{1}.{2}".format(seed, sequence, extension), binary_size)
+        size += written
+        documents.append(document)
+
+    if is_old:
+        size += out_file.write(b"</IMS-DOCUMENT>\n-----END PRIVACY-ENHANCED MESSAGE-----\n")
+    else:
+        size += out_file.write(b"</SEC-DOCUMENT>\n")
+
+    file_name = "edgar/data/{0}/{1}.txt".format(cik, accession_number)
+    return GeneratedFiling(accession_number, form_type, cik, company_name, date_filed, file_name, size, documents)
+
+
+def write_daily_index(out_file: BinaryIO, filings: Iterable[GeneratedFiling]):
+    """
+    Write a fixed-width daily form index, e.g., form.20180102.idx.
+    :param out_file: binary file to write to
+    :param filings: filings to list
+    :return:
+    """
+    lines = ["Description:           Daily Index of EDGAR Dissemination Feed by Form Type",
+             "Last Data Received:    January 2, 2018",
+             "Comments:              webmaster@sec.gov",
+             "Anonymous FTP:         ftp://ftp.sec.gov/edgar/",
+             " ", " ", " ",
+             "Form Type   Company Name                                                  CIK         Date Filed  "
+             "File Name",
+             "-" * 141]
+    for filing in sorted(filings, key=lambda f: (f.form_type, f.company_name)):
+        lines.append("{0:<12}{1:<62}{2:<12}{3:<12}{4}".format(filing.form_type, filing.company_name, filing.cik,
+                                                              filing.date_filed.strftime("%Y%m%d"), filing.file_name))
+    out_file.write(("\n".join(lines) + "\n").encode("iso-8859-1"))
+
+
+def write_master_index(out_file: BinaryIO, filings: Iterable[GeneratedFiling]):
+    """
+    Write a pipe-delimited quarterly master index, e.g., full-index/2018/QTR1/master.idx.
+    :param out_file: binary file to write to
+    :param filings: filings to list
+    :return:
+    """
+    lines = ["Description:           Master Index of EDGAR Dissemination Feed",
+             "Last Data Received:    March 31, 2018",
+             "Comments:              webmaster@sec.gov",
+             "Anonymous FTP:         ftp://ftp.sec.gov/edgar/",
+             "Cloud HTTP:            https://www.sec.gov/Archives/",
+             " ", " ", " ",
+             "CIK|Company Name|Form Type|Date Filed|Filename",
+             "-" * 80]
+    for filing in sorted(filings, key=lambda f: (f.cik, f.date_filed)):
+        lines.append("{0}|{1}|{2}|{3}|{4}".format(filing.cik, filing.company_name, filing.form_type,
+                                                  filing.date_filed.isoformat(), filing.file_name))
+    out_file.write(("\n".join(lines) + "\n").encode("iso-8859-1"))
+
+
+def get_filing_profiles(filing_count: int, seed: int = 0, max_size: int = 64 * 1024 * 1024):
+    """
+    Get write_filing arguments for a corpus mixing small filings, old IMS-HEADER filings, ISO 8859-1
+    filings, filings with hundreds of exhibits, filings with PDF and ZIP exhibits, and filings with
+    sizes from 10 KB up to max_size.
+    :param filing_count: number of filings
+    :param seed: corpus seed
+    :param max_size: size of the largest filing in bytes
+    :return: list of dict
+    """
+    rng = random.Random(seed)
+    start_date = datetime.date(2018, 1, 2)
+    profiles = []
+    for i in range(filing_count):
+        profile = {"seed": seed * 100000 + i,
+                   "cik": rng.randint(1000, 1700000),
+                   "form_type": rng.choice(FORM_TYPES),
+                   "date_filed": start_date + datetime.timedelta(days=i % 5),
+                   "main_size": 10 * 1024}
+        kind = i % 6
+        if kind == 1:
+            profile.update(header_type="IMS", date_filed=datetime.date(1994, 5, 16), exhibit_count=2)
+        elif kind == 2:
+            profile.update(encoding="iso-8859-1", exhibit_count=5)
+        elif kind == 3:
+            profile.update(exhibit_count=rng.randint(100, 300), exhibit_size=2 * 1024)
+        elif kind == 4:
+            profile.update(pdf_count=2, zip_count=1, binary_size=rng.randint(16, 512) * 1024)
+        elif kind == 5:
+            # Sizes grow geometrically from 10 KB up to max_size
+            step = (i // 6) + 1
+            profile.update(main_size=int(min(10 * 1024 * 8 ** step, max_size)), exhibit_count=10)
+        profiles.append(profile)
+    return profiles
+
+
+def generate_corpus(path: str, filing_count: int = 12, seed: int = 0, max_size: int = 64 * 1024 * 1024) \
+        -> List[GeneratedFiling]:
+    """
+    Generate a corpus of filings under path/edgar/data, with gzipped daily form indices under
+    path/edgar/daily-index and a gzipped quarterly master index under path/edgar/full-index.
+    :param path: output directory
+    :param filing_count: number of filings
+    :param seed: corpus seed
+    :param max_size: size of the largest filing in bytes
+    :return: list of GeneratedFiling
+    """
+    filings = []
+    for profile in get_filing_profiles(filing_count, seed, max_size):
+        file_path = os.path.join(path, "edgar", "data", str(profile["cik"]), "filing.txt")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as out_file:
+            filing = write_filing(out_file, **profile)
+        os.rename(file_path, os.path.join(path, filing.file_name))
+        filings.append(filing)
+
+    # Daily indices by date filed
+    filings_by_date = collections.defaultdict(list)
+    for filing in filings:
+        filings_by_date[filing.date_filed].append(filing)
+    for date_filed, date_filings in filings_by_date.items():
+        index_path = os.path.join(path, "edgar", "daily-index", str(date_filed.year),
+                                  "QTR{0}".format((date_filed.month - 1) // 3 + 1),
+                                  "form.{0}.idx.gz".format(date_filed.strftime("%Y%m%d")))
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with gzip.open(index_path, "wb") as out_file:
+            write_daily_index(out_file, date_filings)
+
+    # Quarterly master index
+    index_path = os.path.join(path, "edgar", "full-index", "2018", "QTR1", "master.idx.gz")
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    with gzip.open(index_path, "wb") as out_file:
+        write_master_index(out_file, filings)
+
+    return filings
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate a synthetic EDGAR corpus.")
+    arg_parser.add_argument("path", help="output directory")
+    arg_parser.add_argument("--filing-count", type=int, default=12)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--max-size", type=int, default=64 * 1024 * 1024,
+                            help="size of the largest filing in bytes, e.g., 1073741824 for 1 GB")
+    args = arg_parser.parse_args()
+
+    for generated_filing in generate_corpus(args.path, args.filing_count, args.seed, args.max_size):
+        print("{0}: {1} bytes, {2} documents".format(generated_filing.file_name, generated_filing.size,
+                                                     len(generated_filing.documents)))
@@ -0,0 +1,154 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Benchmarks for the SGML filing parser.  By default the benchmark runs offline on a synthetic filing;
+pass a local path or EDGAR URI, or --live for the reference EDGAR filing, to benchmark a real one.
+
+Usage:
+    python -m openedgar.benchmarks.parser [path or EDGAR URI] [--live] [--repeat 5]
+"""
+
+# Libraries
+import argparse
+import io
+import os
+import re
+import timeit
+from typing import Union
+
+# Project imports
+import openedgar.benchmarks.corpus
+import openedgar.clients.edgar
+from openedgar.parsers.edgar import open_filing_buffer, iter_filing_documents, parse_document_metadata
+
+# Filing with 142 documents, including PDF and ZIP exhibits, from tests/test_parser.py
+LIVE_FILING_URI = "/Archives/edgar/data/721994/0000721994-18-000014.txt"
+
+# Synthetic filing with the same document mix as the live filing
+SYNTHETIC_FILING_SEED = 0
+SYNTHETIC_EXHIBIT_COUNT = 121
+SYNTHETIC_PDF_COUNT = 10
+SYNTHETIC_ZIP_COUNT = 10
+
+# Patterns used by the findall-based parse_filing_document
+LEGACY_TYPE_RE = re.compile(rb"<TYPE>(.+)")
+LEGACY_SEQUENCE_RE = re.compile(rb"<SEQUENCE>(.+)")
+LEGACY_FILENAME_RE = re.compile(rb"<FILENAME>(.+)")
+LEGACY_DESCRIPTION_RE = re.compile(rb"<DESCRIPTION>(.+)")
+
+
+def legacy_parse_document_metadata(buffer: bytes, start_pos: int, end_pos: int):
+    """
+    Locate document metadata and content as parse_filing_document did before parse_document_metadata:
+    four findall scans over the whole document, then rfind/find scans for the content tags.
+    :param buffer: filing buffer
+    :param start_pos: offset of the document within buffer
+    :param end_pos: offset after the end of the document within buffer
+    :return: tuple of type, sequence, file name, description, content start, content end
+    """
+    doc_type = LEGACY_TYPE_RE.findall(buffer, start_pos, end_pos)
+    doc_sequence = LEGACY_SEQUENCE_RE.findall(buffer, start_pos, end_pos)
+    doc_file_name = LEGACY_FILENAME_RE.findall(buffer, start_pos, end_pos)
+    doc_description = LEGACY_DESCRIPTION_RE.findall(buffer, start_pos, end_pos)
+
+    content_p0 = buffer.rfind(b"</", start_pos, buffer.rfind(b"</", start_pos, end_pos))
+    content_p1 = buffer.find(b">", content_p0, end_pos)
+    doc_tag_type = buffer[content_p0 + len(b"</"):content_p1]
+    content_start_tag = b"<" + doc_tag_type + b">"
+    content_end_tag = b"</" + doc_tag_type + b">"
+    doc_content_p0 = buffer.find(content_start_tag, start_pos, end_pos) + len(content_start_tag)
+    doc_content_p1 = buffer.find(content_end_tag, doc_content_p0, end_pos)
+
+    return (doc_type[0] if len(doc_type) > 0 else None,
+            doc_sequence[0] if len(doc_sequence) > 0 else None,
+            doc_file_name[0] if len(doc_file_name) > 0 else None,
+            doc_description[0] if len(doc_description) > 0 else None,
+            doc_content_p0,
+            doc_content_p1)
+
+
+def benchmark_document_metadata(buffer: Union[bytes, str], repeat: int = 5):
+    """
+    Compare parse_document_metadata with the legacy findall-based scan over every document in a filing.
+    :param buffer: filing buffer or local path
+    :param repeat: number of timed runs; the fastest is reported
+    :return: dict of results
+    """
+    buffer = open_filing_buffer(buffer)
+    offsets = [(document.start_pos, document.end_pos) for document in iter_filing_documents(buffer)]
+
+    # Check that both locate the same content
+    mismatch_count = 0
+    for start_pos, end_pos in offsets:
+        legacy_metadata = legacy_parse_document_metadata(buffer, start_pos, end_pos)
+        metadata = parse_document_metadata(buffer, start_pos, end_pos)
+        if legacy_metadata[4:] != (metadata.content_start, metadata.content_end):
+            mismatch_count += 1
+
+    legacy_seconds = min(timeit.repeat(
+        lambda: [legacy_parse_document_metadata(buffer, p0, p1) for p0, p1 in offsets], number=1, repeat=repeat))
+    tokenizer_seconds = min(timeit.repeat(
+        lambda: [parse_document_metadata(buffer, p0, p1) for p0, p1 in offsets], number=1, repeat=repeat))
+
+    return {"bytes": len(buffer),
+            "document_count": len(offsets),
+            "mismatch_count": mismatch_count,
+            "legacy_seconds": legacy_seconds,
+            "tokenizer_seconds": tokenizer_seconds,
+            "speedup": legacy_seconds / tokenizer_seconds if tokenizer_seconds > 0 else None}
+
+
+def get_synthetic_filing_buffer(seed: int = SYNTHETIC_FILING_SEED):
+    """
+    Generate a synthetic filing with the document mix of LIVE_FILING_URI, so the benchmark runs offline.
+    :param seed: seed for all generated content
+    :return: bytes
+    """
+    filing_file = io.BytesIO()
+    openedgar.benchmarks.corpus.write_filing(filing_file, seed=seed, exhibit_count=SYNTHETIC_EXHIBIT_COUNT,
+                                             pdf_count=SYNTHETIC_PDF_COUNT, zip_count=SYNTHETIC_ZIP_COUNT)
+    return filing_file.getvalue()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark document metadata parsing on a filing.")
+    arg_parser.add_argument("filing", nargs="?",
+                            help="local filing path or EDGAR URI (default: a synthetic filing)")
+    arg_parser.add_argument("--live", action="store_true",
+                            help="download {0} from EDGAR".format(LIVE_FILING_URI))
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    filing_path = LIVE_FILING_URI if args.live and args.filing is None else args.filing
+    if filing_path is None:
+        filing_buffer = get_synthetic_filing_buffer()
+    elif os.path.exists(filing_path):
+        filing_buffer = filing_path
+    else:
+        filing_buffer, _ = openedgar.clients.edgar.get_buffer(filing_path)
+
+    results = benchmark_document_metadata(filing_buffer, repeat=args.repeat)
+    for key, value in results.items():
+        print("{0}: {1}".format(key, value))
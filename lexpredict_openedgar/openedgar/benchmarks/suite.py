@@ -0,0 +1,252 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Parser benchmark suite over a synthetic corpus, reporting throughput and peak memory and comparing
+them against stored baselines to catch regressions.  Baselines are machine-specific; save new ones
+with --save-baselines when moving to a different machine.  Baselines recorded with a different Python
+or NumPy version than the running one are not compared.
+
+Usage:
+    python -m openedgar.benchmarks.suite [--save-baselines] [--tolerance 0.25] [--repeat 3]
+"""
+
+# Libraries
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+# Packages
+import numpy
+
+# Project imports
+import openedgar.benchmarks.corpus
+from openedgar.parsers.edgar import iter_filing_documents, parse_filing, parse_filing_document, parse_index_file, \
+    uudecode
+
+# Stored baselines
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Corpus; sizes are kept small enough for the suite to run in under a minute
+CORPUS_FILING_COUNT = 24
+CORPUS_SEED = 0
+CORPUS_MAX_SIZE = 16 * 1024 * 1024
+INDEX_ROW_COUNT = 100000
+
+# Peak memory below this is treated as noise when comparing against baselines
+MIN_MEMORY_MB = 1.0
+
+
+def measure(function, byte_count: int, document_count: int, repeat: int = 3):
+    """
+    Time a benchmark function, keeping the fastest of several runs, then run it once more under
+    tracemalloc for its peak memory.
+    :param function: function taking no arguments
+    :param byte_count: bytes processed by each run
+    :param document_count: documents or rows processed by each run
+    :param repeat: number of timed runs
+    :return: dict of results
+    """
+    seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"bytes": byte_count,
+            "documents": document_count,
+            "seconds": seconds,
+            "mb_per_second": byte_count / 1024.0 / 1024.0 / seconds,
+            "documents_per_second": document_count / seconds,
+            "peak_memory_mb": peak_memory / 1024.0 / 1024.0}
+
+
+def get_index_buffer(write_index, row_count: int):
+    """
+    Get an index buffer with a given number of generated rows.
+    :param write_index: write_daily_index or write_master_index
+    :param row_count: number of rows
+    :return: bytes
+    """
+    filings = [openedgar.benchmarks.corpus.GeneratedFiling(
+        "", openedgar.benchmarks.corpus.FORM_TYPES[i % len(openedgar.benchmarks.corpus.FORM_TYPES)], 1000 + i,
+        "EXAMPLE {0} CO".format(i), datetime.date(2018, 1, 2), "edgar/data/{0}/0000000000-18-{1:06d}.txt"
+        .format(1000 + i, i), 0, []) for i in range(row_count)]
+    index_file = io.BytesIO()
+    write_index(index_file, filings)
+    return index_file.getvalue()
+
+
+def run_benchmarks(repeat: int = 3, filing_count: int = CORPUS_FILING_COUNT, max_size: int = CORPUS_MAX_SIZE):
+    """
+    Benchmark parse_filing, parse_filing_document, uudecode, and parse_index_file over a synthetic corpus.
+    :param repeat: number of timed runs per benchmark
+    :param filing_count: number of filings in the corpus
+    :param max_size: size of the largest filing in bytes
+    :return: dict of results by benchmark name
+    """
+    with tempfile.TemporaryDirectory() as corpus_path:
+        filings = openedgar.benchmarks.corpus.generate_corpus(corpus_path, filing_count, CORPUS_SEED, max_size)
+        buffers = []
+        for filing in filings:
+            with open(os.path.join(corpus_path, filing.file_name), "rb") as filing_file:
+                buffers.append(filing_file.read())
+
+    filing_bytes = sum(len(buffer) for buffer in buffers)
+    document_count = sum(len(filing.documents) for filing in filings)
+    document_offsets = [(buffer, [(d.start_pos, d.end_pos) for d in iter_filing_documents(buffer)])
+                        for buffer in buffers]
+    uuencoded_contents = [d.raw.tobytes() for buffer in buffers for d in iter_filing_documents(buffer)
+                          if d.is_uuencoded]
+
+    def benchmark_parse_filing():
+        for filing_buffer in buffers:
+            for document in parse_filing(filing_buffer).documents:
+                _ = document.sha1
+
+    def benchmark_parse_filing_document():
+        for filing_buffer, offsets in document_offsets:
+            for start_pos, end_pos in offsets:
+                _ = parse_filing_document(filing_buffer, start_pos=start_pos, end_pos=end_pos).sha1
+
+    def benchmark_uudecode():
+        for content in uuencoded_contents:
+            uudecode(content)
+
+    results = {"parse_filing": measure(benchmark_parse_filing, filing_bytes, document_count, repeat),
+               "parse_filing_document": measure(benchmark_parse_filing_document, filing_bytes, document_count,
+                                                repeat),
+               "uudecode": measure(benchmark_uudecode, sum(len(c) for c in uuencoded_contents),
+                                   len(uuencoded_contents), repeat)}
+
+    for index_name, write_index in [("daily", openedgar.benchmarks.corpus.write_daily_index),
+                                     ("master", openedgar.benchmarks.corpus.write_master_index)]:
+        index_buffer = get_index_buffer(write_index, INDEX_ROW_COUNT)
+        results["parse_index_file[{0}]".format(index_name)] = measure(lambda: parse_index_file(index_buffer),
+                                                                      len(index_buffer), INDEX_ROW_COUNT, repeat)
+
+    return results
+
+
+def compare_baselines(results: dict, baselines: dict, tolerance: float = 0.25):
+    """
+    Compare benchmark results against baselines.
+    :param results: results from run_benchmarks
+    :param baselines: stored results from run_benchmarks
+    :param tolerance: allowed fractional drop in throughput or increase in peak memory
+    :return: list of regression messages
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+
+        if result["mb_per_second"] < baseline["mb_per_second"] * (1.0 - tolerance):
+            regressions.append("{0}: {1:.1f} MB/s is below baseline {2:.1f} MB/s"
+                               .format(name, result["mb_per_second"], baseline["mb_per_second"]))
+
+        max_memory_mb = max(baseline["peak_memory_mb"], MIN_MEMORY_MB) * (1.0 + tolerance)
+        if result["peak_memory_mb"] > max_memory_mb:
+            regressions.append("{0}: peak memory {1:.1f} MB is above baseline {2:.1f} MB"
+                               .format(name, result["peak_memory_mb"], baseline["peak_memory_mb"]))
+
+    return regressions
+
+
+def get_environment():
+    """
+    Get the interpreter and package versions that baselines depend on.
+    :return: dict of Python and NumPy major.minor versions
+    """
+    return {"python": "{0}.{1}".format(*sys.version_info[:2]),
+            "numpy": ".".join(numpy.__version__.split(".")[:2])}
+
+
+def load_baselines(path: str = BASELINES_PATH):
+    """
+    Load stored baselines recorded with the running Python and NumPy versions.
+    :param path: baselines JSON path
+    :return: dict of results by benchmark name, or an empty dict if none are stored for this environment
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as baselines_file:
+        baselines = json.load(baselines_file)
+
+    environment = get_environment()
+    baselines_environment = {key: ".".join(str(baselines.get(key, "")).split(".")[:2]) for key in environment}
+    if baselines_environment != environment:
+        print("Skipping baselines recorded with {0}; running with {1}".format(baselines_environment, environment))
+        return {}
+    return baselines["results"]
+
+
+def save_baselines(results: dict, path: str = BASELINES_PATH):
+    """
+    Store results as baselines.
+    :param results: results from run_benchmarks
+    :param path: baselines JSON path
+    :return:
+    """
+    with open(path, "w") as baselines_file:
+        json.dump({"python": platform.python_version(),
+                   "numpy": numpy.__version__,
+                   "machine": platform.machine(),
+                   "results": results}, baselines_file, indent=2, sort_keys=True)
+        baselines_file.write("\n")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the filing and index parsers.")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="allowed fractional drop in throughput or increase in peak memory")
+    arg_parser.add_argument("--save-baselines", action="store_true", help="store results as the new baselines")
+    args = arg_parser.parse_args()
+
+    benchmark_results = run_benchmarks(repeat=args.repeat)
+    for benchmark_name, benchmark_result in sorted(benchmark_results.items()):
+        print("{0:<28} {1:>10.1f} MB/s {2:>12.1f} documents/s {3:>8.1f} MB peak"
+              .format(benchmark_name, benchmark_result["mb_per_second"], benchmark_result["documents_per_second"],
+                      benchmark_result["peak_memory_mb"]))
+
+    if args.save_baselines:
+        save_baselines(benchmark_results)
+        print("Saved baselines to {0}".format(BASELINES_PATH))
+    else:
+        regression_list = compare_baselines(benchmark_results, load_baselines(), args.tolerance)
+        for regression in regression_list:
+            print("REGRESSION {0}".format(regression))
+        sys.exit(1 if len(regression_list) > 0 else 0)
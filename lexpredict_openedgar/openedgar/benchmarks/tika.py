@@ -0,0 +1,148 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+Benchmark Tika extraction overhead per document against a local stand-in server, comparing a
+connection per request with the pooled keep-alive client.
+
+Usage:
+    python -m openedgar.benchmarks.tika
+"""
+
+# Libraries
+import http.server
+import socketserver
+import threading
+import time
+
+# Packages
+import requests
+
+# Project imports
+import openedgar.clients.tika
+
+
+class StandInTikaHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Tika server stand-in that supports keep-alive and chunked request bodies, and responds
+    immediately with the size of each document so that only HTTP overhead is measured.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            size = 0
+            while True:
+                chunk_size = int(self.rfile.readline().split(b";")[0], 16)
+                if chunk_size == 0:
+                    self.rfile.readline()
+                    return size
+                size += len(self.rfile.read(chunk_size))
+                self.rfile.readline()
+        return len(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+    def send_text(self, text: str):
+        buffer = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=UTF-8")
+        self.send_header("Content-Length", str(len(buffer)))
+        self.end_headers()
+        self.wfile.write(buffer)
+
+    def do_GET(self):
+        self.send_text("This is Tika Server")
+
+    def do_PUT(self):
+        self.send_text("{0} bytes".format(self.read_body()))
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInTikaServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def benchmark_requests(extract, buffers):
+    """
+    Time extraction of a list of documents.
+    :param extract: function taking a document buffer
+    :param buffers: document buffers
+    :return: seconds elapsed
+    """
+    start_time = time.perf_counter()
+    for buffer in buffers:
+        extract(buffer)
+    return time.perf_counter() - start_time
+
+
+def run_tika_benchmark(document_count: int = 1000, document_size: int = 4096,
+                       large_document_size: int = 256 * 1024 * 1024):
+    """
+    Compare a new connection per document, as tika.parser.from_buffer makes, against the pooled
+    keep-alive session of TikaPool, using a local stand-in server; then stream one large document.
+    :param document_count: number of small documents, e.g., exhibits
+    :param document_size: size of each small document in bytes
+    :param large_document_size: size of the streamed document in bytes, e.g., a large PDF
+    :return: dict of results
+    """
+    server = StandInTikaServer(("127.0.0.1", 0), StandInTikaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{0}".format(server.server_address[1])
+
+    try:
+        buffers = [bytes([i % 256]) * document_size for i in range(document_count)]
+
+        # New connection per document
+        def extract_unpooled(buffer):
+            return requests.put(url + "/tika", data=buffer, headers={"Accept": "text/plain"}).text
+
+        unpooled_time = benchmark_requests(extract_unpooled, buffers)
+
+        # Pooled keep-alive connections
+        pool = openedgar.clients.tika.TikaPool([url], health_interval=3600)
+        pooled_time = benchmark_requests(pool.extract_text, buffers)
+
+        # Streamed large document
+        large_buffer = bytearray(large_document_size)
+        start_time = time.perf_counter()
+        large_text = pool.extract_text(large_buffer, sha1="0" * 40)
+        large_time = time.perf_counter() - start_time
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {"document_count": document_count,
+            "unpooled_ms_per_document": 1000.0 * unpooled_time / document_count,
+            "pooled_ms_per_document": 1000.0 * pooled_time / document_count,
+            "speedup": unpooled_time / pooled_time,
+            "large_document_text": large_text,
+            "large_document_mb_per_second": large_document_size / 1024.0 / 1024.0 / large_time}
+
+
+if __name__ == "__main__":
+    for key, value in run_tika_benchmark().items():
+        print("{0}: {1}".format(key, value))
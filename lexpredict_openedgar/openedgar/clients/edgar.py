@@ -23,7 +23,14 @@ SOFTWARE.
 """
 
 # Libraries
+import asyncio
+import datetime
+import itertools
 import logging
+import os
+import re
+import tempfile
+import threading
 import urllib.parse
 import time
 
@@ -31,11 +38,18 @@ import time
 import dateutil.parser
 import lxml.html
 import requests
+import requests.adapters
 
 # Project
-from typing import Union
+from typing import Iterable, Union
 
-from config.settings.base import HTTP_SEC_HOST, HTTP_FAIL_SLEEP, HTTP_SEC_INDEX_PATH, HTTP_SLEEP_DEFAULT
+import openedgar.clients.ratelimit
+from openedgar.clients.http_cache import HTTPCache
+from openedgar.parsers.digest import StreamingDigest, iter_digest_chunks
+
+from config.settings.base import HTTP_SEC_HOST, HTTP_FAIL_SLEEP, HTTP_SEC_INDEX_PATH, HTTP_SLEEP_DEFAULT, \
+    HTTP_SEC_FULL_INDEX_PATH, HTTP_SEC_FULL_INDEX_MIN_YEAR, HTTP_USER_AGENT, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, \
+    HTTP_POOL_SIZE, HTTP_SEC_FILING_PATH, HTTP_ASYNC_CONCURRENCY, HTTP_CACHE_IMMUTABLE_DAYS
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -46,12 +60,168 @@ formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
 console.setFormatter(formatter)
 logger.addHandler(console)
 
+# Read size when hashing response bodies as they arrive
+HTTP_STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Error pages are identified from the status code and, for HTML and XML responses, the start of the body
+HTTP_ERROR_PAGE_PEEK_SIZE = 8 * 1024
+HTTP_ERROR_PAGE_CONTENT_TYPES = ("text/html", "application/xml", "text/xml")
+
+# Year and quarter of daily-index and full-index paths
+INDEX_PERIOD_RE = re.compile(r"/(?:daily-index|full-index)/(\d{4})(?:/QTR([1-4]))?(?:/|$)")
+
+# Process-wide EDGAR session, recreated in forked worker processes so that connections are never shared
+EDGAR_SESSION = None
+EDGAR_SESSION_PID = None
+EDGAR_SESSION_LOCK = threading.Lock()
+
+
+def get_session():
+    """
+    Get the pooled keep-alive session shared by all EDGAR requests in this process.
+    :return: requests.Session
+    """
+    global EDGAR_SESSION, EDGAR_SESSION_PID  # pylint: disable=global-statement
+    with EDGAR_SESSION_LOCK:
+        if EDGAR_SESSION is None or EDGAR_SESSION_PID != os.getpid():
+            session = requests.Session()
+            session.headers.update({"User-Agent": HTTP_USER_AGENT,
+                                    "Accept-Encoding": "gzip, deflate",
+                                    "Connection": "keep-alive"})
+            adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            EDGAR_SESSION = session
+            EDGAR_SESSION_PID = os.getpid()
+        return EDGAR_SESSION
+
+
+def get_response(remote_uri: str, stream: bool = False, headers: dict = None):
+    """
+    Send a GET request with the process-wide session and the configured timeouts, waiting first for
+    the fleet-wide rate limiter.
+    :param remote_uri: URL to retrieve
+    :param stream: whether to defer reading the body
+    :param headers: optional additional request headers
+    :return: requests.Response
+    """
+    openedgar.clients.ratelimit.get_rate_limiter().acquire()
+    return get_session().get(remote_uri, stream=stream, headers=headers,
+                             timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+
+
+def is_closed_index_path(remote_path: str, today: datetime.date = None):
+    """
+    Check whether a daily-index or full-index path covers a year or quarter that closed more than
+    HTTP_CACHE_IMMUTABLE_DAYS ago, so that its contents will no longer change.
+    :param remote_path: remote path on EDGAR, e.g., /Archives/edgar/daily-index/2017/QTR1/
+    :param today: optional current date
+    :return: bool
+    """
+    period_match = INDEX_PERIOD_RE.search(remote_path)
+    if period_match is None:
+        return False
+
+    year = int(period_match.group(1))
+    if period_match.group(2) is not None:
+        quarter = int(period_match.group(2))
+        period_end = datetime.date(year + quarter // 4, (quarter * 3) % 12 + 1, 1)
+    else:
+        period_end = datetime.date(year + 1, 1, 1)
+
+    if today is None:
+        today = datetime.date.today()
+    return today >= period_end + datetime.timedelta(days=HTTP_CACHE_IMMUTABLE_DAYS)
+
+
+def get_conditional_buffer(remote_path: str, base_path: str = HTTP_SEC_HOST, immutable: bool = False,
+                           store_body: bool = True, use_cache: bool = True, cache: HTTPCache = None):
+    """
+    Retrieve a remote path with a conditional GET, sending the ETag and Last-Modified validators from the
+    HTTP cache and serving 304 responses from it.  Immutable paths that are already cached are not
+    requested at all.  A path only counts as modified when validators were cached for it and the
+    response's differ, so the first retrieval seeds the cache without reporting a change.
+    :param remote_path: remote path on EDGAR to retrieve
+    :param base_path: base path to prepend if not default EDGAR path
+    :param immutable: whether the path will no longer change, e.g., listings of closed quarters
+    :param store_body: whether to cache the body as well as the validators; if not, the caller must keep
+    its own copy of the body, and None is returned when it is served from the cache
+    :param use_cache: whether to send cached validators; if not, the path is always retrieved, and the
+    response is still cached
+    :param cache: optional HTTPCache
+    :return: buffer, is_modified
+    """
+    remote_uri = urllib.parse.urljoin(base_path, remote_path.lstrip("/"))
+    if cache is None:
+        cache = HTTPCache()
+    validator_entry = cache.get_entry(remote_uri) if use_cache else None
+    entry = validator_entry
+    if entry is not None and store_body and not entry["has_body"]:
+        entry = None
+
+    # Serve immutable paths without a request
+    if entry is not None and entry["immutable"]:
+        logger.info("Using cached copy of immutable path {0}".format(remote_path))
+        return (cache.get_body(remote_uri) if store_body else None), False
+
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    failures = 0
+    while True:
+        try:
+            with get_response(remote_uri, headers=headers) as r:
+                if r.status_code == 304 and entry is not None:
+                    logger.info("Path {0} is not modified; using cached copy".format(remote_path))
+                    if immutable:
+                        cache.put(remote_uri, entry.get("etag"), entry.get("last_modified"),
+                                  cache.get_body(remote_uri) if store_body else None, immutable=True)
+                    return (cache.get_body(remote_uri) if store_body else None), False
+
+                file_buffer = r.content
+                check_buffer_errors(file_buffer, r.status_code, r.headers.get("Content-Type"))
+                etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+                cache.put(remote_uri, etag, last_modified, file_buffer if store_body else None, immutable=immutable)
+
+                # Compare the strongest validator cached; without one, the response only seeds the cache
+                is_modified = False
+                if validator_entry is not None and validator_entry.get("etag"):
+                    is_modified = validator_entry["etag"] != etag
+                elif validator_entry is not None and validator_entry.get("last_modified"):
+                    is_modified = validator_entry["last_modified"] != last_modified
+
+                # Sleep if set gt0
+                if HTTP_SLEEP_DEFAULT > 0:
+                    time.sleep(HTTP_SLEEP_DEFAULT)
+                logger.info("Successfully retrieved file {0}; {1} bytes".format(remote_path, len(file_buffer)))
+                return file_buffer, is_modified
+        except RuntimeError:
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            # Handle and sleep
+            if failures < len(HTTP_FAIL_SLEEP):
+                logger.warning("File {0}, failure {1}: {2}".format(remote_path, failures, e))
+                time.sleep(HTTP_FAIL_SLEEP[failures])
+                failures += 1
+            else:
+                logger.error("File {0}, failure {1}: {2}".format(remote_path, failures, e))
+                if entry is not None and store_body:
+                    logger.warning("Using stale cached copy of {0}".format(remote_path))
+                    return cache.get_body(remote_uri), False
+                return None, False
+
 
-def get_buffer(remote_path: str, base_path: str = HTTP_SEC_HOST):
+def get_buffer(remote_path: str, base_path: str = HTTP_SEC_HOST, digest=None):
     """
     Retrieve a remote path to memory.
     :param remote_path: remote path on EDGAR to retrieve
     :param base_path: base path to prepend if not default EDGAR path
+    :param digest: optional StreamingDigest to update with the response body as it arrives; the body is
+    then returned as a bytearray
     :return: file_buffer, last_modified_date
     """
     # Log entrance
@@ -65,18 +235,29 @@ def get_buffer(remote_path: str, base_path: str = HTTP_SEC_HOST):
     failures = 0
     file_buffer = None
     last_modified_date = None
+    status_code = None
+    content_type = None
 
     while not complete:
         try:
-            with requests.Session() as s:
-                r = s.get(remote_uri)
+            with get_response(remote_uri, stream=digest is not None) as r:
                 if 'Last-Modified' in r.headers:
                     try:
                         last_modified_date = dateutil.parser.parse(r.headers['Last-Modified']).date()
                     except Exception as e:  # pylint: disable=broad-except
                         logger.error("Unable to update last modified date for {0}: {1}".format(remote_path, e))
 
-                file_buffer = r.content
+                if digest is not None:
+                    # Hash chunks as they arrive, discarding anything hashed by a failed attempt
+                    digest.reset()
+                    file_buffer = bytearray()
+                    for chunk in r.iter_content(chunk_size=HTTP_STREAM_CHUNK_SIZE):
+                        digest.update(chunk)
+                        file_buffer += chunk
+                else:
+                    file_buffer = r.content
+                status_code = r.status_code
+                content_type = r.headers.get("Content-Type")
                 complete = True
 
                 # Sleep if set gt0
@@ -92,12 +273,7 @@ def get_buffer(remote_path: str, base_path: str = HTTP_SEC_HOST):
                 logger.error("File {0}, failure {1}: {2}".format(remote_path, failures, e))
                 return file_buffer, last_modified_date
 
-    if b"SEC.gov | Request Rate Threshold Exceeded" in file_buffer:
-        raise RuntimeError("Exceeded SEC request rate threshold; invalid data retrieved")
-    elif b"SEC.gov | File Not Found Error Alert (404)" in file_buffer:
-        raise RuntimeError("HTTP 404 for requested path")
-    elif b"<Error><Code>AccessDenied</Code><Message>Access Denied</Message><RequestId>" in file_buffer:
-        raise RuntimeError("Access denied accessing path")
+    check_buffer_errors(file_buffer, status_code, content_type)
 
     # Log successful exit
     if complete:
@@ -106,6 +282,226 @@ def get_buffer(remote_path: str, base_path: str = HTTP_SEC_HOST):
     return file_buffer, last_modified_date
 
 
+def check_buffer_errors(file_buffer: Union[bytes, bytearray], status_code: int = None, content_type: str = None):
+    """
+    Check a retrieved buffer for the error pages EDGAR serves in place of the requested file, using the
+    status code and, unless the content type rules out an error page, the first HTTP_ERROR_PAGE_PEEK_SIZE bytes.
+    :param file_buffer: retrieved buffer, or at least its first HTTP_ERROR_PAGE_PEEK_SIZE bytes
+    :param status_code: optional HTTP status code
+    :param content_type: optional Content-Type header
+    :return:
+    """
+    head = b""
+    if content_type is None or status_code is not None and status_code >= 400 or \
+            content_type.split(";")[0].strip().lower() in HTTP_ERROR_PAGE_CONTENT_TYPES:
+        head = bytes(memoryview(file_buffer)[:HTTP_ERROR_PAGE_PEEK_SIZE])
+
+    if status_code == 429 or b"SEC.gov | Request Rate Threshold Exceeded" in head:
+        raise RuntimeError("Exceeded SEC request rate threshold; invalid data retrieved")
+    elif status_code == 404 or b"SEC.gov | File Not Found Error Alert (404)" in head:
+        raise RuntimeError("HTTP 404 for requested path")
+    elif b"<Error><Code>AccessDenied</Code><Message>Access Denied</Message><RequestId>" in head:
+        raise RuntimeError("Access denied accessing path")
+    elif status_code is not None and status_code >= 400:
+        raise RuntimeError("HTTP {0} for requested path".format(status_code))
+
+
+def download_to_storage(remote_path: str, client, storage_path: str, base_path: str = HTTP_SEC_HOST,
+                        digest: StreamingDigest = None):
+    """
+    Stream a remote path on EDGAR straight into storage, hashing and compressing each chunk as it arrives,
+    so that only a fixed number of chunks is held in memory however large the file is.
+    :param remote_path: remote path on EDGAR to retrieve
+    :param client: S3Client or LocalClient to store the file with
+    :param storage_path: path to store the file under
+    :param base_path: base path to prepend if not default EDGAR path
+    :param digest: optional StreamingDigest to update with the file; created if not set
+    :return: StreamingDigest of the stored file, last_modified_date
+    """
+    # Log entrance
+    logger.info("Streaming remote path {0} to {1}".format(remote_path, storage_path))
+
+    remote_uri = urllib.parse.urljoin(base_path, remote_path.lstrip("/"))
+    if digest is None:
+        digest = StreamingDigest()
+
+    failures = 0
+    while True:
+        last_modified_date = None
+        try:
+            with get_response(remote_uri, stream=True) as r:
+                if 'Last-Modified' in r.headers:
+                    try:
+                        last_modified_date = dateutil.parser.parse(r.headers['Last-Modified']).date()
+                    except Exception as e:  # pylint: disable=broad-except
+                        logger.error("Unable to update last modified date for {0}: {1}".format(remote_path, e))
+
+                # Check the start of the body for error pages before storing anything
+                chunks = r.iter_content(chunk_size=HTTP_STREAM_CHUNK_SIZE)
+                head = bytearray()
+                for chunk in chunks:
+                    head += chunk
+                    if len(head) >= HTTP_ERROR_PAGE_PEEK_SIZE:
+                        break
+                check_buffer_errors(head, r.status_code, r.headers.get("Content-Type"))
+
+                digest.reset()
+                client.put_chunks(storage_path, iter_digest_chunks(itertools.chain([bytes(head)], chunks), digest))
+                del head
+
+                # Sleep if set gt0
+                if HTTP_SLEEP_DEFAULT > 0:
+                    time.sleep(HTTP_SLEEP_DEFAULT)
+            break
+        except RuntimeError:
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            # Handle and sleep
+            if failures < len(HTTP_FAIL_SLEEP):
+                logger.warning("File {0}, failure {1}: {2}".format(remote_path, failures, e))
+                time.sleep(HTTP_FAIL_SLEEP[failures])
+                failures += 1
+            else:
+                logger.error("File {0}, failure {1}: {2}".format(remote_path, failures, e))
+                raise RuntimeError("Unable to retrieve {0}: {1}".format(remote_path, e))
+
+    # Log successful exit
+    logger.info("Successfully stored file {0}; {1} bytes".format(remote_path, digest.size))
+    return digest, last_modified_date
+
+
+async def fetch_one_async(session, loop, path: str, client=None, base_path: str = HTTP_SEC_HOST + HTTP_SEC_FILING_PATH):
+    """
+    Retrieve one path with an aiohttp session, waiting for the rate limiter, and store it with the storage
+    client under the same path.  Connection failures, timeouts, 429, and 5xx responses are retried; other
+    error responses, such as 404, fail at once.
+    :param session: aiohttp.ClientSession
+    :param loop: event loop running the download
+    :param path: path relative to base_path, e.g., edgar/data/1/0000000001-18-000001.txt
+    :param client: optional S3Client or LocalClient to store the file with
+    :param base_path: base URL to prepend to the path
+    :return: number of bytes stored if client is set, otherwise the buffer; None on failure
+    """
+    # Import here so that synchronous clients do not require aiohttp
+    import aiohttp
+
+    remote_uri = urllib.parse.urljoin(base_path, path.lstrip("/"))
+    rate_limiter = openedgar.clients.ratelimit.get_rate_limiter()
+
+    failures = 0
+    while True:
+        try:
+            # Reserve a slot off the event loop, as Redis and lock file access block
+            wait = await loop.run_in_executor(None, rate_limiter.reserve)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            async with session.get(remote_uri) as response:
+                # Raise retryable statuses as aiohttp errors; check_buffer_errors handles the rest
+                if response.status == 429 or response.status >= 500:
+                    response.raise_for_status()
+
+                if client is None:
+                    file_buffer = await response.read()
+                    check_buffer_errors(file_buffer, response.status, response.headers.get("Content-Type"))
+                    break
+
+                # Spool the body to disk rather than memory, checking its start for error pages
+                spool_file = tempfile.TemporaryFile()
+                try:
+                    head = bytearray()
+                    async for chunk in response.content.iter_chunked(HTTP_STREAM_CHUNK_SIZE):
+                        if len(head) < HTTP_ERROR_PAGE_PEEK_SIZE:
+                            head += chunk[:HTTP_ERROR_PAGE_PEEK_SIZE - len(head)]
+                        spool_file.write(chunk)
+                    check_buffer_errors(head, response.status, response.headers.get("Content-Type"))
+                except Exception:
+                    spool_file.close()
+                    raise
+            break
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if failures < len(HTTP_FAIL_SLEEP):
+                logger.warning("File {0}, failure {1}: {2}".format(path, failures, e))
+                await asyncio.sleep(HTTP_FAIL_SLEEP[failures])
+                failures += 1
+            else:
+                logger.error("File {0}, failure {1}: {2}".format(path, failures, e))
+                return None
+        except Exception as e:  # pylint: disable=broad-except
+            # Error pages and other failures will not succeed on retry
+            logger.error("File {0}, failure {1}: {2}".format(path, failures, e))
+            return None
+
+    if client is None:
+        logger.info("Successfully retrieved file {0}; {1} bytes".format(path, len(file_buffer)))
+        return file_buffer
+
+    # Store off the event loop so that other downloads continue during the upload
+    with spool_file:
+        size = spool_file.tell()
+        logger.info("Successfully retrieved file {0}; {1} bytes".format(path, size))
+        spool_file.seek(0)
+        try:
+            await loop.run_in_executor(None, client.put_fileobj, path, spool_file)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Unable to store file {0}: {1}".format(path, e))
+            return None
+    return size
+
+
+async def fetch_many_async(paths: Iterable[str], client=None, concurrency: int = HTTP_ASYNC_CONCURRENCY,
+                           base_path: str = HTTP_SEC_HOST + HTTP_SEC_FILING_PATH):
+    """
+    Retrieve many paths concurrently; see fetch_many.
+    :param paths: paths relative to base_path
+    :param client: optional S3Client or LocalClient to store each file with as it completes
+    :param concurrency: maximum number of requests in flight
+    :param base_path: base URL to prepend to each path
+    :return: dict of path to fetch_one_async result
+    """
+    # Import here so that synchronous clients do not require aiohttp
+    import aiohttp
+
+    loop = asyncio.get_event_loop()
+    path_queue = asyncio.Queue()
+    for path in paths:
+        path_queue.put_nowait(path)
+    results = {}
+
+    async def worker(session):
+        while not path_queue.empty():
+            worker_path = path_queue.get_nowait()
+            results[worker_path] = await fetch_one_async(session, loop, worker_path, client, base_path)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     headers={"User-Agent": HTTP_USER_AGENT}) as session:
+        await asyncio.gather(*[worker(session) for _ in range(max(min(concurrency, path_queue.qsize()), 1))])
+
+    return results
+
+
+def fetch_many(paths: Iterable[str], client=None, concurrency: int = HTTP_ASYNC_CONCURRENCY,
+               base_path: str = HTTP_SEC_HOST + HTTP_SEC_FILING_PATH):
+    """
+    Retrieve many paths from EDGAR concurrently, keeping up to concurrency requests in flight within the
+    fleet-wide rate limit, and store each one with the storage client under the same path as it completes.
+    :param paths: paths relative to base_path, e.g., edgar/data/1/0000000001-18-000001.txt
+    :param client: optional S3Client or LocalClient; if not set, buffers are returned instead
+    :param concurrency: maximum number of requests in flight
+    :param base_path: base URL to prepend to each path
+    :return: dict of path to number of bytes stored, or to the buffer if client is not set; None on failure
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(fetch_many_async(paths, client, concurrency, base_path))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
 def list_path(remote_path: str):
     """
     List a path on the EDGAR data store.
@@ -114,7 +510,7 @@ def list_path(remote_path: str):
     """
     # Log entrance
     logger.info("Retrieving directory listing from {0}".format(remote_path))
-    remote_buffer, _ = get_buffer(remote_path)
+    remote_buffer, _ = get_conditional_buffer(remote_path, immutable=is_closed_index_path(remote_path))
 
     # Parse the index listing
     if remote_buffer is None:
@@ -148,12 +544,29 @@ def list_path(remote_path: str):
     return good_url_list
 
 
-def list_index_by_year(year: int):
+def list_full_index_by_year(year: int, index_type: str = "master"):
+    """
+    Get list of quarterly full-index files for a given year.  Paths are deterministic, so no
+    directory listings are retrieved; quarters that have not started yet are excluded.
+    :param year: filing year to retrieve
+    :param index_type: master for pipe-delimited master.gz, or form or company for fixed-width files
+    :return:
+    """
+    today = datetime.date.today()
+    quarter_list = [q for q in range(1, 5) if (year, q) <= (today.year, (today.month - 1) // 3 + 1)]
+    return ["{0}{1}/QTR{2}/{3}.gz".format(HTTP_SEC_FULL_INDEX_PATH, year, q, index_type) for q in quarter_list]
+
+
+def list_index_by_year(year: int, index_source: str = "daily"):
     """
     Get list of index files for a given year.
     :param year: filing year to retrieve
+    :param index_source: daily for daily-index form files, or full for quarterly full-index master files
     :return:
     """
+    if index_source == "full":
+        return list_full_index_by_year(year)
+
     # Log entrance
     logger.info("Locating form index list for {0}".format(year))
 
@@ -185,13 +598,22 @@ def list_index_by_year(year: int):
     return form_index_list
 
 
-def list_index(min_year: int = 1950, max_year: int = 2050):
+def list_index(min_year: int = 1950, max_year: int = 2050, index_source: str = "daily"):
     """
     Get the list of form index files on SEC HTTP.
     :param min_year: min filing year to begin listing
     :param max_year: max filing year to list
+    :param index_source: daily to crawl daily-index form files, or full for quarterly full-index master files
     :return:
     """
+    # Full index paths are known without listing
+    if index_source == "full":
+        form_index_list = []
+        for year in range(max(min_year, HTTP_SEC_FULL_INDEX_MIN_YEAR), min(max_year, datetime.date.today().year) + 1):
+            form_index_list.extend(list_full_index_by_year(year))
+        logger.info("Located {0} full index files".format(len(form_index_list)))
+        return form_index_list
+
     # Log entrance
     logger.info("Retrieving form index list")
 
@@ -241,7 +663,7 @@ def get_company(cik: Union[int, str]):
     company_url = "https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&CIK={0}".format(cik)
 
     # Retrieve buffer
-    remote_buffer = requests.get(company_url).content
+    remote_buffer = get_response(company_url).content
 
     # Parse buffer to HTML
     html_doc = lxml.html.fromstring(remote_buffer)
@@ -308,7 +730,7 @@ def get_cfia_index():
     logger.info("Retrieving CFIA 2006 index values")
 
     # Retrieve page and parse to HTML
-    remote_buffer = requests.get("https://www.sec.gov/divisions/corpfin/organization/cfia.shtml").content
+    remote_buffer = get_response("https://www.sec.gov/divisions/corpfin/organization/cfia.shtml").content
     html_doc = lxml.html.fromstring(remote_buffer)
 
     # Get index values
@@ -329,7 +751,7 @@ def get_cfia_table(index: str):
 
     # Get remote buffer and parse to HTML
     cfia_url = "https://www.sec.gov/divisions/corpfin/organization/cfia-{0}.htm".format(index)
-    remote_buffer = requests.get(cfia_url).content
+    remote_buffer = get_response(cfia_url).content
     html_doc = lxml.html.fromstring(remote_buffer)
 
     # Parse table into list of tuples
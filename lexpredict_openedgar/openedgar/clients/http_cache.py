@@ -0,0 +1,128 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Libraries
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+# Project
+from config.settings.base import HTTP_CACHE_PATH
+
+# Setup logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+console = logging.StreamHandler()
+console.setLevel(logging.INFO)
+formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
+console.setFormatter(formatter)
+logger.addHandler(console)
+
+
+class HTTPCache:
+    """
+    Local cache of HTTP validators (ETag and Last-Modified) and, optionally, response bodies, keyed by URL.
+    Each URL has a JSON entry and an optional body file named by the SHA-1 of the URL; both are replaced
+    atomically, so concurrent workers on one machine never read partial entries.
+    """
+
+    def __init__(self, path: str = HTTP_CACHE_PATH):
+        """
+        :param path: cache directory
+        """
+        self.path = str(path)
+
+    def get_entry_path(self, url: str, suffix: str):
+        """
+        Get the path of a cache file for a URL.
+        :param url: URL
+        :param suffix: .json for the entry or .body for the body
+        :return: path
+        """
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, key[:2], key + suffix)
+
+    def get_entry(self, url: str):
+        """
+        Get the cache entry for a URL.
+        :param url: URL
+        :return: dict with url, etag, last_modified, immutable, and has_body keys, or None if not cached
+        """
+        try:
+            with open(self.get_entry_path(url, ".json"), "r") as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError) as _:
+            return None
+
+        # Ignore hash collisions and entries whose body has been removed
+        if entry.get("url") != url or (entry.get("has_body") and not os.path.exists(self.get_entry_path(url, ".body"))):
+            return None
+        return entry
+
+    def get_body(self, url: str):
+        """
+        Get the cached body for a URL.
+        :param url: URL
+        :return: bytes, or None if not cached
+        """
+        try:
+            with open(self.get_entry_path(url, ".body"), "rb") as body_file:
+                return body_file.read()
+        except OSError as _:
+            return None
+
+    def write_file(self, file_path: str, data: bytes):
+        """
+        Write a cache file atomically.
+        :param file_path: path
+        :param data: contents
+        :return:
+        """
+        dir_name = os.path.dirname(file_path)
+        os.makedirs(dir_name, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=dir_name, delete=False) as temp_file:
+            temp_file.write(data)
+        os.replace(temp_file.name, file_path)
+
+    def put(self, url: str, etag: str = None, last_modified: str = None, body: bytes = None,
+            immutable: bool = False):
+        """
+        Store the validators and, optionally, the body for a URL.
+        :param url: URL
+        :param etag: ETag response header
+        :param last_modified: Last-Modified response header
+        :param body: optional response body
+        :param immutable: whether the URL will never change, so that it need not be requested again
+        :return:
+        """
+        try:
+            if body is not None:
+                self.write_file(self.get_entry_path(url, ".body"), bytes(body))
+            entry = {"url": url, "etag": etag, "last_modified": last_modified, "immutable": immutable,
+                     "has_body": body is not None}
+            self.write_file(self.get_entry_path(url, ".json"), json.dumps(entry).encode("utf-8"))
+        except OSError as e:
+            logger.warning("Unable to cache {0}: {1}".format(url, e))
@@ -23,6 +23,8 @@ SOFTWARE.
 # Libraries
 import logging
 import os
+import shutil
+import tempfile
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -33,6 +35,19 @@ formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
 console.setFormatter(formatter)
 logger.addHandler(console)
 
+# Read size when hashing files as they are read
+LOCAL_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def get_umask():
+    """
+    Get the process umask, which can only be read by setting it.
+    :return: umask
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
 
 class LocalClient:
 
@@ -42,6 +57,13 @@ class LocalClient:
     def path_exists(self, path: str):
         return os.path.exists(path)
 
+    def delete_path(self, path: str):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
     def put_buffer(self, file_path: str, buffer, write_bytes=True):
         dir_name = os.path.dirname(file_path)
         if not os.path.exists(dir_name):
@@ -53,6 +75,59 @@ class LocalClient:
         with open(file_path, mode=mode) as localfile:
             localfile.write(buffer)
 
-    def get_buffer(self, file_path: str):
+    def put_fileobj(self, file_path: str, file_obj):
+        dir_name = os.path.dirname(file_path)
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+        with open(file_path, mode="wb") as localfile:
+            shutil.copyfileobj(file_obj, localfile)
+
+    def put_chunks(self, file_path: str, chunks):
+        dir_name = os.path.dirname(file_path)
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+
+        # Write to a temporary file and move it into place, so that partial downloads are never visible
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=dir_name, delete=False) as temp_file:
+            try:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            except Exception:
+                temp_file.close()
+                os.remove(temp_file.name)
+                raise
+
+        # Temporary files are created with mode 0600; give the stored file the mode open() would
+        os.chmod(temp_file.name, 0o666 & ~get_umask())
+        os.replace(temp_file.name, file_path)
+        return size
+
+    def get_buffer(self, file_path: str, digest=None):
         with open(file_path, mode='rb') as localfile:
-            return localfile.read()
+            if digest is None:
+                return localfile.read()
+
+            # Read into a preallocated buffer, hashing each chunk as it is read
+            buffer = bytearray(os.fstat(localfile.fileno()).st_size)
+            view = memoryview(buffer)
+            position = 0
+            while position < len(buffer):
+                size = localfile.readinto(view[position:position + LOCAL_READ_CHUNK_SIZE])
+                if not size:
+                    break
+                digest.update(view[position:position + size])
+                position += size
+            del view
+            del buffer[position:]
+            return buffer
+
+    def get_buffer_segment(self, file_path: str, start_pos: int, end_pos: int):
+        with open(file_path, mode='rb') as localfile:
+            localfile.seek(start_pos)
+            return localfile.read(max(end_pos - start_pos, 0))
+
+    def get_filing_document(self, filing_document):
+        return self.get_buffer_segment(filing_document.filing.s3_path, filing_document.start_pos,
+                                       filing_document.end_pos)
@@ -0,0 +1,248 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Libraries
+import abc
+import logging
+import os
+import struct
+import threading
+import time
+
+# Packages
+import redis
+
+# Project
+from config.settings.base import HTTP_RATE_LIMIT, HTTP_RATE_LIMIT_BURST, HTTP_RATE_LIMIT_REDIS_URL, \
+    HTTP_RATE_LIMIT_KEY, HTTP_RATE_LIMIT_LOCK_PATH
+
+# Optional packages
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Setup logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+console = logging.StreamHandler()
+console.setLevel(logging.INFO)
+formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
+console.setFormatter(formatter)
+logger.addHandler(console)
+
+# Process-wide limiter, recreated in forked worker processes so that locks and connections are never shared
+RATE_LIMITER = None
+RATE_LIMITER_PID = None
+RATE_LIMITER_LOCK = threading.Lock()
+
+# Seconds to limit locally before trying an unavailable Redis server again
+REDIS_RETRY_INTERVAL = 30.0
+
+# Theoretical arrival time stored in the lock file
+LOCK_FILE_FORMAT = struct.Struct("<d")
+
+# Reserve the next slot atomically using the Redis server clock, so hosts with skewed clocks agree;
+# arguments are the interval and burst tolerance in seconds, and the wait is returned as a string
+# because Redis truncates Lua numbers to integers
+REDIS_RESERVE_SCRIPT = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local server_time = redis.call('TIME')
+local now = tonumber(server_time[1]) + tonumber(server_time[2]) / 1000000
+local arrival_time = tonumber(redis.call('GET', KEYS[1])) or now
+if arrival_time < now then
+    arrival_time = now
+end
+local wait = arrival_time - tonumber(ARGV[2]) - now
+if wait < 0 then
+    wait = 0
+end
+arrival_time = arrival_time + tonumber(ARGV[1])
+redis.call('SET', KEYS[1], string.format('%.6f', arrival_time), 'PX', math.ceil((arrival_time - now) * 1000) + 1000)
+return string.format('%.6f', wait)
+"""
+
+
+class RateLimiter(abc.ABC):
+    """
+    Token bucket rate limiter, implemented as a generic cell rate algorithm: the shared state is the
+    theoretical arrival time of the next request, and each reservation moves it forward by one interval.
+    Reservations never need to be retried, so requests are spaced evenly at the configured rate no matter
+    how many processes share the limiter, instead of bursting and then backing off.
+    """
+
+    def __init__(self, rate: float = HTTP_RATE_LIMIT, burst: int = HTTP_RATE_LIMIT_BURST):
+        """
+        :param rate: requests per second
+        :param burst: requests that may be sent back-to-back after an idle period
+        """
+        if rate <= 0:
+            raise ValueError("Rate limit must be positive: {0}".format(rate))
+        self.rate = rate
+        self.burst = max(int(burst), 1)
+        self.interval = 1.0 / rate
+        self.tolerance = (self.burst - 1) * self.interval
+
+    @abc.abstractmethod
+    def reserve_slot(self):
+        """
+        Reserve the next request slot.
+        :return: seconds to wait before sending the request
+        """
+
+    def reserve(self, count: int = 1):
+        """
+        Reserve slots for one or more requests without blocking, e.g., to schedule work ahead of time.
+        :param count: number of requests
+        :return: seconds to wait before sending the last request
+        """
+        wait = 0.0
+        for _ in range(count):
+            wait = self.reserve_slot()
+        return wait
+
+    def acquire(self, count: int = 1):
+        """
+        Block until one or more requests may be sent.
+        :param count: number of requests
+        :return: seconds waited
+        """
+        wait = self.reserve(count)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class LocalRateLimiter(RateLimiter):
+    """
+    Rate limiter shared by the processes on one machine through a locked file holding the theoretical
+    arrival time.  Without fcntl, e.g., on Windows, the limit is only shared by the threads of one process.
+    """
+
+    def __init__(self, rate: float = HTTP_RATE_LIMIT, burst: int = HTTP_RATE_LIMIT_BURST,
+                 lock_path: str = HTTP_RATE_LIMIT_LOCK_PATH):
+        """
+        :param rate: requests per second
+        :param burst: requests that may be sent back-to-back after an idle period
+        :param lock_path: path of the shared lock file
+        """
+        super().__init__(rate, burst)
+        self.lock_path = lock_path
+        self.thread_lock = threading.Lock()
+        self.arrival_time = 0.0
+        self.lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o666) if fcntl is not None else None
+
+    def __del__(self):
+        if getattr(self, "lock_fd", None) is not None:
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+    def reserve_slot(self):
+        with self.thread_lock:
+            if self.lock_fd is None:
+                return self.update_arrival_time(self.arrival_time)
+
+            fcntl.flock(self.lock_fd, fcntl.LOCK_EX)
+            try:
+                data = os.pread(self.lock_fd, LOCK_FILE_FORMAT.size, 0)
+                arrival_time = LOCK_FILE_FORMAT.unpack(data)[0] if len(data) == LOCK_FILE_FORMAT.size else 0.0
+                wait = self.update_arrival_time(arrival_time)
+                os.pwrite(self.lock_fd, LOCK_FILE_FORMAT.pack(self.arrival_time), 0)
+                return wait
+            finally:
+                fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+
+    def update_arrival_time(self, arrival_time: float):
+        """
+        Reserve a slot given the stored theoretical arrival time, updating self.arrival_time.
+        :param arrival_time: stored theoretical arrival time
+        :return: seconds to wait
+        """
+        now = time.time()
+        arrival_time = max(arrival_time, now)
+        wait = max(arrival_time - self.tolerance - now, 0.0)
+        self.arrival_time = arrival_time + self.interval
+        return wait
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Rate limiter shared by every process and host using the same Redis key.  If Redis is unavailable,
+    requests are limited by a LocalRateLimiter, trying Redis again every REDIS_RETRY_INTERVAL seconds.
+    """
+
+    def __init__(self, rate: float = HTTP_RATE_LIMIT, burst: int = HTTP_RATE_LIMIT_BURST,
+                 redis_url: str = HTTP_RATE_LIMIT_REDIS_URL, key: str = HTTP_RATE_LIMIT_KEY,
+                 fallback: RateLimiter = None):
+        """
+        :param rate: requests per second
+        :param burst: requests that may be sent back-to-back after an idle period
+        :param redis_url: Redis URL, e.g., redis://127.0.0.1:6379/0
+        :param key: Redis key holding the theoretical arrival time
+        :param fallback: limiter to use while Redis is unavailable; LocalRateLimiter if not set
+        """
+        super().__init__(rate, burst)
+        self.key = key
+        self.client = redis.StrictRedis.from_url(redis_url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self.script = self.client.register_script(REDIS_RESERVE_SCRIPT)
+        self.fallback = fallback if fallback is not None else LocalRateLimiter(rate, burst)
+        self.is_available = True
+        self.retry_time = 0.0
+
+    def reserve_slot(self):
+        if not self.is_available and time.monotonic() < self.retry_time:
+            return self.fallback.reserve_slot()
+
+        try:
+            wait = float(self.script(keys=[self.key], args=[repr(self.interval), repr(self.tolerance)]))
+        except redis.RedisError as e:
+            if self.is_available:
+                logger.warning("Unable to reach Redis rate limiter; limiting on this machine only: {0}".format(e))
+                self.is_available = False
+            self.retry_time = time.monotonic() + REDIS_RETRY_INTERVAL
+            return self.fallback.reserve_slot()
+
+        if not self.is_available:
+            logger.info("Redis rate limiter is available again")
+            self.is_available = True
+        return wait
+
+
+def get_rate_limiter():
+    """
+    Get the process-wide sec.gov rate limiter, shared through Redis if HTTP_RATE_LIMIT_REDIS_URL is set
+    and through HTTP_RATE_LIMIT_LOCK_PATH otherwise.
+    :return: RateLimiter
+    """
+    global RATE_LIMITER, RATE_LIMITER_PID  # pylint: disable=global-statement
+    with RATE_LIMITER_LOCK:
+        if RATE_LIMITER is None or RATE_LIMITER_PID != os.getpid():
+            if HTTP_RATE_LIMIT_REDIS_URL:
+                RATE_LIMITER = RedisRateLimiter()
+            else:
+                RATE_LIMITER = LocalRateLimiter()
+            RATE_LIMITER_PID = os.getpid()
+        return RATE_LIMITER
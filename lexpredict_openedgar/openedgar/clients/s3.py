@@ -24,6 +24,7 @@ SOFTWARE.
 
 # Libraries
 import logging
+import tempfile
 
 # Packages
 import boto3
@@ -32,10 +33,17 @@ import botocore.exceptions
 # Project
 import zlib
 
-from typing import Union
+from typing import BinaryIO, Iterable, Union
 
 from config.settings.base import S3_ACCESS_KEY, S3_BUCKET, S3_COMPRESSION_LEVEL, S3_SECRET_KEY
 
+# Read size when streaming object bodies
+S3_STREAM_CHUNK_SIZE = 1024 * 1024
+S3_MIN_STREAM_CHUNK_SIZE = 8 * 1024
+
+# Compressed bytes buffered per part when streaming uploads; S3 requires at least 5 MB for all but the last part
+S3_MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
 # Setup logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -169,13 +177,14 @@ class S3Client:
 
         return folders
 
-    def get_buffer(self, remote_path: str, client=None, deflate: bool = True):
+    def get_buffer(self, remote_path: str, client=None, deflate: bool = True, digest=None):
         """
         Get a file from S3 given a path and optional client.
         :param remote_path: S3 path under bucket
         :param client: optional client to re-use
         :param deflate: whether to automatically zlib deflate contents
-        :return: buffer bytes/str
+        :param digest: optional StreamingDigest to update with the contents as they are read and inflated
+        :return: buffer bytes/str, or bytearray if digest is set
         """
         # Get client
         if client is None:
@@ -184,6 +193,24 @@ class S3Client:
         # Get object
         s3_object = client.get_object(Bucket=S3_BUCKET, Key=remote_path)
 
+        # Stream and hash the body if requested
+        if digest is not None:
+            body = s3_object["Body"]
+            decompressor = zlib.decompressobj() if deflate else None
+            buffer = bytearray()
+            try:
+                for chunk in iter(lambda: body.read(S3_STREAM_CHUNK_SIZE), b""):
+                    data = decompressor.decompress(chunk) if decompressor is not None else chunk
+                    digest.update(data)
+                    buffer += data
+                if decompressor is not None:
+                    data = decompressor.flush()
+                    digest.update(data)
+                    buffer += data
+            finally:
+                body.close()
+            return buffer
+
         # Retrieve body
         buffer = s3_object["Body"].read()
 
@@ -193,6 +220,42 @@ class S3Client:
         else:
             return buffer
 
+    def get_fileobj(self, remote_path: str, out_file: BinaryIO, client=None, deflate: bool = True, digest=None):
+        """
+        Stream a file from S3 into a binary file object, inflating and hashing it chunk by chunk so
+        that memory use does not depend on the file size.
+        :param remote_path: S3 path under bucket
+        :param out_file: binary file object to write to
+        :param client: optional client to re-use
+        :param deflate: whether to automatically zlib deflate contents
+        :param digest: optional StreamingDigest to update with the contents as they are written
+        :return: number of bytes written
+        """
+        # Get client
+        if client is None:
+            client = self.get_client()
+
+        # Get object
+        s3_object = client.get_object(Bucket=S3_BUCKET, Key=remote_path)
+
+        body = s3_object["Body"]
+        decompressor = zlib.decompressobj() if deflate else None
+        size = 0
+        try:
+            for chunk in iter(lambda: body.read(S3_STREAM_CHUNK_SIZE), b""):
+                data = decompressor.decompress(chunk) if decompressor is not None else chunk
+                if digest is not None:
+                    digest.update(data)
+                size += out_file.write(data)
+            if decompressor is not None:
+                data = decompressor.flush()
+                if digest is not None:
+                    digest.update(data)
+                size += out_file.write(data)
+        finally:
+            body.close()
+        return size
+
     def get_file(self, remote_path: str, local_path: str, client=None, deflate: bool = True):
         """
         Save a local file from S3 given a path and optional client.
@@ -202,25 +265,73 @@ class S3Client:
         :param deflate: whether to automatically zlib deflate contents
         :return:
         """
-        # Open and write buffer
+        # Open and stream buffer
         with open(local_path, "wb") as out_file:
-            out_file.write(self.get_buffer(remote_path, client, deflate))
+            self.get_fileobj(remote_path, out_file, client, deflate)
 
     def get_buffer_segment(self, remote_path: str, start_pos: int, end_pos: int, client=None, deflate: bool = True):
         """
-        Get a file from S3 given a path and optional client.
+        Get a byte range of a file from S3 given a path and optional client.  Uncompressed objects are
+        retrieved with a ranged GET; compressed objects are streamed and inflated only up to end_pos.
         :param remote_path: S3 path under bucket
-        :param start_pos:
-        :param end_pos:
+        :param start_pos: start byte offset within the uncompressed file
+        :param end_pos: end byte offset within the uncompressed file
         :param client: optional client to re-use
         :param deflate: whether to automatically zlib deflate contents
         :return:
         """
-        # Retrieve buffer and return subset
-        buffer = self.get_buffer(remote_path, client, deflate)
-        return buffer[start_pos:end_pos]
+        # Get client
+        if client is None:
+            client = self.get_client()
 
-    def put_buffer(self, remote_path: str, buffer: Union[str, bytes], client=None, deflate: bool = True):
+        if end_pos <= start_pos:
+            return b""
+
+        # Ranged GET if the stored bytes map directly to file offsets
+        if not deflate:
+            s3_object = client.get_object(Bucket=S3_BUCKET, Key=remote_path,
+                                          Range="bytes={0}-{1}".format(start_pos, end_pos - 1))
+            return s3_object["Body"].read()
+
+        # Otherwise inflate incrementally and stop reading once end_pos is reached
+        s3_object = client.get_object(Bucket=S3_BUCKET, Key=remote_path)
+        body = s3_object["Body"]
+        decompressor = zlib.decompressobj()
+        segment = bytearray()
+        position = 0
+
+        try:
+            while position < end_pos:
+                # Compressed data is rarely larger than the range it inflates to, so small ranges need small reads
+                chunk = body.read(min(max(end_pos - position, S3_MIN_STREAM_CHUNK_SIZE), S3_STREAM_CHUNK_SIZE))
+                if not chunk:
+                    break
+                data = decompressor.decompress(chunk)
+
+                # Keep any overlap with the requested range
+                p0 = max(start_pos - position, 0)
+                p1 = min(end_pos - position, len(data))
+                if p0 < p1:
+                    segment += data[p0:p1]
+                position += len(data)
+        finally:
+            body.close()
+
+        return bytes(segment)
+
+    def get_filing_document(self, filing_document, client=None, deflate: bool = True):
+        """
+        Get the raw <DOCUMENT> bytes of a FilingDocument from its stored filing without
+        retrieving the rest of the filing; pass to parse_filing_document for its content.
+        :param filing_document: FilingDocument record
+        :param client: optional client to re-use
+        :param deflate: whether the stored filing is zlib compressed
+        :return:
+        """
+        return self.get_buffer_segment(filing_document.filing.s3_path, filing_document.start_pos,
+                                       filing_document.end_pos, client, deflate)
+
+    def put_buffer(self, remote_path: str, buffer: Union[str, bytes, memoryview], client=None, deflate: bool = True):
         """
         Upload a buffer to S3 given a path and optional client.
         :param remote_path: S3 path under bucket
@@ -233,21 +344,109 @@ class S3Client:
         if client is None:
             client = self.get_client()
 
-        # Ensure we have bytes object
+        # Ensure we have bytes-like object
         if isinstance(buffer, str):
             upload_buffer = bytes(buffer, "utf-8")
-        elif isinstance(buffer, bytes):
+        elif isinstance(buffer, (bytes, bytearray, memoryview)):
             upload_buffer = buffer
         else:
-            raise TypeError("buffer must be bytes or str")
+            raise TypeError("buffer must be bytes-like or str")
 
         if deflate:
             upload_buffer = zlib.compress(upload_buffer, S3_COMPRESSION_LEVEL)
+        elif isinstance(upload_buffer, memoryview):
+            # boto3 only accepts bytes, bytearray, and file-like bodies
+            upload_buffer = upload_buffer.tobytes()
 
         # Upload
         response = client.put_object(Bucket=S3_BUCKET, Key=remote_path, Body=upload_buffer)
         return True if response["ResponseMetadata"]["HTTPStatusCode"] == 200 else False
 
+    def put_chunks(self, remote_path: str, chunks: Iterable[bytes], client=None, deflate: bool = True):
+        """
+        Upload a stream of chunks to S3 given a path and optional client, compressing incrementally and
+        sending a multipart upload once more than one part has been produced, so that at most one part
+        is held in memory.
+        :param remote_path: S3 path under bucket
+        :param chunks: iterable of bytes-like chunks, e.g., from an HTTP response
+        :param client: optional client to re-use
+        :param deflate: whether to automatically zlib deflate contents
+        :return: number of uncompressed bytes uploaded
+        """
+        # Get client
+        if client is None:
+            client = self.get_client()
+
+        compressor = zlib.compressobj(S3_COMPRESSION_LEVEL) if deflate else None
+        part = bytearray()
+        parts = []
+        upload_id = None
+        size = 0
+
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                part += compressor.compress(chunk) if compressor is not None else chunk
+                if len(part) >= S3_MULTIPART_PART_SIZE:
+                    if upload_id is None:
+                        upload_id = client.create_multipart_upload(Bucket=S3_BUCKET, Key=remote_path)["UploadId"]
+                    response = client.upload_part(Bucket=S3_BUCKET, Key=remote_path, UploadId=upload_id,
+                                                  PartNumber=len(parts) + 1, Body=bytes(part))
+                    parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+                    part = bytearray()
+
+            if compressor is not None:
+                part += compressor.flush()
+
+            # Small objects are uploaded in one request
+            if upload_id is None:
+                client.put_object(Bucket=S3_BUCKET, Key=remote_path, Body=bytes(part))
+                return size
+
+            response = client.upload_part(Bucket=S3_BUCKET, Key=remote_path, UploadId=upload_id,
+                                          PartNumber=len(parts) + 1, Body=bytes(part))
+            parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+            client.complete_multipart_upload(Bucket=S3_BUCKET, Key=remote_path, UploadId=upload_id,
+                                             MultipartUpload={"Parts": parts})
+        except Exception:
+            if upload_id is not None:
+                client.abort_multipart_upload(Bucket=S3_BUCKET, Key=remote_path, UploadId=upload_id)
+            raise
+
+        return size
+
+    def put_fileobj(self, remote_path: str, file_obj: BinaryIO, client=None, deflate: bool = True):
+        """
+        Upload a binary file object to S3 from its current position without reading it into memory.
+        Compressed contents are staged in a temporary file, and large objects are uploaded in parts.
+        :param remote_path: S3 path under bucket
+        :param file_obj: binary file object to upload
+        :param client: optional client to re-use
+        :param deflate: whether to automatically zlib deflate contents
+        :return:
+        """
+        # Get client
+        if client is None:
+            client = self.get_client()
+
+        if not deflate:
+            client.upload_fileobj(file_obj, S3_BUCKET, remote_path)
+            return True
+
+        # Compress incrementally
+        compressor = zlib.compressobj(S3_COMPRESSION_LEVEL)
+        with tempfile.TemporaryFile() as compressed_file:
+            chunk = file_obj.read(S3_STREAM_CHUNK_SIZE)
+            while chunk:
+                compressed_file.write(compressor.compress(chunk))
+                chunk = file_obj.read(S3_STREAM_CHUNK_SIZE)
+            compressed_file.write(compressor.flush())
+            compressed_file.seek(0)
+
+            # Upload
+            client.upload_fileobj(compressed_file, S3_BUCKET, remote_path)
+        return True
+
     def put_file(self, remote_path: str, local_path: str, client=None, deflate: bool = True):
         """
         Save a local file from S3 given a path and optional client.
@@ -258,4 +457,4 @@ class S3Client:
         :return:
         """
         with open(local_path, "rb") as in_file:
-            self.put_buffer(remote_path, in_file.read(), client, deflate)
+            self.put_fileobj(remote_path, in_file, client, deflate)
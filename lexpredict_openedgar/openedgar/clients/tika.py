@@ -0,0 +1,354 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Libraries
+import hashlib
+import logging
+import operator
+import os
+import threading
+import time
+from typing import Iterable, Union
+
+# Packages
+import requests
+import requests.adapters
+
+# Project imports
+from config.settings.base import TIKA_ENDPOINTS, TIKA_TIMEOUT, TIKA_CONNECT_TIMEOUT, TIKA_POOL_SIZE, \
+    TIKA_HEALTH_INTERVAL, TIKA_FAILURE_THRESHOLD, TIKA_RECOVERY_TIMEOUT
+
+# Setup logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+console = logging.StreamHandler()
+console.setLevel(logging.INFO)
+formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
+console.setFormatter(formatter)
+logger.addHandler(console)
+
+# Process-wide pool, recreated in forked worker processes so that connections are never shared
+TIKA_POOL = None
+TIKA_POOL_PID = None
+TIKA_POOL_LOCK = threading.Lock()
+
+# Documents larger than this are streamed to Tika from the buffer instead of copied
+TIKA_STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class BufferReader:
+    """
+    Sized, read-only file object over a buffer, so large documents can be sent without copying them.
+    Unlike a generator body, requests sends it with a Content-Length rather than chunked, which keeps
+    the connect and read timeouts in effect.
+    """
+
+    def __init__(self, buffer: memoryview):
+        """
+        :param buffer: buffer to read
+        """
+        self.buffer = memoryview(buffer)
+        self.position = 0
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def tell(self):
+        return self.position
+
+    def read(self, size: int = -1):
+        """
+        Read zero-copy chunks of the buffer.
+        :param size: maximum number of bytes to read, or -1 for the rest of the buffer
+        :return: memoryview
+        """
+        end = len(self.buffer) if size is None or size < 0 else min(self.position + size, len(self.buffer))
+        chunk = self.buffer[self.position:end]
+        self.position = end
+        return chunk
+
+
+class TikaEndpoint:
+    """
+    Tika server endpoint with a count of outstanding requests and a circuit breaker.  After
+    failure_threshold consecutive failures the breaker opens and the endpoint receives no requests
+    until recovery_timeout has passed; then a single trial request or health probe may close it.
+    """
+
+    def __init__(self, url: str, failure_threshold: int = TIKA_FAILURE_THRESHOLD,
+                 recovery_timeout: float = TIKA_RECOVERY_TIMEOUT):
+        """
+        Create an endpoint.
+        :param url: server URL, e.g., http://localhost:9998
+        :param failure_threshold: consecutive failures before the breaker opens
+        :param recovery_timeout: seconds before an open breaker allows a trial request
+        """
+        self.url = url.rstrip("/")
+        if self.url.endswith("/tika"):
+            self.url = self.url[:-len("/tika")]
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.outstanding = 0
+        self.failure_count = 0
+        self.open_time = None
+
+    def __str__(self):
+        return "TikaEndpoint url={0}, outstanding={1}, failure_count={2}" \
+            .format(self.url, self.outstanding, self.failure_count)
+
+    def is_open(self):
+        """
+        Check whether the circuit breaker is open.
+        :return:
+        """
+        return self.open_time is not None
+
+    def is_available(self, now: float):
+        """
+        Check whether the endpoint can take a request.  Once the recovery timeout has passed, an open
+        endpoint is half-open and takes one trial request at a time.
+        :param now: time.monotonic() value
+        :return:
+        """
+        if self.open_time is None:
+            return True
+        return now - self.open_time >= self.recovery_timeout and self.outstanding == 0
+
+    def record_success(self):
+        """
+        Record a successful request or probe, closing the breaker.
+        :return:
+        """
+        if self.open_time is not None:
+            logger.info("Closing circuit breaker for Tika endpoint {0}".format(self.url))
+        self.failure_count = 0
+        self.open_time = None
+
+    def record_failure(self, now: float):
+        """
+        Record a failed request or probe, opening the breaker at the failure threshold.
+        :param now: time.monotonic() value
+        :return:
+        """
+        self.failure_count += 1
+        if self.failure_count >= self.failure_threshold:
+            if self.open_time is None:
+                logger.warning("Opening circuit breaker for Tika endpoint {0} after {1} failures"
+                               .format(self.url, self.failure_count))
+            self.open_time = now
+
+
+class TikaPool:
+    """
+    Pool of Tika servers.  Each document is sent to the available endpoint with the fewest
+    outstanding requests, endpoints that fail repeatedly are taken out of rotation by their
+    circuit breakers, and all endpoints are probed every health_interval seconds.  Documents
+    that time out are quarantined by SHA-1 and not sent again.  Requests share a session of
+    keep-alive connections.  Safe to share between threads.
+    """
+
+    def __init__(self, endpoints: Iterable[str] = None, timeout: float = TIKA_TIMEOUT,
+                 connect_timeout: float = TIKA_CONNECT_TIMEOUT, pool_size: int = TIKA_POOL_SIZE,
+                 health_interval: float = TIKA_HEALTH_INTERVAL, failure_threshold: int = TIKA_FAILURE_THRESHOLD,
+                 recovery_timeout: float = TIKA_RECOVERY_TIMEOUT):
+        """
+        Create a pool.
+        :param endpoints: server URLs; defaults to TIKA_ENDPOINTS
+        :param timeout: seconds to wait for a document's text before quarantining it
+        :param connect_timeout: seconds to wait for connections and health probes
+        :param pool_size: keep-alive connections held per endpoint
+        :param health_interval: seconds between health probes
+        :param failure_threshold: consecutive failures before an endpoint's breaker opens
+        :param recovery_timeout: seconds before an open endpoint allows a trial request
+        """
+        if endpoints is None:
+            endpoints = TIKA_ENDPOINTS
+        self.endpoints = [TikaEndpoint(url, failure_threshold, recovery_timeout) for url in endpoints]
+        if len(self.endpoints) == 0:
+            raise ValueError("At least one Tika endpoint is required")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.health_interval = health_interval
+        self.last_health_check = time.monotonic()
+        self.is_checking_health = False
+        self.quarantine = set()
+        self.lock = threading.Lock()
+
+        # Reuse connections across documents; failover is handled by the pool rather than retries.
+        # Tika servers are internal, so skip the per-request proxy and .netrc lookups.
+        self.session = requests.Session()
+        self.session.trust_env = False
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=pool_size,
+                                                max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def check_health(self):
+        """
+        Probe every endpoint with a GET request, updating their circuit breakers.
+        :return:
+        """
+        for endpoint in self.endpoints:
+            try:
+                response = self.session.get(endpoint.url + "/tika", timeout=self.connect_timeout)
+                is_healthy = response.status_code == 200
+            except requests.RequestException as e:
+                logger.warning("Health probe failed for Tika endpoint {0}: {1}".format(endpoint.url, e))
+                is_healthy = False
+
+            with self.lock:
+                if is_healthy:
+                    endpoint.record_success()
+                else:
+                    endpoint.record_failure(time.monotonic())
+
+    def check_health_if_due(self):
+        """
+        Probe endpoints if health_interval has passed since the last probe.  Only one thread probes
+        at a time; others continue with the current endpoint states.
+        :return:
+        """
+        with self.lock:
+            if self.is_checking_health or time.monotonic() - self.last_health_check < self.health_interval:
+                return
+            self.is_checking_health = True
+
+        try:
+            self.check_health()
+        finally:
+            with self.lock:
+                self.last_health_check = time.monotonic()
+                self.is_checking_health = False
+
+    def acquire(self, exclude: Iterable[TikaEndpoint] = ()):
+        """
+        Reserve the available endpoint with the fewest outstanding requests.
+        :param exclude: endpoints not to use, e.g., those already tried for a document
+        :return: TikaEndpoint, or None if no endpoint is available
+        """
+        self.check_health_if_due()
+
+        with self.lock:
+            now = time.monotonic()
+            available_endpoints = [e for e in self.endpoints if e.is_available(now) and e not in exclude]
+            if len(available_endpoints) == 0:
+                return None
+
+            endpoint = min(available_endpoints, key=operator.attrgetter("outstanding"))
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint: TikaEndpoint, is_success: bool):
+        """
+        Release an endpoint reserved by acquire, recording the result of the request.
+        :param endpoint: endpoint from acquire
+        :param is_success: whether the endpoint handled the request
+        :return:
+        """
+        with self.lock:
+            endpoint.outstanding -= 1
+            if is_success:
+                endpoint.record_success()
+            else:
+                endpoint.record_failure(time.monotonic())
+
+    def is_quarantined(self, sha1: str):
+        """
+        Check whether a document has been quarantined after timing out.
+        :param sha1: document SHA-1
+        :return:
+        """
+        with self.lock:
+            return sha1 in self.quarantine
+
+    def extract_text(self, buffer: Union[bytes, memoryview], sha1: str = None):
+        """
+        Extract text from a document, trying each endpoint at most once if servers are unreachable
+        or return server errors.  Documents larger than TIKA_STREAM_CHUNK_SIZE are streamed from
+        the buffer without copying it.
+        :param buffer: document content
+        :param sha1: document SHA-1; calculated from buffer if not provided
+        :return: extracted text, which is empty if Tika could not parse the document
+        """
+        buffer = memoryview(buffer)
+        if sha1 is None:
+            sha1 = hashlib.sha1(buffer).hexdigest()
+
+        if self.is_quarantined(sha1):
+            raise RuntimeError("Document sha1={0} is quarantined after timing out".format(sha1))
+
+        tried_endpoints = []
+        while len(tried_endpoints) < len(self.endpoints):
+            endpoint = self.acquire(exclude=tried_endpoints)
+            if endpoint is None:
+                break
+            tried_endpoints.append(endpoint)
+
+            if len(buffer) > TIKA_STREAM_CHUNK_SIZE:
+                data = BufferReader(buffer)
+            else:
+                data = buffer.tobytes()
+
+            is_success = False
+            try:
+                response = self.session.put(endpoint.url + "/tika", data=data, headers={"Accept": "text/plain"},
+                                            timeout=(self.connect_timeout, self.timeout))
+                if response.status_code >= 500:
+                    logger.warning("Tika endpoint {0} returned HTTP {1} for sha1={2}"
+                                   .format(endpoint.url, response.status_code, sha1))
+                    continue
+
+                is_success = True
+                if response.status_code != 200:
+                    # e.g., HTTP 422 for encrypted or corrupt documents
+                    logger.warning("Tika endpoint {0} was unable to parse sha1={1}: HTTP {2}"
+                                   .format(endpoint.url, sha1, response.status_code))
+                    return ""
+
+                response.encoding = "utf-8"
+                return response.text
+            except requests.exceptions.ReadTimeout as _:
+                with self.lock:
+                    self.quarantine.add(sha1)
+                raise RuntimeError("Timed out after {0}s extracting sha1={1} with Tika endpoint {2}; quarantined"
+                                   .format(self.timeout, sha1, endpoint.url))
+            except requests.RequestException as e:
+                logger.warning("Unable to extract sha1={0} with Tika endpoint {1}: {2}".format(sha1, endpoint.url, e))
+            finally:
+                self.release(endpoint, is_success)
+
+        raise RuntimeError("No Tika endpoint available to extract sha1={0}".format(sha1))
+
+
+def get_tika_pool():
+    """
+    Get the process-wide Tika pool for TIKA_ENDPOINTS.
+    :return: TikaPool
+    """
+    global TIKA_POOL, TIKA_POOL_PID  # pylint: disable=global-statement
+    with TIKA_POOL_LOCK:
+        if TIKA_POOL is None or TIKA_POOL_PID != os.getpid():
+            TIKA_POOL = TikaPool()
+            TIKA_POOL_PID = os.getpid()
+        return TIKA_POOL
@@ -0,0 +1,28 @@
+# Generated by Django 2.0.8 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedgar', '0002_auto_20180624_1319'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilingCompany',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(db_index=True, max_length=64)),
+                ('name', models.CharField(max_length=1024, null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='openedgar.Company')),
+                ('filing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='openedgar.Filing')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='filingcompany',
+            unique_together={('filing', 'company', 'role')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.0.8 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedgar', '0003_filingcompany'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filingdocument',
+            name='text_extractor',
+            field=models.CharField(max_length=64, null=True),
+        ),
+    ]
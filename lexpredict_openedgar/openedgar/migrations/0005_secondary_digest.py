@@ -0,0 +1,23 @@
+# Generated by Django 2.0.8 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('openedgar', '0004_filingdocument_text_extractor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filing',
+            name='secondary_digest',
+            field=models.CharField(db_index=True, max_length=128, null=True),
+        ),
+        migrations.AddField(
+            model_name='filingdocument',
+            name='secondary_digest',
+            field=models.CharField(db_index=True, max_length=128, null=True),
+        ),
+    ]
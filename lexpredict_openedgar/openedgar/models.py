@@ -109,6 +109,8 @@ class Filing(django.db.models.Model):
     date_filed = django.db.models.DateField(db_index=True, null=True)
     company = django.db.models.ForeignKey(Company, db_index=True, on_delete=django.db.models.CASCADE, null=True)
     sha1 = django.db.models.CharField(max_length=1024, db_index=True, null=True)
+    # Secondary digest for dedupe lookups and sharding, as name:hexdigest; see SECONDARY_DIGEST
+    secondary_digest = django.db.models.CharField(max_length=128, db_index=True, null=True)
     s3_path = django.db.models.CharField(max_length=1024, db_index=True)
     document_count = django.db.models.IntegerField(default=0)
     is_processed = django.db.models.BooleanField(default=False, db_index=True)
@@ -125,6 +127,32 @@ class Filing(django.db.models.Model):
             .decode("utf-8", "ignore")
 
 
+class FilingCompany(django.db.models.Model):
+    """
+    Filing company, which links a filing to each company named in its header, such as
+    the filer, subject company, reporting owner, or issuer.
+    """
+
+    # Key fields
+    filing = django.db.models.ForeignKey(Filing, db_index=True, on_delete=django.db.models.CASCADE)
+    company = django.db.models.ForeignKey(Company, db_index=True, on_delete=django.db.models.CASCADE)
+    role = django.db.models.CharField(max_length=64, db_index=True)
+    name = django.db.models.CharField(max_length=1024, null=True)
+
+    class Meta:
+        unique_together = ('filing', 'company', 'role')
+
+    def __str__(self):
+        """
+        String representation method
+        :return:
+        """
+        return "FilingCompany filing={0}, cik={1}, role={2}" \
+            .format(self.filing, self.company.cik, self.role) \
+            .encode("utf-8", "ignore") \
+            .decode("utf-8", "ignore")
+
+
 class FilingDocument(django.db.models.Model):
     """
     Filing document, which corresponds to a <DOCUMENT>...</DOCUMENT> section of a <SEC-DOCUMENT>.
@@ -138,8 +166,13 @@ class FilingDocument(django.db.models.Model):
     content_type = django.db.models.CharField(max_length=1024, null=True)
     description = django.db.models.CharField(max_length=1024, null=True)
     sha1 = django.db.models.CharField(max_length=1024, db_index=True)
+    # Secondary digest for dedupe lookups and sharding, as name:hexdigest; see SECONDARY_DIGEST
+    secondary_digest = django.db.models.CharField(max_length=128, db_index=True, null=True)
+    # Byte offsets of the <DOCUMENT> block within the raw filing
     start_pos = django.db.models.IntegerField(db_index=True)
     end_pos = django.db.models.IntegerField(db_index=True)
+    # Extractor that produced the stored text, e.g., html or tika
+    text_extractor = django.db.models.CharField(max_length=64, null=True)
     is_processed = django.db.models.BooleanField(default=False, db_index=True)
     is_error = django.db.models.BooleanField(default=False, db_index=True)
 
@@ -0,0 +1,181 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Libraries
+import hashlib
+import logging
+from typing import BinaryIO, Iterable, Iterator, Union
+
+# Project
+from config.settings.base import SECONDARY_DIGEST
+
+# Optional packages
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Setup logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+console = logging.StreamHandler()
+console.setLevel(logging.INFO)
+formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
+console.setFormatter(formatter)
+logger.addHandler(console)
+
+# Chunk size for hashing in-memory buffers, small enough that each chunk stays in cache for both digests
+DIGEST_CHUNK_SIZE = 256 * 1024
+
+# BLAKE2b digest size in bytes
+BLAKE2B_DIGEST_SIZE = 16
+
+
+def get_secondary_hash(name: str = SECONDARY_DIGEST):
+    """
+    Get a new hash object for the secondary digest.
+    :param name: blake2b, xxh64, or None/empty to disable
+    :return: hash object, or None if disabled
+    """
+    if not name:
+        return None
+    elif name == "blake2b":
+        return hashlib.blake2b(digest_size=BLAKE2B_DIGEST_SIZE)
+    elif name == "xxh64":
+        if xxhash is None:
+            raise RuntimeError("Secondary digest xxh64 requires the xxhash package")
+        return xxhash.xxh64()
+
+    raise ValueError("Unknown secondary digest {0}".format(name))
+
+
+class StreamingDigest:
+    """
+    SHA-1 and optional secondary digest updated together as chunks arrive, so that content is hashed
+    in the same pass that reads, decompresses, or decodes it.  SHA-1 remains the canonical storage key;
+    the secondary digest is a faster digest for dedupe lookups and sharding, stored as name:hexdigest so
+    that values from different algorithms never collide.
+    """
+
+    def __init__(self, secondary: str = None):
+        """
+        :param secondary: secondary digest name, empty to disable, or None for SECONDARY_DIGEST
+        """
+        if secondary is None:
+            secondary = SECONDARY_DIGEST
+        self.secondary = secondary or None
+        self.sha1_hash = None
+        self.secondary_hash = None
+        self.size = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Discard everything hashed so far, e.g., before retrying a failed download.
+        :return:
+        """
+        self.sha1_hash = hashlib.sha1()
+        self.secondary_hash = get_secondary_hash(self.secondary)
+        self.size = 0
+
+    def update(self, data: Union[bytes, bytearray, memoryview]):
+        """
+        Hash a chunk.
+        :param data: chunk
+        :return:
+        """
+        self.sha1_hash.update(data)
+        if self.secondary_hash is not None:
+            self.secondary_hash.update(data)
+        self.size += len(data)
+
+    def update_buffer(self, buffer, chunk_size: int = DIGEST_CHUNK_SIZE):
+        """
+        Hash a whole buffer in zero-copy chunks.
+        :param buffer: bytes-like buffer or mmap
+        :param chunk_size: chunk size in bytes
+        :return:
+        """
+        view = memoryview(buffer)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast("B")
+        for pos in range(0, len(view), chunk_size):
+            self.update(view[pos:pos + chunk_size])
+
+    @property
+    def sha1(self):
+        """
+        Get the SHA-1 hex digest.
+        :return: hex digest
+        """
+        return self.sha1_hash.hexdigest()
+
+    @property
+    def secondary_digest(self):
+        """
+        Get the secondary digest.
+        :return: name:hexdigest, or None if disabled
+        """
+        if self.secondary_hash is None:
+            return None
+        return "{0}:{1}".format(self.secondary, self.secondary_hash.hexdigest())
+
+
+def get_buffer_digest(buffer, secondary: str = None):
+    """
+    Hash a whole buffer in a single pass.
+    :param buffer: bytes-like buffer or mmap
+    :param secondary: secondary digest name, empty to disable, or None for SECONDARY_DIGEST
+    :return: StreamingDigest
+    """
+    digest = StreamingDigest(secondary)
+    digest.update_buffer(buffer)
+    return digest
+
+
+def iter_digest_chunks(chunks: Iterable[bytes], digest: StreamingDigest) -> Iterator[bytes]:
+    """
+    Pass chunks through, hashing each one on the way.
+    :param chunks: iterable of chunks, e.g., from an HTTP or S3 body
+    :param digest: StreamingDigest to update
+    :return: iterator of chunks
+    """
+    for chunk in chunks:
+        if chunk:
+            digest.update(chunk)
+            yield chunk
+
+
+class HashingFile:
+    """
+    Binary file wrapper that updates a StreamingDigest with everything written through it.
+    """
+
+    def __init__(self, out_file: BinaryIO, digest: StreamingDigest = None):
+        self.out_file = out_file
+        self.digest = digest if digest is not None else StreamingDigest()
+
+    def write(self, data):
+        self.digest.update(data)
+        return self.out_file.write(data)
@@ -24,23 +24,30 @@ SOFTWARE.
 
 # Libraries
 import binascii
+import collections
+import concurrent.futures
 import gzip
-import hashlib
 import io
 import logging
 import mimetypes
+import mmap
+import operator
 import re
 import os
+import tempfile
 import zlib
-from typing import Union
+from typing import BinaryIO, Iterable, Iterator, Union
 
 # Packages
 import dateutil.parser
+import numpy
 import pandas
-import tika.parser
 
 # Project imports
-from config.settings.base import TIKA_ENDPOINT
+import openedgar.clients.tika
+import openedgar.parsers.text
+from openedgar.parsers.digest import HashingFile, StreamingDigest, get_buffer_digest
+from config.settings.base import MAX_IN_MEMORY_DOCUMENT_BYTES, TIKA_MAX_WORKERS, TIKA_TIMEOUT
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -51,156 +58,594 @@ formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
 console.setFormatter(formatter)
 logger.addHandler(console)
 
+# Index files; the CIK, date, and file name columns never contain spaces
+IndexRow = collections.namedtuple("IndexRow", ["form_type", "company_name", "cik", "date_filed", "file_name"])
+INDEX_COLUMN_NAMES = [("Form Type", "form_type"),
+                      ("Form", "form_type"),
+                      ("Company Name", "company_name"),
+                      ("CIK", "cik"),
+                      ("Date Filed", "date_filed"),
+                      ("File Name", "file_name"),
+                      ("Filename", "file_name")]
+INDEX_DATAFRAME_COLUMNS = {"form_type": "Form Type",
+                           "company_name": "Company Name",
+                           "cik": "CIK",
+                           "date_filed": "Date Filed",
+                           "file_name": "File Name"}
+INDEX_TOKEN_FIELDS = {"cik", "date_filed", "file_name"}
+INDEX_SEPARATOR_RE = re.compile(r"^-{8,}[ \t]*$", re.MULTILINE)
+INDEX_LEADING_SPLIT_RE = re.compile(r"\s{2,}")
+INDEX_MAX_COMPRESSION_LAYERS = 4
 
-def uudecode(buffer: Union[bytes, str]):
+# Parsed index sidecars; bump the version whenever the array layout changes
+INDEX_SIDECAR_VERSION = 1
+INDEX_SIDECAR_SUFFIX = ".rows.v{0}.npy".format(INDEX_SIDECAR_VERSION)
+
+# Filing structure tags
+FILING_HEADER_START_RE = re.compile(rb"<(SEC-HEADER|IMS-HEADER)>")
+FILING_DOCUMENT_START_RE = re.compile(rb"<DOCUMENT>")
+FILING_DOCUMENT_END_RE = re.compile(rb"</DOCUMENT>")
+FILING_HEADER_BOUNDARY_RE = re.compile(rb"</(?:SEC|IMS)-HEADER>|<DOCUMENT>")
+
+# SEC-HEADER field lines; nesting is given by leading whitespace and sections have no value
+FILING_HEADER_LINE_RE = re.compile(r"^([ \t]*)([^:<\r\n][^:\r\n]*):[ \t]*([^\r\n]*)$", re.MULTILINE)
+FILING_HEADER_PARTY_ROLES = ("FILER", "FILED BY", "SUBJECT COMPANY", "REPORTING-OWNER", "ISSUER")
+
+# Initial and maximum prefix sizes for header-only reads from storage
+FILING_HEADER_READ_SIZE = 16 * 1024
+FILING_HEADER_MAX_READ_SIZE = 16 * 1024 * 1024
+
+# Document metadata tags
+DOCUMENT_TAG_LINE_RE = re.compile(rb"\s*<([A-Za-z][A-Za-z0-9-]*)>([^\r\n]*)")
+DOCUMENT_METADATA_TAGS = {b"TYPE": "type",
+                          b"SEQUENCE": "sequence",
+                          b"FILENAME": "file_name",
+                          b"DESCRIPTION": "description"}
+DocumentMetadata = collections.namedtuple("DocumentMetadata", ["type", "sequence", "file_name", "description",
+                                                               "content_start", "content_end"])
+
+# uuencoding; full lines encode 45 bytes in 60 characters after the M length character
+UUENCODE_BEGIN_RE = re.compile(rb"^begin [0-7]+ [^\n]*\n?", re.MULTILINE)
+UUENCODE_LINE_RE = re.compile(rb"[^\n]*\n?")
+UUENCODE_BATCH_SIZE = 1024 * 1024
+
+
+def uudecode_full_lines(buffer: memoryview, start_pos: int, end_pos: int):
+    """
+    Decode the run of full, 45-byte uuencoded lines starting at start_pos in bulk.
+    :param buffer: uuencoded buffer
+    :param start_pos: offset of the first line
+    :param end_pos: offset to stop decoding at
+    :return: tuple of decoded bytes view and end offset of the run, or (None, start_pos) if there is no run
+    """
+    # Get line length from the first line, allowing for CRLF
+    line_length = bytes(buffer[start_pos:start_pos + 63]).find(b"\n") + 1
+    if line_length not in (62, 63) or buffer[start_pos] != 0x4D:
+        return None, start_pos
+
+    line_count = (end_pos - start_pos) // line_length
+    lines = numpy.frombuffer(buffer, dtype=numpy.uint8, count=line_count * line_length, offset=start_pos) \
+        .reshape(line_count, line_length)
+    body = lines[:, 1:61] - 0x20
+
+    # Find the run of valid full lines, with all characters in 0x20-0x60
+    is_valid = (lines[:, 0] == 0x4D) & (lines[:, -1] == 0x0A) & (body.max(axis=1) <= 0x40)
+    if line_length == 63:
+        is_valid &= lines[:, 61] == 0x0D
+    run_count = line_count if is_valid.all() else int(is_valid.argmin())
+    if run_count == 0:
+        return None, start_pos
+
+    # Map each group of four characters to three bytes
+    values = (body[:run_count] & 0x3F).reshape(-1, 4)
+    data = numpy.empty((values.shape[0], 3), dtype=numpy.uint8)
+    data[:, 0] = (values[:, 0] << 2) | (values[:, 1] >> 4)
+    data[:, 1] = (values[:, 1] << 4) | (values[:, 2] >> 2)
+    data[:, 2] = (values[:, 2] << 6) | values[:, 3]
+
+    return memoryview(data.reshape(-1)), start_pos + run_count * line_length
+
+
+def uudecode(buffer: Union[bytes, bytearray, memoryview, mmap.mmap, str], out_file: BinaryIO = None,
+             digest: StreamingDigest = None):
+    """
+    uudecode an input buffer; based on python library uu but with support for byte stream.  Runs of full
+    45-byte lines are decoded in bulk with numpy, with other lines decoded one at a time.
+    :param buffer: uuencoded buffer, including the begin line
+    :param out_file: optional binary file to stream decoded output to
+    :param digest: optional StreamingDigest to update with each decoded chunk
+    :return: decoded bytearray, or the number of bytes written if out_file is set
+    """
+    if isinstance(buffer, str):
+        buffer = buffer.encode("utf-8")
+    buffer = memoryview(buffer)
+    end_pos = len(buffer)
+
+    # Fail fast if there is no valid header
+    begin_match = UUENCODE_BEGIN_RE.search(buffer)
+    if begin_match is None:
+        raise ValueError("No valid uuencode begin line found")
+    pos = begin_match.end()
+
+    # Preallocate output from the encoded size unless streaming
+    if out_file is None:
+        output = bytearray((end_pos - pos) * 3 // 4)
+    else:
+        output = None
+    output_size = 0
+
+    while pos < end_pos:
+        # Decode runs of full lines in bulk
+        data, run_end_pos = uudecode_full_lines(buffer, pos, min(end_pos, pos + UUENCODE_BATCH_SIZE))
+        if data is not None:
+            pos = run_end_pos
+        else:
+            line_match = UUENCODE_LINE_RE.match(buffer, pos)
+            line = line_match.group(0)
+            pos = line_match.end()
+
+            # Check for end or skip blank lines
+            line_value = line.strip(b" \t\r\n\f")
+            if line_value == b"end":
+                break
+            elif len(line_value) == 0:
+                continue
+
+            try:
+                data = binascii.a2b_uu(line)
+            except binascii.Error as _:
+                # Workaround for broken uuencoders by /Fredrik Lundh
+                nbytes = (((line[0] - 32) & 63) * 4 + 5) // 3
+                try:
+                    data = binascii.a2b_uu(line[:nbytes])
+                except binascii.Error as e:
+                    raise ValueError("Malformed uuencoded line at offset {0}: {1}".format(line_match.start(), e))
+
+        if digest is not None:
+            digest.update(data)
+        if out_file is None:
+            output[output_size:output_size + len(data)] = data
+        else:
+            out_file.write(data)
+        output_size += len(data)
+
+    if out_file is not None:
+        return output_size
+
+    del output[output_size:]
+    return output
+
+
+def uudecode_to_file(buffer: Union[bytes, bytearray, memoryview, mmap.mmap]):
+    """
+    uudecode a buffer into an anonymous temporary file, hashing the output as it is written, so that
+    the decoded content is never held in memory.
+    :param buffer: uuencoded buffer, including the begin line
+    :return: (temporary file, read-only memory map of its content, StreamingDigest) tuple
+    """
+    content_file = tempfile.TemporaryFile()
+    try:
+        hashing_file = HashingFile(content_file)
+        content_size = uudecode(buffer, hashing_file)
+        content_file.flush()
+    except Exception:
+        content_file.close()
+        raise
+
+    # Map the file so the content can be used like any other buffer without reading it back in
+    content_file.seek(0)
+    if content_size > 0:
+        content = mmap.mmap(content_file.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        content = b""
+    return content_file, content, hashing_file.digest
+
+
+def extract_text(buffer: Union[bytes, memoryview], sha1: str = None):
     """
-    uudecode an input buffer; based on python library uu but with support for byte stream
-    :param buffer:
+    Extract text from a document using the process-wide Tika pool.
+    :param buffer: buffer to send to tika
+    :param sha1: document SHA-1, used to quarantine documents that time out
     :return:
     """
-    # Create in_file from buffer
-    in_file = io.BytesIO(buffer)
-    out_file = io.BytesIO()
+    return openedgar.clients.tika.get_tika_pool().extract_text(buffer, sha1)
 
-    while True:
-        hdr = in_file.readline()
-        if not hdr.startswith(b'begin'):
-            continue
-        hdrfields = hdr.split(b' ', 2)
-        if len(hdrfields) == 3 and hdrfields[0] == b'begin':
+
+def decompress_index_buffer(buffer: bytes):
+    """
+    Decompress an index buffer in memory, unwrapping zlib and any number of gzip layers.
+    :param buffer: raw index buffer
+    :return: uncompressed buffer
+    """
+    for _ in range(INDEX_MAX_COMPRESSION_LAYERS):
+        if buffer[0:2] == b"\x1f\x8b":
+            buffer = gzip.decompress(buffer)
+        elif len(buffer) > 1 and buffer[0] == 0x78 and (buffer[0] * 256 + buffer[1]) % 31 == 0:
             try:
-                int(hdrfields[1], 8)
+                buffer = zlib.decompress(buffer)
+            except zlib.error:
                 break
-            except ValueError:
-                pass
+        else:
+            break
+
+    return buffer
+
+
+def open_index_buffer(source: Union[bytes, bytearray, memoryview, str, BinaryIO]):
+    """
+    Get the uncompressed, decoded text of an index file.
+    :param source: index buffer, local file path, or binary file object
+    :return: index text
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as index_file:
+            buffer = index_file.read()
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = bytes(source)
+    else:
+        buffer = source.read()
+
+    return decode_buffer(decompress_index_buffer(buffer))
+
+
+class IndexFilter:
+    """
+    Form type, CIK, and date predicates applied while index rows are scanned, so that rows that do not
+    match are dropped before they become IndexRow tuples, or applied as a mask over an index array.
+    Dropped rows are counted in skipped_count rather than logged one at a time.
+    """
+
+    __slots__ = ("form_types", "ciks", "date_from", "date_to", "skipped_count")
+
+    def __init__(self, form_types: Iterable[str] = None, ciks: Iterable[int] = None, date_from=None, date_to=None):
+        """
+        :param form_types: optional form types to keep
+        :param ciks: optional CIKs to keep
+        :param date_from: optional first date filed to keep, as a date or YYYY-MM-DD/YYYYMMDD string
+        :param date_to: optional last date filed to keep, as a date or YYYY-MM-DD/YYYYMMDD string
+        """
+        self.form_types = set(form_types) if form_types is not None else None
+        self.ciks = set(int(cik) for cik in ciks) if ciks is not None else None
+        self.date_from = str(date_from).replace("-", "") if date_from is not None else None
+        self.date_to = str(date_to).replace("-", "") if date_to is not None else None
+        self.skipped_count = 0
+
+    def __repr__(self):
+        return "IndexFilter(form_types={0!r}, ciks={1!r}, date_from={2!r}, date_to={3!r})" \
+            .format(self.form_types, self.ciks, self.date_from, self.date_to)
+
+    @property
+    def is_empty(self):
+        """
+        Check whether the filter keeps every row.
+        :return: bool
+        """
+        return self.form_types is None and self.ciks is None and self.date_from is None and self.date_to is None
+
+    def matches(self, form_type: str, cik: int, date_filed: str):
+        """
+        Check a row against the filter, counting it in skipped_count if it does not match.
+        :param form_type: form type
+        :param cik: CIK
+        :param date_filed: date filed, as YYYY-MM-DD or YYYYMMDD
+        :return: bool
+        """
+        if self.form_types is not None and form_type not in self.form_types:
+            self.skipped_count += 1
+            return False
+        if self.ciks is not None and cik not in self.ciks:
+            self.skipped_count += 1
+            return False
+        if self.date_from is not None or self.date_to is not None:
+            date_filed = date_filed.replace("-", "")
+            if (self.date_from is not None and date_filed < self.date_from) or \
+                    (self.date_to is not None and date_filed > self.date_to):
+                self.skipped_count += 1
+                return False
+        return True
+
+    def get_mask(self, index_array: numpy.ndarray):
+        """
+        Get a boolean mask of the rows of an index array that match the filter, adding the others to
+        skipped_count.
+        :param index_array: structured array from index_rows_to_array
+        :return: boolean array
+        """
+        mask = numpy.ones(index_array.shape[0], dtype=bool)
+        if self.form_types is not None:
+            mask &= numpy.isin(index_array["form_type"], [f.encode("utf-8") for f in self.form_types])
+        if self.ciks is not None:
+            mask &= numpy.isin(index_array["cik"], list(self.ciks))
+        if self.date_from is not None or self.date_to is not None:
+            dates = numpy.char.replace(index_array["date_filed"], b"-", b"")
+            if self.date_from is not None:
+                mask &= dates >= self.date_from.encode("utf-8")
+            if self.date_to is not None:
+                mask &= dates <= self.date_to.encode("utf-8")
+        self.skipped_count += int(mask.shape[0] - mask.sum())
+        return mask
+
+    def apply(self, index_array: numpy.ndarray):
+        """
+        Select the rows of an index array that match the filter.
+        :param index_array: structured array from index_rows_to_array
+        :return: structured array
+        """
+        if self.is_empty:
+            return index_array
+        return index_array[self.get_mask(index_array)]
+
+
+def get_index_columns(header_line: str):
+    """
+    Get the fields and start positions of each column from the header line of a fixed-width index.
+    :param header_line: header line, e.g. Form Type   Company Name   CIK   Date Filed  File Name
+    :return: list of (start position, IndexRow field) tuples sorted by position
+    """
+    columns = []
+    for column_name, field in INDEX_COLUMN_NAMES:
+        # Skip fallback names if the full name was found
+        if field in [c[1] for c in columns]:
+            continue
+        column_pos = header_line.find(column_name)
+        if column_pos >= 0:
+            columns.append((column_pos, field))
+
+    return sorted(columns)
+
+
+def iter_index_rows(source: Union[bytes, bytearray, memoryview, str, BinaryIO], row_filter: IndexFilter = None):
+    """
+    Parse a form.idx, company.idx, or master.idx index file, yielding one IndexRow per filing.
+    :param source: index buffer, local file path, or binary file object; may be zlib or gzip compressed
+    :param row_filter: optional IndexFilter; rows that do not match are dropped during the scan
+    :return: iterator of IndexRow
+    """
+    index_buffer = open_index_buffer(source)
+    if index_buffer is None:
+        logger.error("Unable to decode index buffer")
+        return
+
+    # Get header line, which precedes the separator line of dashes
+    separator_match = INDEX_SEPARATOR_RE.search(index_buffer)
+    if separator_match is None:
+        logger.error("Unable to identify header line in index buffer")
+        return
+    header_p0 = index_buffer.rfind("\n", 0, max(separator_match.start() - 1, 0)) + 1
+    header_line = index_buffer[header_p0:separator_match.start()]
+    lines = index_buffer[separator_match.end():].splitlines()
+
+    if row_filter is not None and row_filter.is_empty:
+        row_filter = None
+
+    if "|" in header_line:
+        yield from iter_delimited_index_rows(header_line, lines, row_filter)
+    else:
+        yield from iter_fixed_width_index_rows(header_line, lines, row_filter)
+
+    if row_filter is not None and row_filter.skipped_count > 0:
+        logger.info("Skipped {0} index rows not matching {1}".format(row_filter.skipped_count, row_filter))
+
+
+def iter_delimited_index_rows(header_line: str, lines: Iterable[str], row_filter: IndexFilter = None):
+    """
+    Parse the rows of a pipe-delimited master.idx index file.
+    :param header_line: header line, e.g. CIK|Company Name|Form Type|Date Filed|Filename
+    :param lines: data lines following the separator line
+    :param row_filter: optional IndexFilter
+    :return: iterator of IndexRow
+    """
+    column_names = dict(INDEX_COLUMN_NAMES)
+    fields = [column_names.get(name.strip()) for name in header_line.strip().split("|")]
+    if None in fields or sorted(fields) != sorted(IndexRow._fields):
+        logger.error("Unable to identify proper columns in index buffer: {0}".format(fields))
+        return
+
+    # Reorder values from column order to IndexRow order
+    row_getter = operator.itemgetter(*[fields.index(field) for field in IndexRow._fields])
+    cik_index = fields.index("cik")
+    name_index = fields.index("company_name")
+    form_type_index = fields.index("form_type")
+    date_index = fields.index("date_filed")
+
+    bad_row_count = 0
+    make_row = IndexRow._make
+    for line in lines:
+        values = line.split("|")
+        if len(values) != len(fields):
+            if len(values) > len(fields):
+                # Rejoin company names containing the delimiter
+                extra_count = len(values) - len(fields)
+                values[name_index:name_index + extra_count + 1] = \
+                    ["|".join(values[name_index:name_index + extra_count + 1])]
+            else:
+                if len(line.strip()) > 0:
+                    bad_row_count += 1
+                continue
 
-    s = in_file.readline()
-    while s and s.strip(b' \t\r\n\f') != b'end':
         try:
-            data = binascii.a2b_uu(s)
-        except binascii.Error as _:
-            # Workaround for broken uuencoders by /Fredrik Lundh
-            nbytes = (((s[0] - 32) & 63) * 4 + 5) // 3
-            data = binascii.a2b_uu(s[:nbytes])
-        out_file.write(data)
-        s = in_file.readline()
+            values[cik_index] = int(values[cik_index])
+        except ValueError:
+            bad_row_count += 1
+            continue
+
+        if row_filter is not None and \
+                not row_filter.matches(values[form_type_index], values[cik_index], values[date_index]):
+            continue
+
+        yield make_row(row_getter(values))
 
-    return out_file.getvalue()
+    if bad_row_count > 0:
+        logger.warning("Skipped {0} malformed index rows".format(bad_row_count))
 
 
-def extract_text(buffer: Union[bytes, str]):
+def iter_fixed_width_index_rows(header_line: str, lines: Iterable[str], row_filter: IndexFilter = None):
     """
-    Extract text from a document using tika.
-    :param buffer: buffer to send to tika
-    :return:
+    Parse the rows of a fixed-width form.idx or company.idx index file.  Column positions are
+    taken from the header line; the CIK, date, and file name columns contain no spaces and are
+    split from the end of each line, so long company names that overrun their column are still
+    parsed correctly.
+    :param header_line: header line, e.g. Form Type   Company Name   CIK   Date Filed  File Name
+    :param lines: data lines following the separator line
+    :param row_filter: optional IndexFilter
+    :return: iterator of IndexRow
     """
-    # Extract HTML using Tika
-    tika_results = tika.parser.from_buffer(buffer, TIKA_ENDPOINT)
+    columns = get_index_columns(header_line)
+    fields = [field for _, field in columns]
+    if sorted(fields) != sorted(IndexRow._fields):
+        logger.error("Unable to identify proper columns in index buffer: {0}".format(fields))
+        return
+
+    # Split the space-free columns from the end and the rest by header position
+    trailing_count = 0
+    for field in reversed(fields):
+        if field not in INDEX_TOKEN_FIELDS:
+            break
+        trailing_count += 1
+    leading_count = len(columns) - trailing_count
+    leading_spans = [(p0, p1) for (p0, _), (p1, _) in zip(columns[:leading_count],
+                                                          columns[1:leading_count] + [(None, None)])]
+    split_pos = columns[1][0] if leading_count == 2 else None
 
-    if "content" in tika_results:
-        return tika_results["content"]
+    # Reorder values from column order to IndexRow order
+    row_getter = operator.itemgetter(*[fields.index(field) for field in IndexRow._fields])
+    cik_index = fields.index("cik")
+    form_type_index = fields.index("form_type")
+    date_index = fields.index("date_filed")
 
-    return ""
+    bad_row_count = 0
+    make_row = IndexRow._make
+    for line in lines:
+        values = line.rsplit(None, trailing_count)
+        if len(values) != trailing_count + 1:
+            if len(line.strip()) > 0:
+                bad_row_count += 1
+            continue
+
+        prefix = values[0]
+        if split_pos is None:
+            leading_values = [prefix[p0:p1].strip() for p0, p1 in leading_spans]
+        elif prefix[split_pos - 1:split_pos] == " ":
+            leading_values = [prefix[:split_pos].strip(), prefix[split_pos:].strip()]
+        else:
+            # First value runs into the second column, so split on the first wide gap instead
+            leading_values = INDEX_LEADING_SPLIT_RE.split(prefix.strip(), 1)
+            if len(leading_values) != 2:
+                bad_row_count += 1
+                continue
+        values[0:1] = leading_values
 
+        try:
+            values[cik_index] = int(values[cik_index])
+        except ValueError:
+            bad_row_count += 1
+            continue
 
-def parse_index_file(file_name: str, double_gz: bool = False):
+        if row_filter is not None and \
+                not row_filter.matches(values[form_type_index], values[cik_index], values[date_index]):
+            continue
+
+        yield make_row(row_getter(values))
+
+    if bad_row_count > 0:
+        logger.warning("Skipped {0} malformed index rows".format(bad_row_count))
+
+
+def parse_index_file(file_name: Union[str, bytes, BinaryIO], double_gz: bool = False, row_filter: IndexFilter = None):
     """
-    Parse an index file.
-    :param file_name:
-    :param double_gz:
-    :return:
+    Parse an index file into a DataFrame; use iter_index_rows to avoid building the DataFrame.
+    :param file_name: local path, index buffer, or binary file object
+    :param double_gz: unused; compression layers are detected automatically
+    :param row_filter: optional IndexFilter; rows that do not match are dropped during the scan
+    :return: DataFrame with CIK, Company Name, Date Filed, File Name, and Form Type columns
     """
     # Log entrance
-    if not os.path.exists(file_name):
+    if isinstance(file_name, str) and not os.path.exists(file_name):
         if os.path.exists(file_name + ".gz"):
             file_name += ".gz"
         else:
             logger.error("File {0} does not exist on filesystem.".format(file_name))
             return pandas.DataFrame()
 
-    logger.info("Parsing index file: {0}".format(file_name))
-
-    # Read index
-    try:
-        with gzip.open(file_name, "rb") as index_file:
-            index_buffer = index_file.read()
-    except IOError as e:
-        logger.error("IOError parsing {0}: {1}".format(file_name, e))
-        # Read as plain binary
-        with open(file_name, "rb") as index_file:
-            index_buffer = index_file.read()
-
-        # Check for alternative header
-        if index_buffer[0] == '\x78' and (ord(index_buffer[1]) + 0x7800) % 31 == 0:
-            index_buffer = zlib.decompress(index_buffer).decode("utf-8")
-            logger.info("gz with valid header: decompressing {0} to {1} bytes.".format(file_name,
-                                                                                       len(index_buffer)))
-
-        # Check for double-gz
-        if double_gz:
-            index_buffer = os.popen("gunzip -c {0} | gunzip -c".format(file_name)).read() \
-                .decode("utf-8", "ignore").decode("utf-8", "ignore")
-            logger.warning("Double-decompressing buffer for {0}".format(file_name))
-
-    # Re-code to UTF-8
-    try:
-        index_buffer = index_buffer.decode("utf-8")
-    except UnicodeDecodeError as _:
-        # Check for double-compression
-        try:
-            index_buffer = gzip.GzipFile(fileobj=io.BytesIO(index_buffer)).read().encode("utf-8").decode("utf-8")
-        except UnicodeDecodeError as _:
-            try:
-                index_buffer = os.popen("gunzip -c {0} | gunzip -c".format(file_name)).read() \
-                    .decode("utf-8", "ignore").decode("utf-8", "ignore")
-                logger.warning("Double-decompressing buffer for {0}".format(file_name))
-            except UnicodeDecodeError as g:
-                logger.error("Error decoding {0}: {1}".format(file_name, g))
-                logger.error("First 10 bytes: {0}".format(index_buffer[0:10]))
-                return pandas.DataFrame()
-            except OSError as h:
-                logger.error("Error decoding {0}: {1}".format(file_name, h))
-                logger.error("First 10 bytes: {0}".format(index_buffer[0:10]))
-                return pandas.DataFrame()
-        except OSError as h:
-            logger.error("Error decoding {0}: {1}".format(file_name, h))
-            logger.error("First 10 bytes: {0}".format(index_buffer[0:10]))
-            return pandas.DataFrame()
-
-    # Get header line and data line starts
-    header_line_pos = index_buffer.find("\nForm Type") + 1
-    separator_line_pos = index_buffer.find("-", header_line_pos + 1)
-    data_line_pos = index_buffer.find("\n", separator_line_pos + 1)
-
-    # Build buffer and parse as fixed-width file
-    data_buffer = io.StringIO(index_buffer[header_line_pos:separator_line_pos].replace("\n", "\t")
-                              + index_buffer[data_line_pos:])
-    data_table = pandas.read_fwf(data_buffer,
-                                 colspecs="infer",
-                                 encoding="utf-8")
-
-    # Deal with broken field names
-    if "Form" in data_table.columns and "Form Type" not in data_table.columns:
-        logger.warning("Index file has abnormal columns: {0}".format(file_name))
-        data_table["Form Type"] = data_table["Form"]
-        del data_table["Form"]
-
-    # Remove unknown field names
-    good_columns = ["CIK", "Company Name", "Date Filed", "File Name", "Form Type"]
-    try:
-        data_table = data_table.loc[:, good_columns]
-    except KeyError:
-        logger.error("Unable to identify proper columns in {0}".format(file_name))
-        logger.error("Columns found: {0}".format(data_table.columns))
+    logger.info("Parsing index file: {0}".format(file_name if isinstance(file_name, str) else "buffer"))
+    data_table = pandas.DataFrame.from_records(list(iter_index_rows(file_name, row_filter)), columns=IndexRow._fields) \
+        .rename(columns=INDEX_DATAFRAME_COLUMNS) \
+        .loc[:, ["CIK", "Company Name", "Date Filed", "File Name", "Form Type"]]
 
     # Log exit
-    logger.info("Completed parsing index file: {0}".format(file_name))
     logger.info("Index data shape: {0}".format(data_table.shape))
 
     # Return
     return data_table
 
 
+def get_index_sidecar_path(file_path: str):
+    """
+    Get the path of the parsed index sidecar stored next to a raw index file.
+    :param file_path: path of the raw index file
+    :return: sidecar path
+    """
+    return file_path + INDEX_SIDECAR_SUFFIX
+
+
+def index_rows_to_array(rows: Iterable[IndexRow]):
+    """
+    Convert index rows to a NumPy structured array with UTF-8 encoded string columns.
+    :param rows: IndexRow iterator from iter_index_rows
+    :return: structured array with one field per IndexRow field
+    """
+    columns = list(zip(*rows)) or [[] for _ in IndexRow._fields]
+
+    column_arrays = []
+    for field, values in zip(IndexRow._fields, columns):
+        if field == "cik":
+            column_arrays.append(numpy.array(values, dtype=numpy.int64))
+        else:
+            column_arrays.append(numpy.array([value.encode("utf-8") for value in values], dtype=numpy.bytes_))
+
+    index_array = numpy.empty(len(column_arrays[0]), dtype=[(field, column_array.dtype) for field, column_array
+                                                            in zip(IndexRow._fields, column_arrays)])
+    for field, column_array in zip(IndexRow._fields, column_arrays):
+        index_array[field] = column_array
+
+    return index_array
+
+
+def iter_index_array_rows(index_array: numpy.ndarray):
+    """
+    Iterate over the rows of an index array from index_rows_to_array as IndexRow tuples.
+    :param index_array: structured array, which may be memory-mapped
+    :return: iterator of IndexRow
+    """
+    make_row = IndexRow._make
+    for form_type, company_name, cik, date_filed, file_name in index_array.tolist():
+        yield make_row((form_type.decode("utf-8"), company_name.decode("utf-8"), cik, date_filed.decode("utf-8"),
+                        file_name.decode("utf-8")))
+
+
+def dump_index_array(index_array: numpy.ndarray):
+    """
+    Serialize an index array to .npy bytes.
+    :param index_array: structured array from index_rows_to_array
+    :return: bytes
+    """
+    output_buffer = io.BytesIO()
+    numpy.save(output_buffer, index_array, allow_pickle=False)
+    return output_buffer.getvalue()
+
+
+def load_index_array(source: Union[bytes, str], mmap_mode: str = None):
+    """
+    Load an index array from .npy bytes or a local sidecar path.
+    :param source: .npy bytes or local path
+    :param mmap_mode: optional numpy.load mmap_mode for local paths, e.g. r
+    :return: structured array
+    """
+    if isinstance(source, str):
+        return numpy.load(source, mmap_mode=mmap_mode, allow_pickle=False)
+    return numpy.load(io.BytesIO(source), allow_pickle=False)
+
+
 def extract_filing_header_field(buffer: Union[bytes, str], field: str):
     """
     Extract a given field from an SEC-HEADER buffer.
@@ -218,181 +663,742 @@ def extract_filing_header_field(buffer: Union[bytes, str], field: str):
     return buffer[p0:p1].strip()
 
 
-def parse_filing(buffer: Union[bytes, str], extract: bool = False):
+def decode_buffer(buffer: Union[bytes, memoryview]):
     """
-    Parse a filing file by returning each document within
-    :param buffer:
-    :param extract: whether to extract raw text
-    :return:
+    Decode a filing buffer, trying UTF-8 before falling back to ISO 8859-1.
+    :param buffer: bytes-like buffer to decode
+    :return: decoded str, or None if the buffer could not be decoded
     """
-    # Start and end tags
-    start_tag = "<DOCUMENT>"
-    end_tag = "</DOCUMENT>"
-    filing_data = {"documents": [],
-                   "accession_number": None,
-                   "form_type": None,
-                   "document_count": None,
-                   "reporting_period": None,
-                   "date_filed": None,
-                   "company_name": None,
-                   "cik": None,
-                   "sic": None,
-                   "irs_number": None,
-                   "state_incorporation": None,
-                   "state_location": None}
-
-    # Typing
-    if isinstance(buffer, bytes):
+    try:
+        # Start with UTF-8
+        return str(buffer, "utf-8")
+    except UnicodeDecodeError as _:
         try:
-            # Start with UTF-8
-            buffer = str(buffer.decode("utf-8"))
+            # Fallback to ISO 8859-1
+            logger.warning("Falling back to ISO 8859-1 after failing to decode with UTF-8...")
+            return str(buffer, "iso-8859-1")
         except UnicodeDecodeError as _:
-            try:
-                # Fallback to ISO 8859-1
-                logger.warning("Falling back to ISO 8859-1 after failing to decode with UTF-8...")
-                buffer = str(buffer.decode("iso-8859-1"))
-            except UnicodeDecodeError as _:
-                # Give up if we can't
-                logger.error("Unable to decode with either UTF-8 or ISO 8859-1; giving up...")
-                return filing_data
-
-    # Check for SEC-HEADER block
-    if "<SEC-HEADER>" in buffer or "<IMS-HEADER>" in buffer:
-        # Get header subset
-        if "<SEC-HEADER>" in buffer:
-            header_p0 = buffer.find("<SEC-HEADER>")
-            header_p1 = buffer.find("</SEC-HEADER>")
-        elif "<IMS-HEADER>" in buffer:
-            header_p0 = buffer.find("<IMS-HEADER>")
-            header_p1 = buffer.find("</IMS-HEADER>")
+            # Give up if we can't
+            logger.error("Unable to decode with either UTF-8 or ISO 8859-1; giving up...")
+            return None
+
+
+class ParsedFiling:
+    """
+    Filing header fields and documents, as returned by parse_filing and parse_filing_header.  Fields
+    are attributes, and can also be read and set by key, e.g., filing_data["cik"].
+    """
+
+    __slots__ = ("documents", "header", "companies", "accession_number", "form_type", "document_count",
+                 "reporting_period", "date_filed", "company_name", "cik", "sic", "irs_number", "state_incorporation",
+                 "state_location")
+
+    def __init__(self):
+        """
+        Create a filing with no documents and all header fields unset.
+        """
+        self.documents = []
+        self.header = {}
+        self.companies = []
+        self.accession_number = None
+        self.form_type = None
+        self.document_count = None
+        self.reporting_period = None
+        self.date_filed = None
+        self.company_name = None
+        self.cik = None
+        self.sic = None
+        self.irs_number = None
+        self.state_incorporation = None
+        self.state_location = None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError as _:
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        setattr(self, key, value)
+
+    def to_model(self, company=None):
+        """
+        Create an unsaved Filing record from the header fields.
+        :param company: Company record for the filing
+        :return: Filing
+        """
+        # Import here so that parsing does not require Django
+        from openedgar.models import Filing
+
+        return Filing(form_type=self.form_type, accession_number=self.accession_number, date_filed=self.date_filed,
+                      document_count=self.document_count, company=company)
+
+    def to_document_models(self, filing):
+        """
+        Create unsaved FilingDocument records for all documents, e.g., for bulk_create.
+        :param filing: saved Filing record
+        :return: list of FilingDocument
+        """
+        return [document.to_model(filing) for document in self.documents]
+
+
+def get_empty_filing_data():
+    """
+    Get the filing data structure with all header fields unset.
+    :return: ParsedFiling
+    """
+    return ParsedFiling()
+
+
+def parse_filing_header_sections(header: str):
+    """
+    Parse the contents of an SEC-HEADER or IMS-HEADER block into a nested structure in a single pass.
+    Fields map to their first value, which is empty for blank fields; sections such as FILER or
+    BUSINESS ADDRESS are blank fields followed by more deeply indented lines, and map to a list of
+    dicts, as they may repeat.
+    :param header: header block contents
+    :return: dict of fields and sections
+    """
+    sections = {}
+    stack = [(-1, sections)]
+
+    # Skip the <SEC-HEADER> tag line, e.g. 0001193125-18-000566.hdr.sgml : 20180103
+    header_start = header.find("\n") + 1
+
+    lines = [(len(match.group(1).expandtabs(8)), match.group(2).strip(), match.group(3).strip())
+             for match in FILING_HEADER_LINE_RE.finditer(header, header_start)]
+
+    for i, (indent, key, value) in enumerate(lines):
+        # Close any sections at or below this depth
+        while indent <= stack[-1][0]:
+            stack.pop()
+        parent = stack[-1][1]
+
+        if len(value) > 0 or i + 1 == len(lines) or lines[i + 1][0] <= indent:
+            parent.setdefault(key, value)
         else:
-            header_p0 = -1
-            header_p1 = -1
+            section = {}
+            section_list = parent.setdefault(key, [])
+            if isinstance(section_list, list):
+                section_list.append(section)
+            stack.append((indent, section))
+
+    return sections
+
+
+def get_header_company_fields(section: dict):
+    """
+    Get company fields from a filer section of a parsed header, or from the top level of
+    headers without filer sections.
+    :param section: FILER, SUBJECT COMPANY, or other party section from parse_filing_header_sections
+    :return: dict of company fields
+    """
+    def get_section(parent: dict, key: str):
+        value = parent.get(key)
+        return value[0] if isinstance(value, list) and len(value) > 0 else None
+
+    def get_field(parent: dict, key: str):
+        value = parent.get(key)
+        return value if isinstance(value, str) else None
+
+    company_data = get_section(section, "COMPANY DATA") or get_section(section, "OWNER DATA") or section
+
+    # Prefer the business address state over the mailing address
+    address = get_section(section, "BUSINESS ADDRESS") or get_section(section, "MAIL ADDRESS") or {}
+
+    return {"company_name": get_field(company_data, "COMPANY CONFORMED NAME"),
+            "cik": get_field(company_data, "CENTRAL INDEX KEY"),
+            "sic": get_field(company_data, "STANDARD INDUSTRIAL CLASSIFICATION"),
+            "irs_number": get_field(company_data, "IRS NUMBER"),
+            "state_incorporation": get_field(company_data, "STATE OF INCORPORATION"),
+            "state_location": get_field(address, "STATE")}
+
+
+def parse_filing_header_fields(header: str, filing_data: ParsedFiling):
+    """
+    Populate filing data from the contents of an SEC-HEADER or IMS-HEADER block.  Every filer,
+    subject company, reporting owner, and issuer is listed under companies in header order, and
+    the first of these provides the top-level company fields.
+    :param header: header block contents
+    :param filing_data: filing data structure to update
+    :return: filing_data
+    """
+    sections = parse_filing_header_sections(header)
+    filing_data["header"] = sections
+
+    # Get name
+    filing_data["accession_number"] = sections.get("ACCESSION NUMBER")
+    filing_data["form_type"] = sections.get("CONFORMED SUBMISSION TYPE")
+
+    try:
+        document_count_value = sections.get("PUBLIC DOCUMENT COUNT")
+        filing_data["document_count"] = int(document_count_value)
+    except (TypeError, ValueError) as _:
+        logger.warning("Unable to set document_count")
+        filing_data["document_count"] = None
+
+    try:
+        reporting_period_value = sections.get("CONFORMED PERIOD OF REPORT")
+        filing_data["reporting_period"] = dateutil.parser.parse(
+            reporting_period_value).date() if reporting_period_value else None
+    except (TypeError, ValueError) as _:
+        logger.warning("Unable to set reporting_period")
+        filing_data["reporting_period"] = None
+
+    try:
+        date_filed_value = sections.get("FILED AS OF DATE")
+        filing_data["date_filed"] = dateutil.parser.parse(
+            date_filed_value).date() if date_filed_value else None
+    except (TypeError, ValueError) as _:
+        logger.warning("Unable to set date_filed")
+        filing_data["date_filed"] = None
+
+    # Get each party in header order
+    companies = []
+    for key, value in sections.items():
+        if key not in FILING_HEADER_PARTY_ROLES or not isinstance(value, list):
+            continue
+        for section in value:
+            company = get_header_company_fields(section)
+            if company["cik"] is not None:
+                company["role"] = key
+                companies.append(company)
+    filing_data["companies"] = companies
+
+    # The first party provides the top-level company fields
+    primary_company = companies[0] if len(companies) > 0 else get_header_company_fields(sections)
+    for field in ("company_name", "cik", "sic", "irs_number", "state_incorporation", "state_location"):
+        filing_data[field] = primary_company[field]
+
+    return filing_data
+
+
+def open_filing_buffer(source: Union[bytes, bytearray, memoryview, mmap.mmap, str, BinaryIO]):
+    """
+    Get a bytes-like buffer over a filing without reading it into memory where possible.
+    Paths and real files are memory-mapped; in-memory buffers are used as-is.
+    :param source: bytes-like buffer, local file path, or binary file object
+    :return: bytes, bytearray, or mmap buffer
+    """
+    if isinstance(source, (bytes, bytearray, mmap.mmap)):
+        return source
+
+    if isinstance(source, memoryview):
+        # Use the underlying object when the view covers all of it, as views do not support find()
+        if isinstance(source.obj, (bytes, bytearray, mmap.mmap)) and source.nbytes == len(source.obj):
+            return source.obj
+        return source.tobytes()
+
+    if isinstance(source, str):
+        with open(source, "rb") as source_file:
+            if os.fstat(source_file.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if isinstance(source, io.BytesIO):
+        return source.getvalue()
+
+    try:
+        if os.fstat(source.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, io.UnsupportedOperation) as _:
+        # Fall back to reading non-file streams, e.g., HTTP or S3 bodies
+        return source.read()
+
+
+def read_filing_header_buffer(client, file_path: str, read_size: int = FILING_HEADER_READ_SIZE):
+    """
+    Read the leading bytes of a stored filing through its header block with ranged reads, growing
+    the range until the header is closed, the first document starts, or the file ends.
+    :param client: S3Client or LocalClient
+    :param file_path: path of the filing in storage
+    :param read_size: size of the first read
+    :return: filing prefix bytes
+    """
+    end_pos = read_size
+    search_pos = 0
+    while True:
+        buffer = client.get_buffer_segment(file_path, 0, end_pos)
+        if len(buffer) < end_pos or end_pos >= FILING_HEADER_MAX_READ_SIZE:
+            return buffer
+        if FILING_HEADER_BOUNDARY_RE.search(buffer, search_pos) is not None:
+            return buffer
+
+        # Re-check the tail of the previous read in case a tag was split across it
+        search_pos = max(len(buffer) - len(b"</IMS-HEADER>"), 0)
+        end_pos *= 4
+
+
+def parse_filing_header(source: Union[bytes, bytearray, memoryview, mmap.mmap, str, BinaryIO], client=None):
+    """
+    Parse the SEC-HEADER or IMS-HEADER block of a filing, decoding only the header block itself.
+    If a storage client is passed, source is a path in its storage and only the bytes up to the
+    end of the header are retrieved.
+    :param source: bytes-like buffer, local file path, or binary file object; storage path if client is set
+    :param client: optional S3Client or LocalClient to read source from
+    :return: ParsedFiling with an empty documents list
+    """
+    if client is not None:
+        source = read_filing_header_buffer(client, source)
+    buffer = open_filing_buffer(source)
+    filing_data = get_empty_filing_data()
+
+    # Only search for the header before the first document
+    document_match = FILING_DOCUMENT_START_RE.search(buffer)
+    header_endpos = document_match.start() if document_match is not None else len(buffer)
+
+    header_match = FILING_HEADER_START_RE.search(buffer, 0, header_endpos)
+    if header_match is None:
+        return filing_data
+
+    header_end_tag = b"</" + header_match.group(1) + b">"
+    header_p1 = re.compile(re.escape(header_end_tag)).search(buffer, header_match.end(), header_endpos)
+    if header_p1 is None:
+        logger.error("Invalid HEADER block found in document")
+        return filing_data
+
+    header = decode_buffer(memoryview(buffer)[header_match.end():header_p1.start()])
+    if header is not None:
+        parse_filing_header_fields(header, filing_data)
+
+    return filing_data
+
+
+class ParsedDocument:
+    """
+    Document located within a filing buffer.  Metadata and content type are parsed from the head of
+    the document up front, while content is a zero-copy memoryview slice of the buffer, uudecoded if
+    needed, that is only resolved when first accessed.  Fields are attributes, and can also be read and
+    set by key, e.g., document["sha1"].
+    """
+
+    __slots__ = ("buffer", "start_pos", "end_pos", "type", "sequence", "file_name", "description", "content_type",
+                 "content_start", "content_end", "is_uuencoded", "max_in_memory_document_bytes", "content_file",
+                 "content_text", "text_extractor", "_content", "_sha1", "_secondary_digest")
+
+    def __init__(self, buffer, start_pos: int = 0, end_pos: int = None,
+                 max_in_memory_document_bytes: int = MAX_IN_MEMORY_DOCUMENT_BYTES):
+        """
+        Create a document view over a filing buffer.
+        :param buffer: filing buffer from open_filing_buffer
+        :param start_pos: byte offset of the <DOCUMENT> tag
+        :param end_pos: byte offset after the </DOCUMENT> tag
+        :param max_in_memory_document_bytes: size above which uuencoded content is decoded to a temporary file
+        """
+        if end_pos is None:
+            end_pos = len(buffer)
+
+        self.buffer = buffer
+        self.start_pos = start_pos
+        self.end_pos = end_pos
+
+        metadata = parse_document_metadata(buffer, start_pos, end_pos)
+        self.type = metadata.type
+        self.sequence = metadata.sequence
+        self.file_name = metadata.file_name
+        self.description = metadata.description
+        self.content_start = metadata.content_start
+        self.content_end = metadata.content_end
+        self.content_type, self.is_uuencoded = get_document_content_type(
+            memoryview(buffer)[metadata.content_start:min(metadata.content_start + 100, metadata.content_end)],
+            metadata.file_name)
+
+        self.max_in_memory_document_bytes = max_in_memory_document_bytes
+        self.content_file = None
+        self.content_text = None
+        self.text_extractor = None
+        self._content = None
+        self._sha1 = None
+        self._secondary_digest = None
+
+    def __repr__(self):
+        return "ParsedDocument(type={0!r}, sequence={1!r}, start_pos={2}, end_pos={3})" \
+            .format(self.type, self.sequence, self.start_pos, self.end_pos)
+
+    @property
+    def raw(self):
+        """
+        Get a zero-copy view of the raw <DOCUMENT> bytes.
+        :return: memoryview
+        """
+        return memoryview(self.buffer)[self.start_pos:self.end_pos]
+
+    @property
+    def content(self):
+        """
+        Get the document content, uudecoding it on first access if required.  Uuencoded content larger
+        than max_in_memory_document_bytes is decoded to a temporary file, set as content_file, and
+        returned as a read-only memory map of that file.  Decoded content is hashed as it is decoded.
+        :return: memoryview, bytearray, or mmap
+        """
+        if self._content is None:
+            content = memoryview(self.buffer)[self.content_start:self.content_end]
+            if self.is_uuencoded:
+                try:
+                    if len(content) > self.max_in_memory_document_bytes:
+                        self.content_file, content, digest = uudecode_to_file(content)
+                    else:
+                        digest = StreamingDigest()
+                        content = uudecode(content, digest=digest)
+                    self.set_digest(digest)
+                except ValueError as e:
+                    logger.error("Unable to uudecode document; keeping raw content: {0}".format(e))
+            self._content = content
+        return self._content
 
-        if header_p0 == -1 or header_p1 == -1:
-            logger.error("Invalid HEADER block found in document")
+    def set_digest(self, digest: StreamingDigest):
+        """
+        Set the content digests, unless already set.
+        :param digest: StreamingDigest over the full content
+        :return:
+        """
+        if self._sha1 is None:
+            self._sha1 = digest.sha1
+            self._secondary_digest = digest.secondary_digest
+
+    @property
+    def sha1(self):
+        """
+        Get the SHA-1 of the document content, which is its storage key.
+        :return: hex digest
+        """
+        if self._sha1 is None:
+            self.set_digest(get_buffer_digest(self.content))
+        return self._sha1
+
+    @property
+    def secondary_digest(self):
+        """
+        Get the secondary digest of the document content for dedupe lookups and sharding.
+        :return: name:hexdigest, or None if disabled
+        """
+        if self._sha1 is None:
+            self.set_digest(get_buffer_digest(self.content))
+        return self._secondary_digest
+
+    def release(self):
+        """
+        Release any materialized content and text so they can be garbage collected, closing any
+        temporary file.  Offsets, metadata, and digests are kept.
+        :return:
+        """
+        if self.content_file is not None:
+            self.content_file.close()
+            self.content_file = None
+        self._content = None
+        self.content_text = None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError as _:
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        setattr(self, key, value)
+
+    def to_model(self, filing):
+        """
+        Create an unsaved FilingDocument record, e.g., for bulk_create.
+        :param filing: saved Filing record
+        :return: FilingDocument
+        """
+        # Import here so that parsing does not require Django
+        from openedgar.models import FilingDocument
+
+        return FilingDocument(filing=filing, type=self.type, sequence=self.sequence, file_name=self.file_name,
+                              content_type=self.content_type, description=self.description, sha1=self.sha1,
+                              secondary_digest=self.secondary_digest, start_pos=self.start_pos, end_pos=self.end_pos,
+                              text_extractor=self.text_extractor)
+
+
+def iter_filing_documents(source: Union[bytes, bytearray, memoryview, mmap.mmap, str, BinaryIO],
+                          extract: bool = False, max_in_memory_document_bytes: int = MAX_IN_MEMORY_DOCUMENT_BYTES) \
+        -> Iterator[ParsedDocument]:
+    """
+    Iterate over the documents in a filing one at a time, so that at most one document's content
+    needs to be materialized at once.
+    :param source: bytes-like buffer, local file path, or binary file object; paths and files are memory-mapped
+    :param extract: whether to extract text
+    :param max_in_memory_document_bytes: size above which uuencoded content is decoded to a temporary file
+    :return: iterator of ParsedDocument
+    """
+    buffer = open_filing_buffer(source)
+    buffer_length = len(buffer)
+
+    start_match = FILING_DOCUMENT_START_RE.search(buffer)
+    while start_match is not None:
+        p0 = start_match.start()
+        end_match = FILING_DOCUMENT_END_RE.search(buffer, p0)
+        if end_match is None:
+            logger.warning("Unterminated <DOCUMENT> found at byte {0}".format(p0))
+            p1 = buffer_length
         else:
-            # Parse valid header
-            header = buffer[header_p0 + len("<SEC-HEADER>"):header_p1]
+            p1 = end_match.end()
 
-            # Get name
-            filing_data["accession_number"] = extract_filing_header_field(header, "ACCESSION NUMBER")
-            filing_data["form_type"] = extract_filing_header_field(header, "CONFORMED SUBMISSION TYPE")
+        document = ParsedDocument(buffer, p0, p1, max_in_memory_document_bytes=max_in_memory_document_bytes)
+        if extract:
+            document.content_text, document.text_extractor = try_extract_document_text(
+                document.content, document.sha1, content_type=document.content_type)
+        yield document
+        start_match = FILING_DOCUMENT_START_RE.search(buffer, p1)
 
-            try:
-                document_count_value = extract_filing_header_field(header, "PUBLIC DOCUMENT COUNT")
-                filing_data["document_count"] = int(document_count_value)
-            except ValueError as _:
-                logger.warning("Unable to set document_count")
-                filing_data["document_count"] = None
 
-            try:
-                reporting_period_value = extract_filing_header_field(header, "CONFORMED PERIOD OF REPORT")
-                filing_data["reporting_period"] = dateutil.parser.parse(
-                    reporting_period_value).date() if reporting_period_value is not None else None
-            except ValueError as _:
-                logger.warning("Unable to set reporting_period")
-                filing_data["reporting_period"] = None
+def get_extracted_text(future: concurrent.futures.Future, timeout: float = TIKA_TIMEOUT):
+    """
+    Wait for a text extraction submitted by iter_extracted_documents.
+    :param future: future from extract_document_text
+    :param timeout: seconds to wait before giving up on the document
+    :return: (text, extractor name) tuple, or (None, None) on timeout or error
+    """
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        logger.error("Timed out after {0}s extracting text".format(timeout))
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("Unable to extract text: {0}".format(e))
 
-            try:
-                date_filed_value = extract_filing_header_field(header, "FILED AS OF DATE")
-                filing_data["date_filed"] = dateutil.parser.parse(
-                    date_filed_value).date() if date_filed_value is not None else None
-            except ValueError as _:
-                logger.warning("Unable to set date_filed")
-                filing_data["date_filed"] = None
-
-            filing_data["company_name"] = extract_filing_header_field(header, "COMPANY CONFORMED NAME")
-            filing_data["cik"] = extract_filing_header_field(header, "CENTRAL INDEX KEY")
-            filing_data["sic"] = extract_filing_header_field(header, "STANDARD INDUSTRIAL CLASSIFICATION")
-            filing_data["irs_number"] = extract_filing_header_field(header, "IRS NUMBER")
-            filing_data["state_incorporation"] = extract_filing_header_field(header, "STATE OF INCORPORATION")
-            filing_data["state_location"] = extract_filing_header_field(header, "STATE")
-
-    # Parse and yield by doc
-    p0 = buffer.find(start_tag)
-    while p0 != -1:
-        p1 = buffer.find(end_tag, p0)
-
-        # Parse document
-        document_buffer = buffer[p0:(p1 + len(end_tag))]
-        document_data = parse_filing_document(document_buffer, extract=extract)
-        document_data["start_pos"] = p0
-        document_data["end_pos"] = (p1 + len(end_tag))
-        filing_data["documents"].append(document_data)
-        p0 = buffer.find(start_tag, p1)
+    return None, None
+
+
+def extract_document_text(buffer: Union[bytes, memoryview], sha1: str = None, text_cache=None,
+                          content_type: str = None):
+    """
+    Extract text from a document, checking a text cache by SHA-1 first, then using the in-process
+    extractor registered for its content type, and only calling Tika for other content types or if
+    the in-process extractor fails.
+    :param buffer: document content
+    :param sha1: document SHA-1; required to use text_cache
+    :param text_cache: optional TextCache
+    :param content_type: content type as detected by parse_filing_document
+    :return: (text, extractor name) tuple
+    """
+    use_cache = text_cache is not None and sha1 is not None
+    if use_cache:
+        cached_text = text_cache.get(sha1)
+        if cached_text is not None:
+            return cached_text
+
+    # Try the in-process extractor before Tika
+    text = None
+    text_extractor = openedgar.parsers.text.get_text_extractor(content_type)
+    if text_extractor is not None:
+        extractor_name, extractor = text_extractor
+        try:
+            text = extractor(buffer)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Unable to extract {0} text with {1} extractor; falling back to Tika: {2}"
+                           .format(content_type, extractor_name, e))
+
+    if text is None:
+        extractor_name = openedgar.parsers.text.TIKA_EXTRACTOR
+        text = extract_text(buffer, sha1)
+
+    if use_cache:
+        text_cache.put(sha1, text, extractor_name)
+    return text, extractor_name
+
+
+def try_extract_document_text(buffer: Union[bytes, memoryview], sha1: str = None, text_cache=None,
+                              content_type: str = None):
+    """
+    Extract text from a document as extract_document_text does, but log errors, e.g., quarantined
+    documents or unavailable Tika endpoints, rather than raising them, so that one document cannot fail
+    the rest of its filing.
+    :param buffer: document content
+    :param sha1: document SHA-1; required to use text_cache
+    :param text_cache: optional TextCache
+    :param content_type: content type as detected by parse_filing_document
+    :return: (text, extractor name) tuple, or (None, None) on error
+    """
+    try:
+        return extract_document_text(buffer, sha1, text_cache, content_type)
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("Unable to extract text: {0}".format(e))
+        return None, None
+
+
+def iter_extracted_documents(documents: Iterable, max_workers: int = TIKA_MAX_WORKERS, timeout: float = TIKA_TIMEOUT,
+                             text_cache=None):
+    """
+    Extract text for a stream of documents with a bounded pool of concurrent extractions,
+    setting content_text and text_extractor on each and yielding them in their original order.
+    At most 2 * max_workers documents are held while their extractions are in flight.
+    :param documents: ParsedDocument iterator from iter_filing_documents
+    :param max_workers: maximum number of concurrent extractions
+    :param timeout: seconds to wait for each document's text
+    :param text_cache: optional TextCache checked by document SHA-1 before extracting
+    :return: iterator of documents with content_text and text_extractor set
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    pending = collections.deque()
+
+    try:
+        for document in documents:
+            pending.append((document, executor.submit(extract_document_text, document["content"], document["sha1"],
+                                                      text_cache, document["content_type"])))
 
+            # Yield completed documents in order once the window is full
+            if len(pending) >= 2 * max_workers:
+                document, future = pending.popleft()
+                document["content_text"], document["text_extractor"] = get_extracted_text(future, timeout)
+                yield document
+
+        while len(pending) > 0:
+            document, future = pending.popleft()
+            document["content_text"], document["text_extractor"] = get_extracted_text(future, timeout)
+            yield document
+    finally:
+        # Do not block on requests that timed out
+        executor.shutdown(wait=False)
+
+
+def parse_filing(buffer: Union[bytes, str], extract: bool = False):
+    """
+    Parse a filing file by returning each document within.  Tags are scanned directly on bytes;
+    only the header and document metadata values are decoded.
+    :param buffer: filing buffer; str buffers are encoded to UTF-8 first
+    :param extract: whether to extract raw text
+    :return: ParsedFiling, whose ParsedDocument records only resolve content when accessed
+    """
+    # Typing
+    if isinstance(buffer, str):
+        buffer = buffer.encode("utf-8")
+
+    buffer = open_filing_buffer(buffer)
+    filing_data = parse_filing_header(buffer)
+
+    # Parse by doc, extracting text concurrently if requested
+    documents = iter_filing_documents(buffer)
+    if extract:
+        documents = iter_extracted_documents(documents)
+
+    filing_data.documents.extend(documents)
     return filing_data
 
 
-def parse_filing_document(document_buffer: Union[bytes, str], extract: bool = False):
+def decode_field_value(value: bytes):
     """
-    Parse a document buffer into metadata and contents.
-    :param document_buffer: raw document buffer
-    :param extract: whether to pass to Tika for text extraction
+    Decode a single metadata value, trying UTF-8 before ISO 8859-1.
+    :param value: raw value
     :return:
     """
-    # Parse segment
-    doc_type = re.findall("<TYPE>(.+)", document_buffer)
-    doc_sequence = re.findall("<SEQUENCE>(.+)", document_buffer)
-    doc_file_name = re.findall("<FILENAME>(.+)", document_buffer)
-    doc_description = re.findall("<DESCRIPTION>(.+)", document_buffer)
-
-    # Start and end tags
-    content_p0 = document_buffer.rfind("</", 0, document_buffer.rfind("</"))
-    content_p1 = document_buffer.find(">", content_p0)
-    doc_tag_type = document_buffer[content_p0 + len("</"):content_p1]
-    content_start_tag = "<{0}>".format(doc_tag_type)
-    content_end_tag = "</{0}>".format(doc_tag_type)
-
-    doc_content_p0 = document_buffer.find(content_start_tag) + len(content_start_tag)
-    doc_content_p1 = document_buffer.find(content_end_tag)
-    doc_content = document_buffer[doc_content_p0:doc_content_p1]
-
-    # Check content types
-    is_uuencoded = False
-    doc_text_head = doc_content[0:100]
-    doc_text_head_upper = doc_text_head.upper()
-
-    if "<PDF>" in doc_text_head_upper:
-        is_uuencoded = True
-        content_type = "application/pdf"
-    elif "<HTML" in doc_text_head_upper:
-        content_type = "text/html"
-    elif "<XML" in doc_text_head_upper:
-        content_type = "application/xml"
-    elif "<?XML" in doc_text_head_upper:
-        content_type = "application/xml"
-    elif doc_text_head.startswith("\nbegin "):
-        is_uuencoded = True
-        if len(doc_file_name) > 0:
-            content_type = mimetypes.guess_type(os.path.basename(doc_file_name[0]))
-            if content_type is None:
-                content_type = "application/octet-stream"
-            else:
-                content_type = content_type[0]
-        else:
-            content_type = "application/octet-stream"
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError as _:
+        return value.decode("iso-8859-1")
+
+
+def parse_document_metadata(buffer: Union[bytes, bytearray, mmap.mmap], start_pos: int = 0, end_pos: int = None):
+    """
+    Tokenize the metadata block of a <DOCUMENT> in a single pass, stopping at the first content tag,
+    e.g., <TEXT>.  The first occurrence of a repeated tag is used; missing or empty tags are None.
+    :param buffer: filing or document buffer
+    :param start_pos: offset of the document within buffer
+    :param end_pos: offset after the end of the document within buffer
+    :return: DocumentMetadata with decoded values and content byte offsets
+    """
+    if end_pos is None:
+        end_pos = len(buffer)
+
+    values = {}
+    content_tag = None
+    pos = start_pos
+
+    # Read tag lines until the first tag that is not document metadata
+    match = DOCUMENT_TAG_LINE_RE.match(buffer, pos, end_pos)
+    while match is not None:
+        tag = match.group(1).upper()
+        if tag in DOCUMENT_METADATA_TAGS:
+            key = DOCUMENT_METADATA_TAGS[tag]
+            if key not in values:
+                value = match.group(2).strip()
+                values[key] = decode_field_value(value) if len(value) > 0 else None
+        elif tag != b"DOCUMENT":
+            content_tag = match.group(1)
+            pos = match.start(2)
+            break
+
+        pos = match.end()
+        match = DOCUMENT_TAG_LINE_RE.match(buffer, pos, end_pos)
+
+    # Locate the end of the content block from the end of the document
+    if content_tag is None:
+        content_start = content_end = pos
     else:
-        content_type = "text/plain"
+        content_start = pos
+        content_end = buffer.rfind(b"</" + content_tag + b">", content_start, end_pos)
+        if content_end == -1:
+            content_end = buffer.rfind(b"</DOCUMENT>", content_start, end_pos)
+        if content_end == -1:
+            content_end = end_pos
+
+    return DocumentMetadata(values.get("type"), values.get("sequence"), values.get("file_name"),
+                            values.get("description"), content_start, content_end)
+
+
+def get_document_content_type(content_head: Union[bytes, memoryview], file_name: str = None):
+    """
+    Detect the content type of a document from the start of its content.
+    :param content_head: first 100 bytes of the document content
+    :param file_name: document file name, used to guess the type of uuencoded files
+    :return: (content type, whether content is uuencoded) tuple
+    """
+    content_head = bytes(content_head)
+    content_head_upper = content_head.upper()
 
-    # uudecode if required and calculate hash for sharding/dedupe
-    doc_content = doc_content.encode("utf-8")
-    if is_uuencoded:
-        doc_content = uudecode(doc_content)
-    doc_sha1 = hashlib.sha1(doc_content).hexdigest()
+    if b"<PDF>" in content_head_upper:
+        return "application/pdf", True
+    elif b"<HTML" in content_head_upper:
+        return "text/html", False
+    elif b"<XML" in content_head_upper:
+        return "application/xml", False
+    elif b"<?XML" in content_head_upper:
+        return "application/xml", False
+    elif content_head.startswith(b"\nbegin "):
+        if file_name is not None:
+            content_type = mimetypes.guess_type(os.path.basename(file_name))[0]
+            if content_type is not None:
+                return content_type, True
+        return "application/octet-stream", True
 
-    # extract text from tika if requested
+    return "text/plain", False
+
+
+def parse_filing_document(document_buffer: Union[bytes, bytearray, memoryview, str], extract: bool = False,
+                          start_pos: int = 0, end_pos: int = None,
+                          max_in_memory_document_bytes: int = MAX_IN_MEMORY_DOCUMENT_BYTES):
+    """
+    Parse a document buffer into metadata and contents.  Unless uudecoding is required, the
+    content is a zero-copy memoryview of the raw bytes, so it is byte-identical to the source.  Uuencoded
+    content larger than max_in_memory_document_bytes is decoded to a temporary file, set as
+    content_file, and content is a read-only memory map of that file.
+    :param document_buffer: raw document buffer, or a filing buffer when start_pos/end_pos are set
+    :param extract: whether to extract text
+    :param start_pos: offset of the document within document_buffer
+    :param end_pos: offset after the end of the document within document_buffer
+    :param max_in_memory_document_bytes: size above which uuencoded content is decoded to a temporary file
+    :return: ParsedDocument
+    """
+    # Typing
+    if isinstance(document_buffer, str):
+        document_buffer = document_buffer.encode("utf-8")
+    document_buffer = open_filing_buffer(document_buffer)
+
+    document = ParsedDocument(document_buffer, start_pos, end_pos,
+                              max_in_memory_document_bytes=max_in_memory_document_bytes)
+
+    # extract text if requested
     if extract:
-        doc_content_text = extract_text(doc_content)
-    else:
-        doc_content_text = None
-
-    return {"type": doc_type[0] if len(doc_type) > 0 else None,
-            "sequence": doc_sequence[0] if len(doc_sequence) > 0 else None,
-            "file_name": doc_file_name[0] if len(doc_file_name) > 0 else None,
-            "description": doc_description[0] if len(doc_description) > 0 else None,
-            "content_type": content_type,
-            "sha1": doc_sha1,
-            "content": doc_content,
-            "content_text": doc_content_text}
+        document.content_text, document.text_extractor = try_extract_document_text(
+            document.content, document.sha1, content_type=document.content_type)
+
+    return document
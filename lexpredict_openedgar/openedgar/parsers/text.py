@@ -0,0 +1,288 @@
+"""
+MIT License
+
+Copyright (c) 2018 ContraxSuite, LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Libraries
+import collections
+import logging
+import pathlib
+import re
+import threading
+from typing import Callable, Union
+
+# Packages
+import lxml.etree
+import lxml.html
+
+# Project imports
+from config.settings.base import S3_DOCUMENT_PATH, TEXT_CACHE_SIZE
+
+# Setup logger
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+console = logging.StreamHandler()
+console.setLevel(logging.INFO)
+formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
+console.setFormatter(formatter)
+logger.addHandler(console)
+
+# Process-wide caches by client type
+TEXT_CACHES = {}
+TEXT_CACHES_LOCK = threading.Lock()
+
+# Extractor name reported for text not produced by a registered extractor
+TIKA_EXTRACTOR = "tika"
+
+# In-process text extractors by content type; other content types fall back to Tika
+TEXT_EXTRACTORS = {}
+
+# HTML elements that start and end lines, break lines, separate table cells, or have no text content
+HTML_BLOCK_TAGS = {"address", "article", "blockquote", "caption", "center", "dd", "div", "dl", "dt", "h1", "h2", "h3",
+                   "h4", "h5", "h6", "li", "ol", "p", "pre", "section", "table", "title", "tr", "ul"}
+HTML_BREAK_TAGS = {"br", "hr"}
+HTML_CELL_TAGS = {"td", "th"}
+HTML_STRIP_TAGS = ["script", "style", lxml.etree.Comment, lxml.etree.ProcessingInstruction]
+
+# Whitespace normalization
+HTML_WHITESPACE_RE = re.compile(r"[ \t\r\n\f]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# EDGAR wraps XML documents in an <XML> tag ahead of the XML declaration
+XML_WRAPPER_RE = re.compile(rb"^\s*<XML>\s*|\s*</XML>\s*$", re.IGNORECASE)
+
+
+def get_text_path(sha1: str):
+    """
+    Get the storage path of the extracted text for a document.
+    :param sha1: document SHA-1
+    :return: path under S3_DOCUMENT_PATH
+    """
+    return pathlib.Path(S3_DOCUMENT_PATH, "text", sha1).as_posix()
+
+
+def get_text_extractor_path(sha1: str):
+    """
+    Get the storage path of the name of the extractor that produced the stored text for a document.
+    :param sha1: document SHA-1
+    :return: path under S3_DOCUMENT_PATH
+    """
+    return get_text_path(sha1) + ".extractor"
+
+
+class TextCache:
+    """
+    Extracted document text and the name of the extractor that produced it, keyed by document SHA-1.
+    Recently used text is kept in an in-process LRU bounded by total characters; misses fall back to
+    the text already stored by the client.  Safe to share between extraction threads.
+    """
+
+    def __init__(self, client=None, max_size: int = TEXT_CACHE_SIZE):
+        """
+        Create a text cache.
+        :param client: optional S3Client or LocalClient whose text namespace backs the cache
+        :param max_size: maximum total characters held in memory
+        """
+        self.client = client
+        self.max_size = max_size
+        self.size = 0
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get(self, sha1: str):
+        """
+        Get the text for a document from memory or storage.
+        :param sha1: document SHA-1
+        :return: (text, extractor name) tuple, or None if the document has not been extracted; the
+        extractor name is None for stored text saved without one
+        """
+        with self.lock:
+            entry = self.entries.get(sha1)
+            if entry is not None:
+                self.entries.move_to_end(sha1)
+                self.hit_count += 1
+                return entry
+
+        # Check stored text
+        text = None
+        extractor_name = None
+        if self.client is not None:
+            text_path = get_text_path(sha1)
+            try:
+                if self.client.path_exists(text_path):
+                    text = self.client.get_buffer(text_path).decode("utf-8")
+                    extractor_path = get_text_extractor_path(sha1)
+                    if self.client.path_exists(extractor_path):
+                        extractor_name = self.client.get_buffer(extractor_path).decode("utf-8")
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning("Unable to retrieve stored text {0}: {1}".format(text_path, e))
+
+        if text is None:
+            with self.lock:
+                self.miss_count += 1
+            return None
+
+        self.put(sha1, text, extractor_name)
+        with self.lock:
+            self.hit_count += 1
+        return text, extractor_name
+
+    def put(self, sha1: str, text: str, extractor_name: str = None):
+        """
+        Add the text for a document to the in-memory cache, evicting the least recently used text.
+        :param sha1: document SHA-1
+        :param text: extracted text
+        :param extractor_name: name of the extractor that produced the text
+        :return:
+        """
+        if text is None or len(text) > self.max_size:
+            return
+
+        with self.lock:
+            if sha1 in self.entries:
+                self.size -= len(self.entries.pop(sha1)[0])
+            self.entries[sha1] = (text, extractor_name)
+            self.size += len(text)
+
+            while self.size > self.max_size:
+                _, (evicted_text, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted_text)
+
+
+def get_text_cache(client=None):
+    """
+    Get the process-wide text cache for a storage client type.
+    :param client: optional S3Client or LocalClient
+    :return: TextCache
+    """
+    with TEXT_CACHES_LOCK:
+        text_cache = TEXT_CACHES.get(type(client))
+        if text_cache is None:
+            text_cache = TextCache(client)
+            TEXT_CACHES[type(client)] = text_cache
+        return text_cache
+
+
+def get_text_encoding(buffer: Union[bytes, memoryview]):
+    """
+    Get the encoding of a document buffer, trying UTF-8 before falling back to ISO 8859-1.
+    :param buffer: document content
+    :return: encoding name
+    """
+    try:
+        str(buffer, "utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as _:
+        return "iso-8859-1"
+
+
+def extract_plain_text(buffer: Union[bytes, memoryview]):
+    """
+    Extract text from a text/plain document, which only needs to be decoded.
+    :param buffer: document content
+    :return: text
+    """
+    return str(buffer, get_text_encoding(buffer))
+
+
+def extract_html_text(buffer: Union[bytes, memoryview]):
+    """
+    Extract text from an HTML document with lxml.  Scripts, styles, and comments are dropped, whitespace is
+    collapsed as a browser would, block elements end lines, and table cells are separated by tabs.
+    :param buffer: document content
+    :return: text
+    """
+    buffer = bytes(buffer)
+    if len(buffer.strip()) == 0:
+        return ""
+
+    parser = lxml.html.HTMLParser(encoding=get_text_encoding(buffer), remove_comments=True, remove_pis=True)
+    root = lxml.html.document_fromstring(buffer, parser=parser)
+    lxml.etree.strip_elements(root, *HTML_STRIP_TAGS, with_tail=False)
+
+    text_parts = []
+    for event, element in lxml.etree.iterwalk(root, events=("start", "end")):
+        if event == "start":
+            if element.tag in HTML_BLOCK_TAGS or element.tag in HTML_BREAK_TAGS:
+                text_parts.append("\n")
+            if element.text:
+                text_parts.append(HTML_WHITESPACE_RE.sub(" ", element.text))
+        else:
+            if element.tag in HTML_BLOCK_TAGS:
+                text_parts.append("\n")
+            elif element.tag in HTML_CELL_TAGS:
+                text_parts.append("\t")
+            if element.tail and element is not root:
+                text_parts.append(HTML_WHITESPACE_RE.sub(" ", element.tail))
+
+    # Strip each line and collapse runs of blank lines
+    text = "\n".join(line.strip(" \t") for line in "".join(text_parts).split("\n"))
+    return BLANK_LINES_RE.sub("\n\n", text).strip() + "\n"
+
+
+def extract_xml_text(buffer: Union[bytes, memoryview]):
+    """
+    Extract the text nodes of an XML document with lxml, one per line.
+    :param buffer: document content
+    :return: text
+    """
+    buffer = XML_WRAPPER_RE.sub(b"", bytes(buffer))
+    if len(buffer) == 0:
+        return ""
+
+    parser = lxml.etree.XMLParser(recover=True, huge_tree=True, remove_comments=True, remove_pis=True,
+                                  resolve_entities=False, no_network=True)
+    root = lxml.etree.fromstring(buffer, parser=parser)
+    if root is None:
+        raise ValueError("Unable to parse XML document")
+
+    return "".join(text.strip() + "\n" for text in root.itertext() if len(text.strip()) > 0)
+
+
+def register_text_extractor(content_type: str, name: str, extractor: Callable):
+    """
+    Register an in-process text extractor for a content type, replacing any existing extractor.
+    :param content_type: content type as detected by parse_filing_document
+    :param name: extractor name reported with the extracted text
+    :param extractor: function taking the document content and returning its text
+    :return:
+    """
+    TEXT_EXTRACTORS[content_type] = (name, extractor)
+
+
+def get_text_extractor(content_type: str):
+    """
+    Get the in-process text extractor for a content type.
+    :param content_type: content type as detected by parse_filing_document
+    :return: (name, extractor) tuple, or None if the content type should be sent to Tika
+    """
+    return TEXT_EXTRACTORS.get(content_type)
+
+
+# Register default extractors
+register_text_extractor("text/plain", "plain", extract_plain_text)
+register_text_extractor("text/html", "html", extract_html_text)
+register_text_extractor("application/xhtml+xml", "html", extract_html_text)
+register_text_extractor("application/xml", "xml", extract_xml_text)
+register_text_extractor("text/xml", "xml", extract_xml_text)
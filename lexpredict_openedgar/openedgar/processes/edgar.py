@@ -26,6 +26,7 @@ SOFTWARE.
 from typing import Iterable
 import logging
 import os
+
 # Project
 import openedgar.clients.edgar
 from openedgar.clients.s3 import S3Client
@@ -33,7 +34,7 @@ from openedgar.clients.local import LocalClient
 import openedgar.clients.local
 import openedgar.parsers.edgar
 from openedgar.models import FilingDocument, SearchQueryTerm, SearchQuery, FilingIndex
-from openedgar.tasks import process_filing_index, search_filing_document_sha1
+from openedgar.tasks import process_filing_index, search_filing_document_sha1, get_filing_index_array
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -45,17 +46,18 @@ console.setFormatter(formatter)
 logger.addHandler(console)
 
 
-def download_filing_index_data(year: int = None):
+def download_filing_index_data(year: int = None, index_source: str = "daily"):
     """
     Download all filing index data.
     :param year:
+    :param index_source: daily for daily-index form files, or full for quarterly full-index master files
     :return:
     """
     # Get filing index list
     if year is not None:
-        filing_index_list = openedgar.clients.edgar.list_index_by_year(year)
+        filing_index_list = openedgar.clients.edgar.list_index_by_year(year, index_source=index_source)
     else:
-        filing_index_list = openedgar.clients.edgar.list_index()
+        filing_index_list = openedgar.clients.edgar.list_index(index_source=index_source)
 
     path_list = []
     configured_client = os.environ["CLIENT_TYPE"]
@@ -88,14 +90,28 @@ def download_filing_index_data(year: int = None):
 
         # Check if exists; download and upload to S3 if missing
         if not download_client.path_exists(file_path):
-            # Download
-            buffer, _ = openedgar.clients.edgar.get_buffer(filing_index_path)
+            # Download, recording the validators for later conditional requests
+            buffer, _ = openedgar.clients.edgar.get_conditional_buffer(filing_index_path, store_body=False,
+                                                                      use_cache=False)
 
             # Upload
             download_client.put_buffer(file_path, buffer)
 
             logger.info("Retrieved {0} and uploaded to S3.".format(filing_index_path))
             path_list.append((file_path, True, is_processed))
+        elif not openedgar.clients.edgar.is_closed_index_path(filing_index_path):
+            # Revalidate indices for open periods, which EDGAR may still amend; indices stored before
+            # their validators were cached are treated as current, and the first check only seeds them
+            buffer, is_modified = openedgar.clients.edgar.get_conditional_buffer(filing_index_path, store_body=False)
+            if is_modified:
+                download_client.put_buffer(file_path, buffer)
+                download_client.delete_path(openedgar.parsers.edgar.get_index_sidecar_path(file_path))
+                FilingIndex.objects.filter(edgar_url=filing_index_path).update(is_processed=False)
+                logger.info("Index {0} was modified; retrieved and uploaded to S3.".format(filing_index_path))
+                path_list.append((file_path, True, False))
+            else:
+                logger.info("Index {0} already exists on S3 and is not modified.".format(filing_index_path))
+                path_list.append((file_path, False, is_processed))
         else:
             logger.info("Index {0} already exists on S3.".format(filing_index_path))
             path_list.append((file_path, False, is_processed))
@@ -106,7 +122,8 @@ def download_filing_index_data(year: int = None):
 
 def process_all_filing_index(year: int = None, form_type_list: Iterable[str] = None, new_only: bool = False,
                              store_raw: bool = True,
-                             store_text: bool = True):
+                             store_text: bool = True, index_source: str = "daily", cik_list: Iterable[int] = None,
+                             date_from=None, date_to=None):
     """
     Process all filing index data.
     :type year: optional year to process
@@ -114,10 +131,14 @@ def process_all_filing_index(year: int = None, form_type_list: Iterable[str] = N
     :param new_only:
     :param store_raw:
     :param store_text:
+    :param index_source: daily for daily-index form files, or full for quarterly full-index master files
+    :param cik_list: optional list of CIKs to process
+    :param date_from: optional first date filed to process
+    :param date_to: optional last date filed to process
     :return:
     """
     # Get the list of file paths
-    file_path_list = download_filing_index_data(year)
+    file_path_list = download_filing_index_data(year, index_source=index_source)
 
     client_type = os.environ["CLIENT_TYPE"] or "S3"
 
@@ -127,15 +148,50 @@ def process_all_filing_index(year: int = None, form_type_list: Iterable[str] = N
         if new_only and not is_processed:
             logger.info("Processing filing index for {0}...".format(s3_path))
             _ = process_filing_index.delay(client_type, s3_path, form_type_list=form_type_list, store_raw=store_raw,
-                                           store_text=store_text)
+                                           store_text=store_text, cik_list=cik_list, date_from=date_from,
+                                           date_to=date_to)
         elif not new_only:
             logger.info("Processing filing index for {0}...".format(s3_path))
             _ = process_filing_index.delay(client_type, s3_path, form_type_list=form_type_list, store_raw=store_raw,
-                                           store_text=store_text)
+                                           store_text=store_text, cik_list=cik_list, date_from=date_from,
+                                           date_to=date_to)
         else:
             logger.info("Skipping process_filing_index for {0}...".format(s3_path))
 
 
+def plan_all_filing_index(year: int = None, form_type_list: Iterable[str] = None, index_source: str = "daily",
+                          cik_list: Iterable[int] = None, date_from=None, date_to=None):
+    """
+    Count the filings that process_all_filing_index would visit in each index without processing
+    them, using the parsed index sidecars.
+    :param year: optional year to plan
+    :param form_type_list: optional list of form types to count
+    :param index_source: daily for daily-index form files, or full for quarterly full-index master files
+    :param cik_list: optional list of CIKs to count
+    :param date_from: optional first date filed to count
+    :param date_to: optional last date filed to count
+    :return: dict of index path to filing count
+    """
+    # Get the list of file paths
+    file_path_list = download_filing_index_data(year, index_source=index_source)
+
+    client_type = os.environ["CLIENT_TYPE"] or "S3"
+    if client_type == "S3":
+        client = S3Client()
+    else:
+        client = LocalClient()
+
+    # Count matching rows in each index
+    filing_count = {}
+    for file_path, _, _ in file_path_list:
+        index_array = get_filing_index_array(client, file_path)
+        row_filter = openedgar.parsers.edgar.IndexFilter(form_types=form_type_list, ciks=cik_list,
+                                                         date_from=date_from, date_to=date_to)
+        filing_count[file_path] = int(row_filter.apply(index_array).shape[0])
+
+    return filing_count
+
+
 def search_filing_documents(term_list: Iterable[str], form_type_list: Iterable[str] = None, sequence: int = None,
                             case_sensitive: bool = False,
                             token_search: bool = False, stem_search: bool = False):
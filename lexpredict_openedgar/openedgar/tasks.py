@@ -24,11 +24,9 @@ SOFTWARE.
 
 # Libraries
 import datetime
-import hashlib
 import logging
-import tempfile
-import os
 import pathlib
+import tempfile
 from typing import Iterable, Union
 
 # Packages
@@ -37,13 +35,15 @@ import django.db.utils
 from celery import shared_task
 
 # Project
-from config.settings.base import S3_DOCUMENT_PATH
+from config.settings.base import S3_DOCUMENT_PATH, HTTP_ASYNC_CONCURRENCY
 from openedgar.clients.s3 import S3Client
 from openedgar.clients.local import LocalClient
 import openedgar.clients.edgar
 import openedgar.parsers.edgar
-from openedgar.models import Filing, CompanyInfo, Company, FilingDocument, SearchQuery, SearchQueryTerm, \
-    SearchQueryResult, FilingIndex
+import openedgar.parsers.text
+from openedgar.parsers.digest import StreamingDigest, get_buffer_digest
+from openedgar.models import Filing, CompanyInfo, Company, FilingCompany, FilingDocument, SearchQuery, \
+    SearchQueryTerm, SearchQueryResult, FilingIndex
 
 # LexNLP imports
 import lexnlp.nlp.en.tokens
@@ -62,7 +62,7 @@ def create_filing_documents(client, documents, filing, store_raw: bool = True, s
     """
     Create filing document records given a list of documents
     and a filing record.
-    :param documents: list of documents from parse_filing
+    :param documents: list of documents from parse_filing or iterator from iter_filing_documents
     :param filing: Filing record
     :param store_raw: whether to store raw contents
     :param store_text: whether to store text contents
@@ -75,16 +75,7 @@ def create_filing_documents(client, documents, filing, store_raw: bool = True, s
     document_records = []
     for document in documents:
         # Create DB object
-        filing_doc = FilingDocument()
-        filing_doc.filing = filing
-        filing_doc.type = document["type"]
-        filing_doc.sequence = document["sequence"]
-        filing_doc.file_name = document["file_name"]
-        filing_doc.content_type = document["content_type"]
-        filing_doc.description = document["description"]
-        filing_doc.sha1 = document["sha1"]
-        filing_doc.start_pos = document["start_pos"]
-        filing_doc.end_pos = document["end_pos"]
+        filing_doc = document.to_model(filing)
         filing_doc.is_processed = True
         filing_doc.is_error = len(document["content"]) > 0
         document_records.append(filing_doc)
@@ -93,7 +84,12 @@ def create_filing_documents(client, documents, filing, store_raw: bool = True, s
         if store_raw and len(document["content"]) > 0:
             raw_path = pathlib.Path(S3_DOCUMENT_PATH, "raw", document["sha1"]).as_posix()
             if not client.path_exists(raw_path):
-                client.put_buffer(raw_path, document["content"])
+                if document["content_file"] is not None:
+                    # Stream content decoded to a temporary file
+                    document["content_file"].seek(0)
+                    client.put_fileobj(raw_path, document["content_file"])
+                else:
+                    client.put_buffer(raw_path, document["content"])
                 logger.info("Uploaded raw file for filing={0}, sequence={1}, sha1={2}"
                             .format(filing, document["sequence"], document["sha1"]))
             else:
@@ -102,15 +98,21 @@ def create_filing_documents(client, documents, filing, store_raw: bool = True, s
 
         # Upload text to S3 if requested
         if store_text and document["content_text"] is not None:
-            raw_path = pathlib.Path(S3_DOCUMENT_PATH, "text", document["sha1"]).as_posix()
+            raw_path = openedgar.parsers.text.get_text_path(document["sha1"])
             if not client.path_exists(raw_path):
                 client.put_buffer(raw_path, document["content_text"], write_bytes=False)
+                if document["text_extractor"] is not None:
+                    client.put_buffer(openedgar.parsers.text.get_text_extractor_path(document["sha1"]),
+                                      document["text_extractor"].encode("utf-8"))
                 logger.info("Uploaded text contents for filing={0}, sequence={1}, sha1={2}"
                             .format(filing, document["sequence"], document["sha1"]))
             else:
                 logger.info("Text contents for filing={0}, sequence={1}, sha1={2} already exists on S3"
                             .format(filing, document["sequence"], document["sha1"]))
 
+        # Release content and temporary files before the next document is parsed
+        document.release()
+
     # Create in bulk
     FilingDocument.objects.bulk_create(document_records)
     return len(document_records)
@@ -119,17 +121,17 @@ def create_filing_documents(client, documents, filing, store_raw: bool = True, s
 def create_filing_error(row, filing_path: str):
     """
     Create a Filing error record from an index row.
-    :param row:
+    :param row: IndexRow from iter_index_rows
     :param filing_path:
     :return:
     """
     # Get vars
-    cik = row["CIK"]
-    company_name = row["Company Name"]
-    form_type = row["Form Type"]
+    cik = row.cik
+    company_name = row.company_name
+    form_type = row.form_type
 
     try:
-        date_filed = dateutil.parser.parse(str(row["Date Filed"])).date()
+        date_filed = dateutil.parser.parse(str(row.date_filed)).date()
     except ValueError:
         date_filed = None
     except IndexError:
@@ -185,9 +187,177 @@ def create_filing_error(row, filing_path: str):
     return True
 
 
+def get_filing_company(filing_data: dict):
+    """
+    Get or create the Company for parsed filing header data, creating a CompanyInfo record for
+    the filing date if one does not already exist.
+    :param filing_data: filing data from parse_filing_header
+    :return: Company record
+    """
+    try:
+        # Get company
+        company = Company.objects.get(cik=filing_data["cik"])
+        logger.info("Found existing company record.")
+
+        # Check if record exists for date
+        try:
+            _ = CompanyInfo.objects.get(company=company, date=filing_data["date_filed"])
+
+            logger.info("Found existing company info record.")
+        except CompanyInfo.DoesNotExist:
+            # Create company info record
+            company_info = CompanyInfo()
+            company_info.company = company
+            company_info.name = filing_data["company_name"]
+            company_info.sic = filing_data["sic"]
+            company_info.state_incorporation = filing_data["state_incorporation"]
+            company_info.state_location = filing_data["state_location"]
+            company_info.date = filing_data["date_filed"].date() if isinstance(filing_data["date_filed"],
+                                                                               datetime.datetime) else \
+                filing_data["date_filed"]
+            company_info.save()
+
+            logger.info("Created new company info record.")
+
+    except Company.DoesNotExist:
+        # Create company
+        company = Company()
+        company.cik = filing_data["cik"]
+
+        try:
+            # Catch race with another task/thread
+            company.save()
+
+            try:
+                _ = CompanyInfo.objects.get(company=company, date=filing_data["date_filed"])
+            except CompanyInfo.DoesNotExist:
+                # Create company info record
+                company_info = CompanyInfo()
+                company_info.company = company
+                company_info.name = filing_data["company_name"]
+                company_info.sic = filing_data["sic"]
+                company_info.state_incorporation = filing_data["state_incorporation"]
+                company_info.state_location = filing_data["state_location"]
+                company_info.date = filing_data["date_filed"]
+                company_info.save()
+        except django.db.utils.IntegrityError:
+            company = Company.objects.get(cik=filing_data["cik"])
+
+        logger.info("Created company and company info records.")
+
+    return company
+
+
+def create_filing_companies(filing, filing_data: dict):
+    """
+    Create FilingCompany records for each company named in a filing header, so that
+    multi-company filings are indexed under every CIK, replacing any existing records.
+    :param filing: Filing record
+    :param filing_data: filing data from parse_filing_header
+    :return: number of records created
+    """
+    filing_company_records = []
+    seen_companies = set()
+    for header_company in filing_data["companies"]:
+        # Skip repeated companies in the same role
+        company_key = (int(header_company["cik"]), header_company["role"])
+        if company_key in seen_companies:
+            continue
+        seen_companies.add(company_key)
+
+        # Primary company is already on the filing
+        if filing.company is not None and int(filing.company.cik) == company_key[0]:
+            company = filing.company
+        else:
+            company_data = dict(header_company, date_filed=filing_data["date_filed"])
+            company = get_filing_company(company_data)
+
+        filing_company = FilingCompany()
+        filing_company.filing = filing
+        filing_company.company = company
+        filing_company.role = header_company["role"]
+        filing_company.name = header_company["company_name"]
+        filing_company_records.append(filing_company)
+
+    FilingCompany.objects.filter(filing=filing).delete()
+    FilingCompany.objects.bulk_create(filing_company_records)
+    return len(filing_company_records)
+
+
+def get_filing_index_array(client, file_path: str, filing_index_buffer: Union[str, bytes] = None):
+    """
+    Get the parsed rows of a filing index as a structured array.  Rows are loaded from the
+    versioned sidecar stored next to the raw index when present, memory-mapped for local storage;
+    otherwise the raw index is parsed and the sidecar is stored for later runs.
+    :param client: S3Client or LocalClient
+    :param file_path: S3 or local path of the raw index
+    :param filing_index_buffer: optional raw index buffer; if not present, retrieved from file_path
+    :return: structured array from index_rows_to_array
+    """
+    sidecar_path = openedgar.parsers.edgar.get_index_sidecar_path(file_path)
+
+    # Load existing sidecar
+    if filing_index_buffer is None and client.path_exists(sidecar_path):
+        logger.info("Loading parsed filing index from {0}...".format(sidecar_path))
+        try:
+            if isinstance(client, LocalClient):
+                return openedgar.parsers.edgar.load_index_array(sidecar_path, mmap_mode="r")
+            return openedgar.parsers.edgar.load_index_array(client.get_buffer(sidecar_path))
+        except ValueError as e:
+            logger.warning("Unable to load filing index sidecar {0}, reparsing: {1}".format(sidecar_path, e))
+
+    # Retrieve buffer if not passed
+    if filing_index_buffer is None:
+        logger.info("Retrieving filing index buffer for: {}...".format(file_path))
+        filing_index_buffer = client.get_buffer(file_path)
+
+    # Parse and store sidecar
+    index_array = openedgar.parsers.edgar.index_rows_to_array(
+        openedgar.parsers.edgar.iter_index_rows(filing_index_buffer))
+    if index_array.shape[0] > 0:
+        client.put_buffer(sidecar_path, openedgar.parsers.edgar.dump_index_array(index_array))
+    return index_array
+
+
+def open_stored_filing(client, file_path: str, digest: StreamingDigest = None):
+    """
+    Open a stored filing for parsing without reading it into memory.  Local files are memory-mapped
+    and hashed in place; S3 objects are inflated and hashed into an unnamed temporary file, which
+    is then memory-mapped.
+    :param client: S3Client or LocalClient holding the filing
+    :param file_path: path of the filing in storage
+    :param digest: optional StreamingDigest to update with the filing contents
+    :return: buffer from open_filing_buffer
+    """
+    if isinstance(client, LocalClient):
+        filing_buffer = openedgar.parsers.edgar.open_filing_buffer(file_path)
+        if digest is not None:
+            digest.update_buffer(filing_buffer)
+        return filing_buffer
+
+    # The memory map keeps the temporary file's contents after it is closed
+    with tempfile.TemporaryFile() as spool_file:
+        client.get_fileobj(file_path, spool_file, digest=digest)
+        spool_file.flush()
+        return openedgar.parsers.edgar.open_filing_buffer(spool_file)
+
+
+def get_filing_path(file_name: str):
+    """
+    Get the storage path of a filing from the file name in an index row.
+    :param file_name: file name from the index, e.g., edgar/data/1/0000000001-18-000001.txt
+    :return: storage path under edgar/
+    """
+    if file_name.lower().startswith("data/"):
+        return "edgar/{0}".format(file_name)
+    return file_name
+
+
 @shared_task
 def process_filing_index(client_type: str, file_path: str, filing_index_buffer: Union[str, bytes] = None,
-                         form_type_list: Iterable[str] = None, store_raw: bool = False, store_text: bool = False):
+                         form_type_list: Iterable[str] = None, store_raw: bool = False, store_text: bool = False,
+                         cik_list: Iterable[int] = None, date_from=None, date_to=None,
+                         download_concurrency: int = HTTP_ASYNC_CONCURRENCY):
     """
     Process a filing index from an S3 path or buffer.
     :param file_path: S3 or local path to process; if filing_index_buffer is none, retrieved from here
@@ -195,6 +365,11 @@ def process_filing_index(client_type: str, file_path: str, filing_index_buffer:
     :param form_type_list: optional list of form type to process
     :param store_raw:
     :param store_text:
+    :param cik_list: optional list of CIKs to process
+    :param date_from: optional first date filed to process
+    :param date_to: optional last date filed to process
+    :param download_concurrency: number of missing filings to download at once before processing; 0 to
+    download each filing as it is processed
     :return:
     """
     # Log entry
@@ -205,34 +380,33 @@ def process_filing_index(client_type: str, file_path: str, filing_index_buffer:
     else:
         client = LocalClient()
 
-    # Retrieve buffer if not passed
-    if filing_index_buffer is None:
-        logger.info("Retrieving filing index buffer for: {}...".format(file_path))
-        filing_index_buffer = client.get_buffer(file_path)
-
-    # Write to disk to handle headaches
-    temp_file = tempfile.NamedTemporaryFile(delete=False)
-    temp_file.write(filing_index_buffer)
-    temp_file.close()
-
-    # Get main filing data structure
-    filing_index_data = openedgar.parsers.edgar.parse_index_file(temp_file.name)
-    logger.info("Parsed {0} records from index".format(filing_index_data.shape[0]))
+    # Get parsed rows from the sidecar, or parse the index buffer
+    index_array = get_filing_index_array(client, file_path, filing_index_buffer)
+    record_count = index_array.shape[0]
+    logger.info("Loaded {0} records from index".format(record_count))
+
+    # Select matching rows with a mask, so that skipped rows are never converted to IndexRow tuples
+    row_filter = openedgar.parsers.edgar.IndexFilter(form_types=form_type_list, ciks=cik_list, date_from=date_from,
+                                                     date_to=date_to)
+    index_array = row_filter.apply(index_array)
+    if row_filter.skipped_count > 0:
+        logger.info("Skipping {0} records not matching {1}".format(row_filter.skipped_count, row_filter))
+
+    # Download missing filings concurrently, storing each as it completes; failures are retried below
+    if download_concurrency > 0:
+        filing_paths = [get_filing_path(row.file_name)
+                        for row in openedgar.parsers.edgar.iter_index_array_rows(index_array)]
+        existing_paths = set(Filing.objects.filter(s3_path__in=filing_paths).values_list("s3_path", flat=True))
+        missing_paths = [path for path in filing_paths
+                         if path not in existing_paths and not client.path_exists(path)]
+        if len(missing_paths) > 0:
+            logger.info("Downloading {0} missing filings from EDGAR...".format(len(missing_paths)))
+            openedgar.clients.edgar.fetch_many(missing_paths, client, concurrency=download_concurrency)
 
     # Iterate through rows
     bad_record_count = 0
-    for _, row in filing_index_data.iterrows():
-        # Check for form type whitelist
-        if form_type_list is not None:
-            if row["Form Type"] not in form_type_list:
-                logger.info("Skipping filing {0} with form type {1}...".format(row["File Name"], row["Form Type"]))
-                continue
-
-        # Cleanup path
-        if row["File Name"].lower().startswith("data/"):
-            filing_path = "edgar/{0}".format(row["File Name"])
-        elif row["File Name"].lower().startswith("edgar/"):
-            filing_path = row["File Name"]
+    for row in openedgar.parsers.edgar.iter_index_array_rows(index_array):
+        filing_path = get_filing_path(row.file_name)
 
         # Check if filing record exists
         try:
@@ -248,28 +422,30 @@ def process_filing_index(client_type: str, file_path: str, filing_index_buffer:
             logger.info("No Filing record found for {0}, creating...".format(filing_path))
             logger.info("Raw exception: {0}".format(f))
 
-            # Check if exists; download and upload to S3 if missing
+            # Check if exists; download and upload to S3 if missing, hashing the filing as it is read
+            filing_digest = StreamingDigest()
             if not client.path_exists(filing_path):
-                # Download
+                # Stream from EDGAR into storage
                 try:
-                    filing_buffer, _ = openedgar.clients.edgar.get_buffer("/Archives/{0}".format(filing_path))
+                    openedgar.clients.edgar.download_to_storage("/Archives/{0}".format(filing_path), client,
+                                                                filing_path, digest=filing_digest)
                 except RuntimeError as g:
                     logger.error("Unable to access resource {0} from EDGAR: {1}".format(filing_path, g))
                     bad_record_count += 1
                     create_filing_error(row, filing_path)
                     continue
 
-                # Upload
-                client.put_buffer(filing_path, filing_buffer)
-
+                # Local files are memory-mapped by path; others are retrieved again by process_filing
+                filing_buffer = filing_path if isinstance(client, LocalClient) else None
                 logger.info("Downloaded from EDGAR and uploaded to {}...".format(client_type))
             else:
-                # Download
+                # Memory-map the stored filing rather than reading it into memory
                 logger.info("File already stored on {}, retrieving and processing...".format(client_type))
-                filing_buffer = client.get_buffer(filing_path)
+                filing_buffer = open_stored_filing(client, filing_path, digest=filing_digest)
 
             # Parse
-            filing_result = process_filing(client, filing_path, filing_buffer, store_raw=store_raw, store_text=store_text)
+            filing_result = process_filing(client, filing_path, filing_buffer, store_raw=store_raw,
+                                           store_text=store_text, filing_digest=filing_digest)
             if filing_result is None:
                 logger.error("Unable to process filing.")
                 bad_record_count += 1
@@ -279,7 +455,7 @@ def process_filing_index(client_type: str, file_path: str, filing_index_buffer:
     edgar_url = "/Archives/{0}".format(file_path).replace("//", "/")
     try:
         filing_index = FilingIndex.objects.get(edgar_url=edgar_url)
-        filing_index.total_record_count = filing_index_data.shape[0]
+        filing_index.total_record_count = record_count
         filing_index.bad_record_count = bad_record_count
         filing_index.is_processed = True
         filing_index.is_error = False
@@ -290,26 +466,25 @@ def process_filing_index(client_type: str, file_path: str, filing_index_buffer:
         filing_index.edgar_url = edgar_url
         filing_index.date_published = None
         filing_index.date_downloaded = datetime.date.today()
-        filing_index.total_record_count = filing_index_data.shape[0]
+        filing_index.total_record_count = record_count
         filing_index.bad_record_count = bad_record_count
         filing_index.is_processed = True
         filing_index.is_error = False
         filing_index.save()
         logger.info("Created new filing index record.")
-
-    # Delete file if we make it this far
-    os.remove(temp_file.name)
+    logger.info("Processed {0} records from index".format(record_count))
 
 
 @shared_task
 def process_filing(client, file_path: str, filing_buffer: Union[str, bytes] = None, store_raw: bool = False,
-                   store_text: bool = False):
+                   store_text: bool = False, filing_digest: StreamingDigest = None):
     """
     Process a filing from a path or filing buffer.
     :param file_path: path to process; if filing_buffer is none, retrieved from here
-    :param filing_buffer: buffer; if not present, s3_path must be set
+    :param filing_buffer: buffer, local file path, or binary file object; if not present, s3_path must be set
     :param store_raw:
     :param store_text:
+    :param filing_digest: StreamingDigest already updated while filing_buffer was read; calculated if not set
     :return:
     """
     # Log entry
@@ -330,86 +505,46 @@ def process_filing(client, file_path: str, filing_buffer: Union[str, bytes] = No
 
     # Get buffer
     if filing_buffer is None:
-        logger.info("Retrieving filing buffer from S3...")
-        filing_buffer = client.get_buffer(file_path)
+        logger.info("Retrieving filing buffer from storage...")
+        if filing_digest is None:
+            filing_digest = StreamingDigest()
+            filing_buffer = open_stored_filing(client, file_path, digest=filing_digest)
+        else:
+            filing_buffer = open_stored_filing(client, file_path)
+    filing_buffer = openedgar.parsers.edgar.open_filing_buffer(filing_buffer)
+    if filing_digest is None:
+        filing_digest = get_buffer_digest(filing_buffer)
 
-    # Get main filing data structure
-    filing_data = openedgar.parsers.edgar.parse_filing(filing_buffer, extract=store_text)
+    # Get filing header; documents are parsed one at a time below
+    filing_data = openedgar.parsers.edgar.parse_filing_header(filing_buffer)
     if filing_data["cik"] is None:
         logger.error("Unable to parse CIK from filing {0}; assuming broken and halting...".format(file_path))
         return None
 
-    try:
-        # Get company
-        company = Company.objects.get(cik=filing_data["cik"])
-        logger.info("Found existing company record.")
-
-        # Check if record exists for date
-        try:
-            _ = CompanyInfo.objects.get(company=company, date=filing_data["date_filed"])
-
-            logger.info("Found existing company info record.")
-        except CompanyInfo.DoesNotExist:
-            # Create company info record
-            company_info = CompanyInfo()
-            company_info.company = company
-            company_info.name = filing_data["company_name"]
-            company_info.sic = filing_data["sic"]
-            company_info.state_incorporation = filing_data["state_incorporation"]
-            company_info.state_location = filing_data["state_location"]
-            company_info.date = filing_data["date_filed"].date() if isinstance(filing_data["date_filed"],
-                                                                               datetime.datetime) else \
-                filing_data["date_filed"]
-            company_info.save()
-
-            logger.info("Created new company info record.")
-
-    except Company.DoesNotExist:
-        # Create company
-        company = Company()
-        company.cik = filing_data["cik"]
-
-        try:
-            # Catch race with another task/thread
-            company.save()
-
-            try:
-                _ = CompanyInfo.objects.get(company=company, date=filing_data["date_filed"])
-            except CompanyInfo.DoesNotExist:
-                # Create company info record
-                company_info = CompanyInfo()
-                company_info.company = company
-                company_info.name = filing_data["company_name"]
-                company_info.sic = filing_data["sic"]
-                company_info.state_incorporation = filing_data["state_incorporation"]
-                company_info.state_location = filing_data["state_location"]
-                company_info.date = filing_data["date_filed"]
-                company_info.save()
-        except django.db.utils.IntegrityError:
-            company = Company.objects.get(cik=filing_data["cik"])
-
-        logger.info("Created company and company info records.")
+    # Get or create company and company info records
+    company = get_filing_company(filing_data)
 
     # Now create the filing record
     try:
-        filing = Filing()
-        filing.form_type = filing_data["form_type"]
-        filing.accession_number = filing_data["accession_number"]
-        filing.date_filed = filing_data["date_filed"]
-        filing.document_count = filing_data["document_count"]
-        filing.company = company
-        filing.sha1 = hashlib.sha1(filing_buffer).hexdigest()
+        filing = filing_data.to_model(company)
+        filing.sha1 = filing_digest.sha1
+        filing.secondary_digest = filing_digest.secondary_digest
         filing.s3_path = file_path
         filing.is_processed = False
         filing.is_error = True
         filing.save()
+        create_filing_companies(filing, filing_data)
     except Exception as e:  # pylint: disable=broad-except
         logger.error("Unable to create filing record: {0}".format(e))
         return None
 
     # Create filing document records
     try:
-        create_filing_documents(client, filing_data["documents"], filing, store_raw=store_raw, store_text=store_text)
+        documents = openedgar.parsers.edgar.iter_filing_documents(filing_buffer)
+        if store_text:
+            text_cache = openedgar.parsers.text.get_text_cache(client)
+            documents = openedgar.parsers.edgar.iter_extracted_documents(documents, text_cache=text_cache)
+        create_filing_documents(client, documents, filing, store_raw=store_raw, store_text=store_text)
         filing.is_processed = True
         filing.is_error = False
         filing.save()
@@ -419,6 +554,47 @@ def process_filing(client, file_path: str, filing_buffer: Union[str, bytes] = No
         return None
 
 
+@shared_task
+def process_filing_header(client, file_path: str):
+    """
+    Update filing and company metadata for a stored filing from its header alone, retrieving only
+    the bytes up to the end of the SEC-HEADER/IMS-HEADER block.
+    :param client: S3Client or LocalClient holding the filing
+    :param file_path: path to process
+    :return: updated Filing record, or None if no single record exists
+    """
+    # Log entry
+    logger.info("Processing filing header {0}...".format(file_path))
+
+    # Get filing header
+    filing_data = openedgar.parsers.edgar.parse_filing_header(file_path, client=client)
+    if filing_data["cik"] is None:
+        logger.error("Unable to parse CIK from filing {0}; assuming broken and halting...".format(file_path))
+        return None
+
+    # Get or create company and company info records
+    company = get_filing_company(filing_data)
+
+    # Update existing filing record; new filings are left to process_filing
+    try:
+        filing = Filing.objects.get(s3_path=file_path)
+    except Filing.DoesNotExist:
+        logger.info("No existing filing record for {0}; updated company info only.".format(file_path))
+        return None
+    except Filing.MultipleObjectsReturned:
+        logger.error("Multiple existing record found.")
+        return None
+
+    filing.form_type = filing_data["form_type"]
+    filing.accession_number = filing_data["accession_number"]
+    filing.date_filed = filing_data["date_filed"]
+    filing.document_count = filing_data["document_count"]
+    filing.company = company
+    filing.save()
+    create_filing_companies(filing, filing_data)
+    return filing
+
+
 @shared_task
 def extract_filing(client, file_path: str, filing_buffer: Union[str, bytes] = None):
     """
@@ -456,7 +632,7 @@ def search_filing_document_sha1(client, sha1: str, term_list: Iterable[str], sea
     """
     # Get buffer
     logger.info("Retrieving buffer from S3...")
-    text_s3_path = pathlib.Path(S3_DOCUMENT_PATH, "text", sha1).as_posix()
+    text_s3_path = openedgar.parsers.text.get_text_path(sha1)
     document_buffer = client.get_buffer(text_s3_path).decode("utf-8")
 
     # Check if case
@@ -525,7 +701,7 @@ def extract_filing_document_data_sha1(client, sha1: str):
     """
     # Get buffer
     logger.info("Retrieving buffer from S3...")
-    text_s3_path = pathlib.Path(S3_DOCUMENT_PATH, "text", sha1).as_posix()
+    text_s3_path = openedgar.parsers.text.get_text_path(sha1)
     document_buffer = client.get_buffer(text_s3_path).decode("utf-8")
 
     # TODO: Build your own database here.
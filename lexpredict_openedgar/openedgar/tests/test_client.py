@@ -24,11 +24,30 @@ SOFTWARE.
 
 # Client imports
 import datetime
+import hashlib
+import http.server
+import io
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+import zlib
 
-from nose.tools import assert_list_equal, assert_equal, assert_is_instance
+from nose.tools import assert_list_equal, assert_equal, assert_is_instance, assert_raises
 
 import openedgar.clients.edgar
+import openedgar.clients.local
+import openedgar.clients.ratelimit
 import openedgar.clients.s3
+import openedgar.clients.tika
+import openedgar.parsers.digest
+import openedgar.parsers.edgar
+from openedgar.clients.http_cache import HTTPCache
+from openedgar.clients.local import LocalClient
 
 
 def test_client_list_dir_index():
@@ -79,3 +98,498 @@ def test_client_index_year():
     result = len(index_list)
     expected = 119
     assert_equal(result, expected)
+
+
+def test_client_full_index_year():
+    """
+    Test listing quarterly full-index files for a given year without directory listings.
+    """
+    index_list = openedgar.clients.edgar.list_index_by_year(1994, index_source="full")
+    expected = ["/Archives/edgar/full-index/1994/QTR{0}/master.gz".format(q) for q in range(1, 5)]
+    assert_list_equal(index_list, expected)
+
+
+def test_local_client_get_filing_document():
+    """
+    Test retrieving a single document from a stored filing by byte offsets.
+    """
+    buffer = "<SEC-DOCUMENT>\n<DOCUMENT>\n<TYPE>EX-1\n<SEQUENCE>1\n<TEXT>\nD\u00e9j\u00e0 vu\n</TEXT>\n</DOCUMENT>\n" \
+             "<DOCUMENT>\n<TYPE>EX-2\n<SEQUENCE>2\n<TEXT>\nsecond\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n" \
+        .encode("iso-8859-1")
+
+    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+        temp_file.write(buffer)
+
+    try:
+        filing_data = openedgar.parsers.edgar.parse_filing(buffer)
+        document = filing_data["documents"][1]
+        filing_document = types.SimpleNamespace(filing=types.SimpleNamespace(s3_path=temp_file.name),
+                                                start_pos=document["start_pos"], end_pos=document["end_pos"])
+        segment = LocalClient().get_filing_document(filing_document)
+        assert_equal(segment, buffer[document["start_pos"]:document["end_pos"]])
+        assert_equal(openedgar.parsers.edgar.parse_filing_document(segment)["sha1"], document["sha1"])
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_local_client_parse_filing_header():
+    """
+    Test parsing a stored filing header without reading its documents.
+    """
+    buffer = "<SEC-DOCUMENT>\n<SEC-HEADER>\nACCESSION NUMBER:\t\t0000000000-18-000001\n" \
+             "CONFORMED SUBMISSION TYPE:\t10-K\nFILED AS OF DATE:\t\t20180102\n" \
+             "COMPANY CONFORMED NAME:\t\t\tEXAMPLE CO\nCENTRAL INDEX KEY:\t\t\t0000000001\n</SEC-HEADER>\n" \
+             "<DOCUMENT>\n<TYPE>10-K\n<SEQUENCE>1\n<TEXT>\n{0}\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n" \
+        .format("x" * 1024 * 1024).encode("utf-8")
+
+    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+        temp_file.write(buffer)
+
+    try:
+        client = LocalClient()
+        header_buffer = openedgar.parsers.edgar.read_filing_header_buffer(client, temp_file.name)
+        assert_equal(len(header_buffer), openedgar.parsers.edgar.FILING_HEADER_READ_SIZE)
+
+        filing_data = openedgar.parsers.edgar.parse_filing_header(temp_file.name, client=client)
+        assert_equal(filing_data["accession_number"], "0000000000-18-000001")
+        assert_equal(filing_data["form_type"], "10-K")
+        assert_equal(filing_data["cik"], "0000000001")
+        assert_equal(filing_data["date_filed"], datetime.date(2018, 1, 2))
+    finally:
+        os.remove(temp_file.name)
+
+
+class FakeTikaHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Tika server stand-in that upper-cases documents, stalling on documents that start with b"slow".
+    """
+
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"This is Tika Server")
+
+    def do_PUT(self):
+        buffer = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(buffer)
+        if buffer.startswith(b"slow"):
+            time.sleep(1.0)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=UTF-8")
+        self.end_headers()
+        self.wfile.write(buffer.decode("utf-8").upper().encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeTikaServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def test_tika_pool():
+    """
+    Test Tika pool balancing, circuit breaking, and quarantine against a local fake server.
+    :return:
+    """
+    server = FakeTikaServer(("127.0.0.1", 0), FakeTikaHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Reserve a port with nothing listening
+    closed_socket = socket.socket()
+    closed_socket.bind(("127.0.0.1", 0))
+    closed_port = closed_socket.getsockname()[1]
+    closed_socket.close()
+
+    try:
+        pool = openedgar.clients.tika.TikaPool(["http://127.0.0.1:{0}".format(closed_port),
+                                                "http://127.0.0.1:{0}/tika".format(server.server_address[1])],
+                                               timeout=0.25, health_interval=3600, failure_threshold=2)
+        down_endpoint, up_endpoint = pool.endpoints
+
+        # Requests fail over from the closed port until its breaker opens
+        for _ in range(4):
+            assert_equal(pool.extract_text(memoryview("café".encode("utf-8"))), "CAFÉ")
+        assert_equal(down_endpoint.is_open(), True)
+        assert_equal(up_endpoint.is_open(), False)
+        assert_equal(len(server.requests), 4)
+
+        # Least-outstanding balancing prefers the idle endpoint
+        down_endpoint.record_success()
+        up_endpoint.outstanding = 1
+        assert_equal(pool.acquire(), down_endpoint)
+        up_endpoint.outstanding = 0
+
+        # Documents that time out are quarantined instead of retried
+        down_endpoint.record_failure(time.monotonic())
+        down_endpoint.record_failure(time.monotonic())
+        assert_raises(RuntimeError, pool.extract_text, b"slow")
+        assert_raises(RuntimeError, pool.extract_text, b"slow")
+        assert_equal(server.requests.count(b"slow"), 1)
+
+        # Health probes close breakers for endpoints that respond
+        up_endpoint.record_failure(time.monotonic())
+        up_endpoint.record_failure(time.monotonic())
+        assert_equal(pool.acquire(), None)
+        pool.check_health()
+        assert_equal(up_endpoint.is_open(), False)
+        assert_equal(down_endpoint.is_open(), True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_tika_pool_large_document():
+    """
+    Test that large documents are sent with a Content-Length and time out like small ones.
+    :return:
+    """
+    server = FakeTikaServer(("127.0.0.1", 0), FakeTikaHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        pool = openedgar.clients.tika.TikaPool(["http://127.0.0.1:{0}".format(server.server_address[1])],
+                                               timeout=0.25, health_interval=3600)
+        large_buffer = b"a" * (2 * openedgar.clients.tika.TIKA_STREAM_CHUNK_SIZE + 1)
+        assert_equal(pool.extract_text(large_buffer), "A" * len(large_buffer))
+        assert_equal(server.requests, [large_buffer])
+
+        # Stalled responses to large documents are quarantined
+        start_time = time.monotonic()
+        assert_raises(RuntimeError, pool.extract_text, b"slow" + large_buffer)
+        assert_equal(time.monotonic() - start_time < 1.0, True)
+        assert_equal(pool.is_quarantined(hashlib.sha1(b"slow" + large_buffer).hexdigest()), True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_tika_pool_fork():
+    """
+    Test that forked worker processes get their own Tika pool rather than sharing connections.
+    :return:
+    """
+    pool = openedgar.clients.tika.get_tika_pool()
+    assert_equal(openedgar.clients.tika.get_tika_pool() is pool, True)
+
+    # Simulate a fork by changing the recorded owner process
+    openedgar.clients.tika.TIKA_POOL_PID = -1
+    assert_equal(openedgar.clients.tika.get_tika_pool() is pool, False)
+    assert_equal(openedgar.clients.tika.TIKA_POOL_PID, os.getpid())
+
+
+# Incompressible content for large filings
+LARGE_FILING_CONTENT = os.urandom(16 * 1024 * 1024)
+
+
+class FakeEdgarHandler(http.server.BaseHTTPRequestHandler):
+    """
+    EDGAR stand-in that supports keep-alive and records the client port and User-Agent of each request.
+    Paths containing "missing" get an error page, and paths containing "large" get a large filing.
+    Every response carries an ETag, and requests with a matching If-None-Match get a 304.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.client_address[1], self.headers["User-Agent"]))
+        etag = '"{0}"'.format(len(self.path))
+        if self.headers["If-None-Match"] == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        elif "missing" in self.path:
+            self.send_response(404)
+            self.send_header("Content-Type", "text/html")
+            buffer = b"<html><title>SEC.gov | File Not Found Error Alert (404)</title></html>"
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            buffer = b"<SEC-DOCUMENT>" + self.path.encode("utf-8") + b"</SEC-DOCUMENT>"
+        self.send_header("ETag", etag)
+
+        # Large content is written separately so that the server does not copy it
+        large_content = LARGE_FILING_CONTENT if "large" in self.path else b""
+        self.send_header("Content-Length", str(len(buffer) + len(large_content)))
+        self.end_headers()
+        self.wfile.write(buffer)
+        self.wfile.write(large_content)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_edgar_session():
+    """
+    Test that EDGAR requests share one keep-alive session with a declared User-Agent.
+    :return:
+    """
+    server = FakeTikaServer(("127.0.0.1", 0), FakeEdgarHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        session = openedgar.clients.edgar.get_session()
+        assert_equal(openedgar.clients.edgar.get_session() is session, True)
+
+        base_path = "http://127.0.0.1:{0}/".format(server.server_address[1])
+        for path in ["/Archives/edgar/data/1/a.txt", "/Archives/edgar/data/1/b.txt"]:
+            buffer, _ = openedgar.clients.edgar.get_buffer(path, base_path=base_path)
+            assert_equal(buffer, "<SEC-DOCUMENT>{0}</SEC-DOCUMENT>".format(path).encode("utf-8"))
+
+        assert_equal(len(set(port for port, _ in server.requests)), 1)
+        assert_equal([user_agent for _, user_agent in server.requests],
+                     [openedgar.clients.edgar.HTTP_USER_AGENT] * 2)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_conditional_get_cache():
+    """
+    Test that unchanged paths are served from the HTTP cache and closed index periods are not requested.
+    :return:
+    """
+    assert_equal(openedgar.clients.edgar.is_closed_index_path("/Archives/edgar/daily-index/2017/QTR4/",
+                                                              today=datetime.date(2018, 1, 5)), False)
+    assert_equal(openedgar.clients.edgar.is_closed_index_path("/Archives/edgar/daily-index/2017/QTR4/",
+                                                              today=datetime.date(2018, 1, 31)), True)
+    assert_equal(openedgar.clients.edgar.is_closed_index_path("/Archives/edgar/full-index/2017/",
+                                                              today=datetime.date(2017, 12, 31)), False)
+    assert_equal(openedgar.clients.edgar.is_closed_index_path("/Archives/edgar/data/1/a.txt"), False)
+
+    server = FakeTikaServer(("127.0.0.1", 0), FakeEdgarHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_path:
+            cache = HTTPCache(temp_path)
+            base_path = "http://127.0.0.1:{0}/".format(server.server_address[1])
+            path = "/Archives/edgar/daily-index/2017/QTR1/"
+            buffer = "<SEC-DOCUMENT>{0}</SEC-DOCUMENT>".format(path).encode("utf-8")
+
+            # First request seeds the cache without reporting a change; the second is revalidated and
+            # served from the cache
+            for _ in range(2):
+                assert_equal(openedgar.clients.edgar.get_conditional_buffer(path, base_path=base_path, cache=cache),
+                             (buffer, False))
+            assert_equal(len(server.requests), 2)
+
+            # Changed validators are reported as modified
+            remote_uri = base_path + path.lstrip("/")
+            cache.put(remote_uri, etag='"stale"', body=b"stale")
+            assert_equal(openedgar.clients.edgar.get_conditional_buffer(path, base_path=base_path, cache=cache),
+                         (buffer, True))
+            assert_equal(len(server.requests), 3)
+
+            # Immutable paths are not requested once cached
+            for _ in range(2):
+                assert_equal(openedgar.clients.edgar.get_conditional_buffer(path, base_path=base_path, cache=cache,
+                                                                            immutable=True), (buffer, False))
+            assert_equal(len(server.requests), 4)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_local_rate_limiter():
+    """
+    Test that limiters sharing a lock file space requests evenly between them.
+    :return:
+    """
+    with tempfile.TemporaryDirectory() as temp_path:
+        lock_path = os.path.join(temp_path, "rate.lock")
+        limiters = [openedgar.clients.ratelimit.LocalRateLimiter(rate=50, burst=2, lock_path=lock_path)
+                    for _ in range(2)]
+
+        # Reservations alternate between limiters but share one schedule
+        waits = [limiters[i % 2].reserve() for i in range(6)]
+        assert_equal(waits[:2], [0.0, 0.0])
+        for previous_wait, wait in zip(waits[1:], waits[2:]):
+            assert_equal(abs(wait - previous_wait - 0.02) < 0.005, True)
+
+        # Blocking acquisition waits out the reserved schedule
+        start_time = time.monotonic()
+        threads = [threading.Thread(target=limiters[i % 2].acquire) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert_equal(time.monotonic() - start_time >= 0.25, True)
+
+
+def test_fetch_many():
+    """
+    Test concurrent downloads stored with the storage client as they complete.
+    :return:
+    """
+    server = FakeTikaServer(("127.0.0.1", 0), FakeEdgarHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_path:
+            paths = [os.path.join(temp_path, "edgar/data/{0}/0000000000-18-000001.txt".format(i)) for i in range(20)]
+            base_path = "http://127.0.0.1:{0}/".format(server.server_address[1])
+            results = openedgar.clients.edgar.fetch_many(paths, LocalClient(), concurrency=4, base_path=base_path)
+
+            assert_equal(sorted(results), sorted(paths))
+            for path in paths:
+                buffer = "<SEC-DOCUMENT>{0}</SEC-DOCUMENT>".format(path).encode("utf-8")
+                assert_equal(results[path], len(buffer))
+                assert_equal(LocalClient().get_buffer(path), buffer)
+            assert_equal(len(set(port for port, _ in server.requests)) <= 4, True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_many_missing():
+    """
+    Test that missing paths fail at once rather than waiting out the retry backoff.
+    :return:
+    """
+    server = FakeTikaServer(("127.0.0.1", 0), FakeEdgarHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        base_path = "http://127.0.0.1:{0}/".format(server.server_address[1])
+        paths = ["edgar/data/1/missing.txt", "edgar/data/1/0000000000-18-000001.txt"]
+        start_time = time.monotonic()
+        results = openedgar.clients.edgar.fetch_many(paths, concurrency=2, base_path=base_path)
+
+        assert_equal(results[paths[0]], None)
+        assert_equal(results[paths[1]], "<SEC-DOCUMENT>/{0}</SEC-DOCUMENT>".format(paths[1]).encode("utf-8"))
+        assert_equal(len(server.requests), 2)
+        assert_equal(time.monotonic() - start_time < openedgar.clients.edgar.HTTP_FAIL_SLEEP[0], True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class FakeS3Client:
+    """
+    boto3 S3 client stand-in that records single and multipart uploads, accepting the same body
+    types as boto3.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.part_count = 0
+
+    def put_object(self, Bucket, Key, Body):
+        if not isinstance(Body, (bytes, bytearray)) and not hasattr(Body, "read"):
+            raise TypeError("Invalid type for parameter Body, value: {0}, type: {1}".format(Body, type(Body)))
+        self.objects[Key] = bytes(Body)
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def create_multipart_upload(self, Bucket, Key):
+        self.uploads["1"] = []
+        return {"UploadId": "1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[UploadId].append(Body)
+        self.part_count += 1
+        return {"ETag": str(PartNumber)}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        assert_equal([part["PartNumber"] for part in MultipartUpload["Parts"]],
+                     list(range(1, len(self.uploads[UploadId]) + 1)))
+        self.objects[Key] = b"".join(self.uploads.pop(UploadId))
+
+
+def test_s3_put_buffer():
+    """
+    Test uploading memoryview buffers to S3 with and without compression.
+    :return:
+    """
+    s3_client = FakeS3Client()
+    s3 = openedgar.clients.s3.S3Client()
+    buffer = memoryview(b"<SEC-DOCUMENT>test</SEC-DOCUMENT>")
+
+    assert_equal(s3.put_buffer("a.txt", buffer, client=s3_client, deflate=False), True)
+    assert_equal(s3_client.objects["a.txt"], buffer.tobytes())
+    assert_equal(s3.put_buffer("b.txt", buffer, client=s3_client), True)
+    assert_equal(zlib.decompress(s3_client.objects["b.txt"]), buffer.tobytes())
+
+
+def test_s3_get_fileobj():
+    """
+    Test streaming a compressed S3 object into a file with bounded memory while hashing it.
+    :return:
+    """
+    s3_client = FakeS3Client()
+    s3 = openedgar.clients.s3.S3Client()
+    s3_client.objects["large.txt"] = zlib.compress(LARGE_FILING_CONTENT, 1)
+
+    digest = openedgar.parsers.digest.StreamingDigest()
+    with tempfile.TemporaryFile() as out_file:
+        tracemalloc.start()
+        try:
+            size = s3.get_fileobj("large.txt", out_file, client=s3_client, digest=digest)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        out_file.seek(0)
+        assert_equal(out_file.read() == LARGE_FILING_CONTENT, True)
+
+    assert_equal(peak_memory < len(LARGE_FILING_CONTENT) // 2, True)
+    assert_equal((size, digest.size), (len(LARGE_FILING_CONTENT), len(LARGE_FILING_CONTENT)))
+    assert_equal(digest.sha1, hashlib.sha1(LARGE_FILING_CONTENT).hexdigest())
+
+
+def test_download_to_storage():
+    """
+    Test streaming downloads into local and S3 storage with bounded memory, and rejecting error pages.
+    :return:
+    """
+    server = FakeTikaServer(("127.0.0.1", 0), FakeEdgarHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_path = "http://127.0.0.1:{0}/".format(server.server_address[1])
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_path:
+            path = os.path.join(temp_path, "edgar/data/1/large.txt")
+            expected = "<SEC-DOCUMENT>{0}</SEC-DOCUMENT>".format(path).encode("utf-8") + LARGE_FILING_CONTENT
+
+            tracemalloc.start()
+            try:
+                digest, _ = openedgar.clients.edgar.download_to_storage(path, LocalClient(), path,
+                                                                         base_path=base_path)
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert_equal(peak_memory < len(LARGE_FILING_CONTENT) // 2, True)
+            assert_equal(digest.sha1, hashlib.sha1(expected).hexdigest())
+            assert_equal(LocalClient().get_buffer(path), expected)
+            assert_equal(os.stat(path).st_mode & 0o777, 0o666 & ~openedgar.clients.local.get_umask())
+
+            # Error pages are rejected before anything is stored
+            missing_path = os.path.join(temp_path, "edgar/data/1/missing.txt")
+            assert_raises(RuntimeError, openedgar.clients.edgar.download_to_storage, missing_path, LocalClient(),
+                          missing_path, base_path=base_path)
+            assert_equal(os.path.exists(missing_path), False)
+
+        # Compressed S3 uploads switch to multipart once a part fills
+        s3_client = FakeS3Client()
+        s3 = openedgar.clients.s3.S3Client.__new__(openedgar.clients.s3.S3Client)
+        s3.get_client = lambda: s3_client
+        digest, _ = openedgar.clients.edgar.download_to_storage("/edgar/data/1/large.txt", s3, "edgar/data/1/large.txt",
+                                                                base_path=base_path)
+        expected = b"<SEC-DOCUMENT>/edgar/data/1/large.txt</SEC-DOCUMENT>" + LARGE_FILING_CONTENT
+        assert_equal(s3_client.part_count > 1, True)
+        assert_equal(digest.sha1, hashlib.sha1(expected).hexdigest())
+        assert_equal(zlib.decompress(s3_client.objects["edgar/data/1/large.txt"]), expected)
+    finally:
+        server.shutdown()
+        server.server_close()
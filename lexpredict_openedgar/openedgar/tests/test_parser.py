@@ -22,11 +22,24 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import binascii
+import datetime
+import gzip
+import hashlib
+import io
+import os
 import tempfile
-from nose.tools import assert_equal
+import time
+import types
+import zlib
+from nose.tools import assert_equal, assert_raises
 
+import openedgar.benchmarks.corpus
 import openedgar.clients.edgar
+import openedgar.parsers.digest
 import openedgar.parsers.edgar
+import openedgar.parsers.text
+from openedgar.clients.local import LocalClient
 
 
 def test_filing_parser():
@@ -139,3 +152,415 @@ def test_index_parser():
     result = index_data.shape[0]
     expected = 226
     assert_equal(result, expected)
+
+
+def test_index_row_parser():
+    """
+    Test streaming index rows from compressed buffers, including names that overrun their column.
+    :return:
+    """
+    header = "Description:           Daily Index of EDGAR Dissemination Feed by Company Name\n\n" \
+             "Company Name                                                  Form Type   CIK         Date Filed  " \
+             "File Name\n" + "-" * 141 + "\n"
+    rows = [("EXAMPLE CO", "SC 13G/A", 1, "20180102", "edgar/data/1/0000000001-18-000001.txt"),
+            ("EXAMPLE CO WITH A VERY LONG NAME THAT RUNS PAST THE END OF ITS COLUMN", "10-K", 22, "20180102",
+             "edgar/data/22/0000000022-18-000001.txt")]
+    buffer = header + "".join("{0:<62}  {1:<10}{2:<12}{3:<12}{4}\n".format(*row) for row in rows)
+
+    for index_buffer in [buffer.encode("utf-8"), gzip.compress(gzip.compress(buffer.encode("utf-8"))),
+                         zlib.compress(buffer.encode("utf-8"))]:
+        index_rows = list(openedgar.parsers.edgar.iter_index_rows(index_buffer))
+        assert_equal([(r.company_name, r.form_type, r.cik, r.date_filed, r.file_name) for r in index_rows], rows)
+
+
+def test_master_index_row_parser():
+    """
+    Test streaming rows from a pipe-delimited master.idx index.
+    :return:
+    """
+    buffer = "Description:           Master Index of EDGAR Dissemination Feed\n" \
+             "Cloud HTTP:            https://www.sec.gov/Archives/\n\n" \
+             "CIK|Company Name|Form Type|Date Filed|Filename\n" + "-" * 80 + "\n" \
+             "1|EXAMPLE CO|SC 13G/A|2018-01-02|edgar/data/1/0000000001-18-000001.txt\n" \
+             "22|EXAMPLE|PIPE CO|10-K|2018-01-02|edgar/data/22/0000000022-18-000001.txt\n"
+
+    index_rows = list(openedgar.parsers.edgar.iter_index_rows(gzip.compress(buffer.encode("utf-8"))))
+    assert_equal([(r.cik, r.company_name, r.form_type) for r in index_rows],
+                 [(1, "EXAMPLE CO", "SC 13G/A"), (22, "EXAMPLE|PIPE CO", "10-K")])
+    assert_equal(index_rows[1].file_name, "edgar/data/22/0000000022-18-000001.txt")
+
+
+def test_index_sidecar():
+    """
+    Test round-tripping parsed index rows through a memory-mapped sidecar.
+    :return:
+    """
+    rows = [openedgar.parsers.edgar.IndexRow("10-K", "D\u00e9j\u00e0 Vu Inc", 1, "2018-01-02",
+                                             "edgar/data/1/0000000001-18-000001.txt"),
+            openedgar.parsers.edgar.IndexRow("SC 13G/A", "EXAMPLE CO", 22, "2018-01-03",
+                                             "edgar/data/22/0000000022-18-000001.txt")]
+    index_array = openedgar.parsers.edgar.index_rows_to_array(rows)
+
+    with tempfile.NamedTemporaryFile(suffix=openedgar.parsers.edgar.INDEX_SIDECAR_SUFFIX, delete=False) as temp_file:
+        temp_file.write(openedgar.parsers.edgar.dump_index_array(index_array))
+
+    try:
+        sidecar_array = openedgar.parsers.edgar.load_index_array(temp_file.name, mmap_mode="r")
+        assert_equal(list(openedgar.parsers.edgar.iter_index_array_rows(sidecar_array)), rows)
+        assert_equal(int((sidecar_array["cik"] > 1).sum()), 1)
+    finally:
+        os.remove(temp_file.name)
+
+
+def test_index_filter():
+    """
+    Test dropping index rows by form type, CIK, and date during the scan and with an array mask.
+    :return:
+    """
+    buffer = "CIK|Company Name|Form Type|Date Filed|Filename\n" + "-" * 80 + "\n" \
+             "1|EXAMPLE CO|SC 13G/A|2018-01-02|edgar/data/1/0000000001-18-000001.txt\n" \
+             "22|EXAMPLE CO|10-K|2018-01-02|edgar/data/22/0000000022-18-000001.txt\n" \
+             "22|EXAMPLE CO|8-K|2018-01-05|edgar/data/22/0000000022-18-000002.txt\n" \
+             "333|EXAMPLE CO|10-K|2018-01-09|edgar/data/333/0000000333-18-000001.txt\n"
+    all_rows = list(openedgar.parsers.edgar.iter_index_rows(buffer.encode("utf-8")))
+
+    for filter_args, expected_files in [({"form_types": ["10-K", "8-K"]}, [1, 2, 3]),
+                                        ({"ciks": [22]}, [1, 2]),
+                                        ({"date_from": datetime.date(2018, 1, 3), "date_to": "20180105"}, [2]),
+                                        ({"form_types": ["10-K"], "ciks": [333, 1]}, [3]),
+                                        ({}, [0, 1, 2, 3])]:
+        row_filter = openedgar.parsers.edgar.IndexFilter(**filter_args)
+        index_rows = list(openedgar.parsers.edgar.iter_index_rows(buffer.encode("utf-8"), row_filter))
+        assert_equal(index_rows, [all_rows[i] for i in expected_files])
+        assert_equal(row_filter.skipped_count, len(all_rows) - len(expected_files))
+
+        array_filter = openedgar.parsers.edgar.IndexFilter(**filter_args)
+        index_array = array_filter.apply(openedgar.parsers.edgar.index_rows_to_array(all_rows))
+        assert_equal(list(openedgar.parsers.edgar.iter_index_array_rows(index_array)), index_rows)
+        assert_equal(array_filter.skipped_count, row_filter.skipped_count)
+
+
+def test_document_metadata_parser():
+    """
+    Test single-pass document metadata parsing with repeated and missing tags.
+    :return:
+    """
+    buffer = b"<DOCUMENT>\r\n<TYPE>EX-99 \r\n<SEQUENCE>2\r\n<TYPE>EX-100\r\n<DESCRIPTION>\r\n<TEXT>\r\n" \
+             b"<TYPE>not metadata\r\n</TEXT>\r\n</DOCUMENT>\r\n"
+
+    metadata = openedgar.parsers.edgar.parse_document_metadata(buffer)
+    assert_equal(metadata.type, "EX-99")
+    assert_equal(metadata.sequence, "2")
+    assert_equal(metadata.file_name, None)
+    assert_equal(metadata.description, None)
+    assert_equal(buffer[metadata.content_start:metadata.content_end], b"\r\n<TYPE>not metadata\r\n")
+
+
+def test_uudecode():
+    """
+    Test uudecoding full and partial lines, with LF and CRLF line endings.
+    :return:
+    """
+    data = os.urandom(45 * 100 + 17)
+    encoded = b"begin 644 test.pdf\n" + b"".join(binascii.b2a_uu(data[i:i + 45]) for i in range(0, len(data), 45)) \
+              + b"`\nend\n"
+
+    assert_equal(bytes(openedgar.parsers.edgar.uudecode(encoded)), data)
+    assert_equal(bytes(openedgar.parsers.edgar.uudecode(encoded.replace(b"\n", b"\r\n"))), data)
+    assert_raises(ValueError, openedgar.parsers.edgar.uudecode, encoded[len(b"begin 644 test.pdf\n"):])
+
+
+def test_uudecode_spill():
+    """
+    Test that uuencoded documents over the in-memory limit are decoded to a temporary file.
+    :return:
+    """
+    data = os.urandom(45 * 100 + 17)
+    encoded = b"begin 644 test.zip\n" + b"".join(binascii.b2a_uu(data[i:i + 45]) for i in range(0, len(data), 45)) \
+              + b"`\nend\n"
+    buffer = b"<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>1\n<FILENAME>test.zip\n<TEXT>\n" + encoded + b"</TEXT>\n</DOCUMENT>\n"
+
+    in_memory = openedgar.parsers.edgar.parse_filing_document(buffer)
+    assert_equal(in_memory["content_file"], None)
+
+    document = next(openedgar.parsers.edgar.iter_filing_documents(buffer, max_in_memory_document_bytes=1024))
+    assert_equal(bytes(document["content"]), data)
+    content_file = document["content_file"]
+    assert_equal(content_file.read(), data)
+    assert_equal(document["sha1"], in_memory["sha1"])
+
+    # Spilled content can be stored without reading it into memory
+    with tempfile.TemporaryDirectory() as temp_path:
+        content_file.seek(0)
+        LocalClient().put_fileobj(os.path.join(temp_path, "raw", document["sha1"]), content_file)
+        assert_equal(LocalClient().get_buffer(os.path.join(temp_path, "raw", document["sha1"])), data)
+
+    document.release()
+    assert_equal(content_file.closed, True)
+
+
+def test_streaming_digest():
+    """
+    Test that digests updated as content is read or decoded match digests of the full content.
+    :return:
+    """
+    data = os.urandom(45 * 100 + 17)
+    encoded = b"begin 644 test.pdf\n" + b"".join(binascii.b2a_uu(data[i:i + 45]) for i in range(0, len(data), 45)) \
+              + b"`\nend\n"
+    buffer = b"<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>1\n<FILENAME>test.pdf\n<TEXT>\n" + encoded + b"</TEXT>\n</DOCUMENT>\n"
+    expected_sha1 = hashlib.sha1(data).hexdigest()
+    expected_secondary = "blake2b:" + hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    secondary_digest = openedgar.parsers.digest.SECONDARY_DIGEST
+    openedgar.parsers.digest.SECONDARY_DIGEST = "blake2b"
+    try:
+        for max_in_memory_document_bytes in [1024, 1024 * 1024]:
+            document = next(openedgar.parsers.edgar.iter_filing_documents(
+                buffer, max_in_memory_document_bytes=max_in_memory_document_bytes))
+            _ = document.content
+            assert_equal(document._sha1, expected_sha1)
+            assert_equal(document.secondary_digest, expected_secondary)
+            document.release()
+            assert_equal(document.sha1, expected_sha1)
+    finally:
+        openedgar.parsers.digest.SECONDARY_DIGEST = secondary_digest
+
+    # Hashing while reading from storage
+    with tempfile.TemporaryDirectory() as temp_path:
+        LocalClient().put_buffer(os.path.join(temp_path, "test.pdf"), data)
+        digest = openedgar.parsers.digest.StreamingDigest("blake2b")
+        assert_equal(LocalClient().get_buffer(os.path.join(temp_path, "test.pdf"), digest=digest), data)
+        assert_equal((digest.sha1, digest.secondary_digest, digest.size),
+                     (expected_sha1, expected_secondary, len(data)))
+
+    digest = openedgar.parsers.digest.get_buffer_digest(memoryview(data), secondary="")
+    assert_equal((digest.sha1, digest.secondary_digest), (expected_sha1, None))
+
+
+def test_parsed_filing_records():
+    """
+    Test that parsed documents are compact records whose content is only resolved when accessed.
+    :return:
+    """
+    buffer = b"<SEC-DOCUMENT>\n<SEC-HEADER>\nACCESSION NUMBER:\t\t0000000000-18-000001\n" \
+             b"CONFORMED SUBMISSION TYPE:\t8-K\n</SEC-HEADER>\n" \
+             b"<DOCUMENT>\n<TYPE>8-K\n<SEQUENCE>1\n<TEXT>\n<HTML>8-K</HTML>\n</TEXT>\n</DOCUMENT>\n" \
+             b"<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>2\n<TEXT>\nExhibit\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n"
+
+    filing_data = openedgar.parsers.edgar.parse_filing(buffer)
+    assert_equal(filing_data.form_type, "8-K")
+    assert_equal(filing_data["accession_number"], "0000000000-18-000001")
+    assert_equal([(d.type, d.content_type) for d in filing_data.documents], [("8-K", "text/html"),
+                                                                              ("EX-99", "text/plain")])
+
+    document = filing_data.documents[1]
+    assert_equal(hasattr(document, "__dict__"), False)
+    assert_equal(document._content, None)
+    assert_equal(document["content"].obj, buffer)
+    assert_equal(bytes(document.content), b"\nExhibit\n")
+    assert_equal(document.sha1, hashlib.sha1(b"\nExhibit\n").hexdigest())
+    assert_raises(KeyError, document.__getitem__, "missing")
+
+
+def test_synthetic_filing():
+    """
+    Test parsing synthetic SEC and IMS filings with uuencoded exhibits and ISO-8859-1 content.
+    :return:
+    """
+    for header_type, encoding in [("SEC", "utf-8"), ("IMS", "iso-8859-1")]:
+        filing_file = io.BytesIO()
+        generated = openedgar.benchmarks.corpus.write_filing(filing_file, seed=7, header_type=header_type,
+                                                            form_type="10-K", cik=4321,
+                                                            date_filed=datetime.date(1995, 3, 1), exhibit_count=20,
+                                                            pdf_count=1, zip_count=1, binary_size=8 * 1024,
+                                                            encoding=encoding)
+
+        filing_data = openedgar.parsers.edgar.parse_filing(filing_file.getvalue())
+        assert_equal(filing_data.accession_number, generated.accession_number)
+        assert_equal(filing_data.form_type, generated.form_type)
+        assert_equal(filing_data.date_filed, generated.date_filed)
+        assert_equal([(d.type, d.sequence, d.file_name, d.content_type, d.sha1) for d in filing_data.documents],
+                     [tuple(d) for d in generated.documents])
+
+
+def test_filing_header_parser_multiple_filers():
+    """
+    Test parsing every party from a multi-filer SEC-HEADER.
+    :return:
+    """
+    header = "0000000000-18-000001.hdr.sgml : 20180102\n" \
+             "<ACCEPTANCE-DATETIME>20180102160000\n" \
+             "ACCESSION NUMBER:\t\t0000000000-18-000001\n" \
+             "CONFORMED SUBMISSION TYPE:\t4\n" \
+             "FILED AS OF DATE:\t\t20180102\n\n" \
+             "REPORTING-OWNER:\t\n\n" \
+             "\tOWNER DATA:\t\n" \
+             "\t\tCOMPANY CONFORMED NAME:\t\t\tDOE JANE\n" \
+             "\t\tCENTRAL INDEX KEY:\t\t\t0000000002\n\n" \
+             "\tMAIL ADDRESS:\t\n" \
+             "\t\tSTATE:\t\t\tCA\n\n" \
+             "ISSUER:\t\t\n\n" \
+             "\tCOMPANY DATA:\t\n" \
+             "\t\tCOMPANY CONFORMED NAME:\t\t\tEXAMPLE CO\n" \
+             "\t\tCENTRAL INDEX KEY:\t\t\t0000000001\n" \
+             "\t\tSTATE OF INCORPORATION:\t\t\tDE\n\n" \
+             "\tMAIL ADDRESS:\t\n" \
+             "\t\tSTATE:\t\t\tNJ\n\n" \
+             "\tBUSINESS ADDRESS:\t\n" \
+             "\t\tSTATE:\t\t\tNY\n\n" \
+             "\tFORMER COMPANY:\t\n" \
+             "\t\tFORMER CONFORMED NAME:\tEXAMPLE INC\n\n" \
+             "\tFORMER COMPANY:\t\n" \
+             "\t\tFORMER CONFORMED NAME:\tEXAMPLE LLC\n"
+
+    filing_data = openedgar.parsers.edgar.parse_filing_header_fields(
+        header, openedgar.parsers.edgar.get_empty_filing_data())
+
+    assert_equal(filing_data["accession_number"], "0000000000-18-000001")
+    assert_equal(filing_data["form_type"], "4")
+    assert_equal([(c["role"], c["cik"]) for c in filing_data["companies"]],
+                 [("REPORTING-OWNER", "0000000002"), ("ISSUER", "0000000001")])
+    assert_equal(filing_data["companies"][1]["state_location"], "NY")
+    assert_equal(len(filing_data["header"]["ISSUER"][0]["FORMER COMPANY"]), 2)
+
+    # Top-level fields come from the first party
+    assert_equal(filing_data["cik"], "0000000002")
+    assert_equal(filing_data["state_location"], "CA")
+
+
+def test_filing_header_parser_blank_fields():
+    """
+    Test that blank header fields are parsed as empty values rather than sections.
+    :return:
+    """
+    header = "0000000000-18-000001.hdr.sgml : 20180102\n" \
+             "ACCESSION NUMBER:\t\t0000000000-18-000001\n" \
+             "CONFORMED SUBMISSION TYPE:\t10-K\n" \
+             "CONFORMED PERIOD OF REPORT:\t\n" \
+             "FILED AS OF DATE:\t\t20180102\n\n" \
+             "FILER:\n\n" \
+             "\tCOMPANY DATA:\t\n" \
+             "\t\tCOMPANY CONFORMED NAME:\t\t\tEXAMPLE CO\n" \
+             "\t\tCENTRAL INDEX KEY:\t\t\t0000000001\n" \
+             "\t\tIRS NUMBER:\t\t\t\n" \
+             "\t\tSTATE OF INCORPORATION:\t\t\t\n\n" \
+             "\tBUSINESS ADDRESS:\t\n" \
+             "\t\tSTATE:\t\t\t\n"
+
+    filing_data = openedgar.parsers.edgar.parse_filing_header_fields(
+        header, openedgar.parsers.edgar.get_empty_filing_data())
+
+    assert_equal(filing_data["reporting_period"], None)
+    assert_equal(filing_data["date_filed"], datetime.date(2018, 1, 2))
+    assert_equal((filing_data["cik"], filing_data["irs_number"], filing_data["state_incorporation"],
+                  filing_data["state_location"]), ("0000000001", "", "", ""))
+    assert_equal(filing_data["header"]["FILER"][0]["BUSINESS ADDRESS"], [{"STATE": ""}])
+
+
+def test_extracted_documents_order():
+    """
+    Test that concurrently extracted documents are returned in sequence order.
+    :return:
+    """
+    def slow_extract_text(buffer):
+        time.sleep(0.05 if bytes(buffer).startswith(b"\n1") else 0.01)
+        return bytes(buffer).decode("utf-8").strip()
+
+    buffer = "".join("<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>{0}\n<TEXT>\n{0}\n</TEXT>\n</DOCUMENT>\n".format(i)
+                     for i in range(1, 21)).encode("utf-8")
+
+    plain_extractor = openedgar.parsers.text.get_text_extractor("text/plain")
+    openedgar.parsers.text.register_text_extractor("text/plain", "slow", slow_extract_text)
+    try:
+        documents = openedgar.parsers.edgar.iter_extracted_documents(
+            openedgar.parsers.edgar.iter_filing_documents(buffer), max_workers=4)
+        assert_equal([(d["sequence"], d["content_text"], d["text_extractor"]) for d in documents],
+                     [(str(i), str(i), "slow") for i in range(1, 21)])
+    finally:
+        openedgar.parsers.text.register_text_extractor("text/plain", *plain_extractor)
+
+
+def test_text_cache():
+    """
+    Test that extraction only calls Tika for text that is not already cached.
+    :return:
+    """
+    extract_calls = []
+
+    def counting_extract_text(buffer, sha1=None):
+        extract_calls.append(bytes(buffer))
+        return bytes(buffer).decode("utf-8")
+
+    text_cache = openedgar.parsers.text.TextCache(max_size=10)
+    extract_text = openedgar.parsers.edgar.extract_text
+    openedgar.parsers.edgar.extract_text = counting_extract_text
+    try:
+        for content in [b"aaaa", b"bbbb", b"aaaa", b"cccc", b"bbbb"]:
+            sha1 = hashlib.sha1(content).hexdigest()
+            text, extractor_name = openedgar.parsers.edgar.extract_document_text(content, sha1, text_cache)
+            assert_equal((text, extractor_name), (content.decode("utf-8"), openedgar.parsers.text.TIKA_EXTRACTOR))
+    finally:
+        openedgar.parsers.edgar.extract_text = extract_text
+
+    # bbbb is evicted when cccc is added
+    assert_equal(extract_calls, [b"aaaa", b"bbbb", b"cccc", b"bbbb"])
+    assert_equal(text_cache.hit_count, 1)
+
+    # Stored text keeps the name of the extractor that produced it
+    sha1 = hashlib.sha1(b"<p>dddd</p>").hexdigest()
+    stored_paths = {openedgar.parsers.text.get_text_path(sha1): b"dddd",
+                    openedgar.parsers.text.get_text_extractor_path(sha1): b"html"}
+    client = types.SimpleNamespace(path_exists=lambda path: path in stored_paths,
+                                   get_buffer=lambda path: stored_paths[path])
+    assert_equal(openedgar.parsers.text.TextCache(client).get(sha1), ("dddd", "html"))
+
+
+def test_extract_errors():
+    """
+    Test that a failed extraction leaves the document without text instead of failing the filing.
+    :return:
+    """
+    def failing_extract_text(buffer, sha1=None):
+        raise RuntimeError("No Tika endpoint available to extract sha1={0}".format(sha1))
+
+    buffer = b"<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>1\n<FILENAME>a.bin\n<TEXT>\nbegin 644 a.bin\n#86)C\n`\nend\n" \
+             b"</TEXT>\n</DOCUMENT>\n<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>2\n<TEXT>\nplain text\n</TEXT>\n</DOCUMENT>\n"
+
+    extract_text = openedgar.parsers.edgar.extract_text
+    openedgar.parsers.edgar.extract_text = failing_extract_text
+    try:
+        documents = list(openedgar.parsers.edgar.iter_filing_documents(buffer, extract=True))
+        assert_equal([(d["content_type"], d["content_text"]) for d in documents],
+                     [("application/octet-stream", None), ("text/plain", "\nplain text\n")])
+        document = openedgar.parsers.edgar.parse_filing_document(buffer, extract=True, start_pos=0,
+                                                                 end_pos=buffer.find(b"</DOCUMENT>") + 11)
+        assert_equal((document["content_text"], document["text_extractor"]), (None, None))
+    finally:
+        openedgar.parsers.edgar.extract_text = extract_text
+
+
+def test_text_extractors():
+    """
+    Test that plain text, HTML, and XML are extracted in-process and other content types are sent to Tika.
+    :return:
+    """
+    def tika_extract_text(buffer, sha1=None):
+        return "tika"
+
+    documents = [("text/plain", b"Plain text\n", "plain", "Plain text\n"),
+                 ("text/html", b"<HTML><BODY><P>Hello\n world<!-- x --></P><SCRIPT>y</SCRIPT>"
+                               b"<TABLE><TR><TD>a</TD><TD>b</TD></TR></TABLE></BODY></HTML>",
+                  "html", "Hello world\n\na\tb\n"),
+                 ("application/xml", b"\n<XML>\n<?xml version=\"1.0\"?>\n<a><b>x</b><c> y </c></a>\n</XML>\n",
+                  "xml", "x\ny\n"),
+                 ("application/pdf", b"%PDF-1.4", "tika", "tika"),
+                 ("application/octet-stream", b"\x00\x01", "tika", "tika")]
+
+    extract_text = openedgar.parsers.edgar.extract_text
+    openedgar.parsers.edgar.extract_text = tika_extract_text
+    try:
+        for content_type, content, extractor_name, expected_text in documents:
+            text, extractor = openedgar.parsers.edgar.extract_document_text(content, content_type=content_type)
+            assert_equal((extractor, text), (extractor_name, expected_text))
+    finally:
+        openedgar.parsers.edgar.extract_text = extract_text
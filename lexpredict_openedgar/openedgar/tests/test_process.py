@@ -22,7 +22,16 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import hashlib
+import mmap
+import os
+import tempfile
+
+from nose.tools import assert_equal
+
+from openedgar.clients.local import LocalClient
 from openedgar.clients.s3 import S3Client
+from openedgar.parsers.digest import StreamingDigest
 import openedgar.tasks
 from config.settings.base import S3_BUCKET
 
@@ -38,3 +47,21 @@ def test_process_filing():
         client = S3Client()
         buffer = client.get_buffer("edgar/data/1000180/0000950134-05-005462.txt")
         openedgar.tasks.process_filing(buffer)
+
+
+def test_open_stored_filing():
+    """
+    Test that stored local filings are memory-mapped and hashed rather than read into memory.
+    :return:
+    """
+    buffer = b"<SEC-DOCUMENT>test</SEC-DOCUMENT>"
+    with tempfile.TemporaryDirectory() as temp_path:
+        path = os.path.join(temp_path, "edgar/data/1/0000000001-18-000001.txt")
+        LocalClient().put_buffer(path, buffer)
+
+        digest = StreamingDigest()
+        filing_buffer = openedgar.tasks.open_stored_filing(LocalClient(), path, digest=digest)
+        assert_equal(isinstance(filing_buffer, mmap.mmap), True)
+        assert_equal(filing_buffer[:], buffer)
+        assert_equal(digest.sha1, hashlib.sha1(buffer).hexdigest())
+        filing_buffer.close()
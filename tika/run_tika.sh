@@ -1 +1,10 @@
-java -jar tika-server-1.18.jar
+# Run TIKA_SERVERS Tika servers on consecutive ports from TIKA_PORT, e.g., 9998 and 9999 for
+# TIKA_SERVERS=2; list them in TIKA_ENDPOINTS to balance extraction across them.
+TIKA_PORT=${TIKA_PORT:-9998}
+TIKA_SERVERS=${TIKA_SERVERS:-1}
+
+for i in $(seq 0 $((TIKA_SERVERS - 1)))
+do
+    java -jar tika-server-1.18.jar --port $((TIKA_PORT + i)) &
+done
+wait